@@ -0,0 +1,93 @@
+"""
+Sales rollups: DailySales, DailyCategorySales and DailyProductSales are kept up to
+date incrementally from OrderSerializer and rebuilt in chunks by the
+``backfill_sales_rollups`` command, so reporting never scans Order/OrderItem.
+"""
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import DailyCategorySales, DailyProductSales, DailySales, OrderItem
+
+logger = logging.getLogger(__name__)
+
+
+class RollupDelta:
+    """Accumulates (orders, units, revenue) changes per day, category and product."""
+
+    def __init__(self):
+        self.days = defaultdict(lambda: [0, 0, Decimal("0.00")])
+        self.categories = defaultdict(lambda: [0, Decimal("0.00")])
+        self.products = defaultdict(lambda: [0, Decimal("0.00")])
+
+    def add_order(self, day, count=1):
+        self.days[(day,)][0] += count
+
+    def add_line(self, day, product_id, category_id, units, revenue, sign=1):
+        self.days[(day,)][1] += sign * units
+        self.days[(day,)][2] += sign * revenue
+        for bucket, key in ((self.categories, (day, category_id)), (self.products, (day, product_id))):
+            bucket[key][0] += sign * units
+            bucket[key][1] += sign * revenue
+
+    def apply(self):
+        """Upsert all non-zero changes; keys are sorted so concurrent writers lock rows in the same order."""
+        _increment(DailySales, ["date"], ["orders", "units", "revenue"], self.days)
+        _increment(DailyCategorySales, ["date", "category"], ["units", "revenue"], self.categories)
+        _increment(DailyProductSales, ["date", "product"], ["units", "revenue"], self.products)
+
+
+def _increment(model, key_fields, value_fields, rows):
+    rows = {key: values for key, values in rows.items() if any(values)}
+    if not rows:
+        return
+    table = connection.ops.quote_name(model._meta.db_table)
+    keys = [connection.ops.quote_name(model._meta.get_field(name).column) for name in key_fields]
+    values = [connection.ops.quote_name(name) for name in value_fields]
+    updates = ", ".join(f"{column} = {table}.{column} + EXCLUDED.{column}" for column in values)
+    sql = (
+        f"INSERT INTO {table} ({', '.join(keys + values)}) VALUES ({', '.join(['%s'] * (len(keys) + len(values)))}) "
+        f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(*key, *vals) for key, vals in sorted(rows.items())])
+
+
+def order_lines(order):
+    """
+    (product_id, category_id, units, revenue) for each item of the order, in one query.
+    Revenue uses the unit price captured when the item was ordered, so the lines removed by a
+    later edit cancel exactly what was added, whatever the product costs now.
+    """
+    items = OrderItem.objects.filter(order=order).values_list("product_id", "product__category_id", "quantity", "unit_price")
+    return [(product_id, category_id, quantity, quantity * price) for product_id, category_id, quantity, price in items]
+
+
+def record_order_change(order, before_lines, after_lines, created=False):
+    """
+    Schedule the rollup update for an order whose items went from before_lines to
+    after_lines. Runs after commit so the shared per-day rows are never locked for
+    the duration of the order transaction (stock updates, notifications).
+    """
+    day = timezone.localdate(order.created_at)
+    delta = RollupDelta()
+    if created:
+        delta.add_order(day)
+    for line in before_lines:
+        delta.add_line(day, *line, sign=-1)
+    for line in after_lines:
+        delta.add_line(day, *line)
+
+    def _apply():
+        try:
+            with transaction.atomic():
+                delta.apply()
+        except Exception as e:
+            # Rollups can always be rebuilt with backfill_sales_rollups; never fail the order.
+            logger.exception("Sales rollup update failed for order %s: %s", order.id, e)
+
+    transaction.on_commit(_apply)
@@ -0,0 +1,22 @@
+from rest_framework import authentication
+
+
+class LazyOIDCAuthentication(authentication.BaseAuthentication):
+    """
+    Drop-in for mozilla_django_oidc.contrib.drf.OIDCAuthentication that only imports it
+    (and its josepy / cryptography / requests dependencies) once a request carries a
+    Bearer token. Every other request is answered without touching the OIDC stack.
+    """
+
+    www_authenticate_realm = "api"
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != b"bearer":
+            return None
+        from mozilla_django_oidc.contrib.drf import OIDCAuthentication
+
+        return OIDCAuthentication().authenticate(request)
+
+    def authenticate_header(self, request):
+        return f'Bearer realm="{self.www_authenticate_realm}"'
@@ -0,0 +1,102 @@
+"""
+Carts: time-limited stock holds that turn into an order at checkout.
+
+Putting products in the cart creates one StockHold per product for CART_HOLD_SECONDS.
+A hold does not move stock. It lowers the product's available stock (stock on hand
+minus unexpired holds), so other customers' orders and holds cannot take those units.
+Each cart update replaces the customer's holds and restarts the timer.
+
+Checkout converts unexpired holds into an Order. The units were checked when the holds
+were placed, so checkout only decrements stock and deletes the holds. An expired hold
+stops counting at expires_at, whether or not its row has been deleted yet. The
+``release_expired_holds`` command deletes expired rows in batches.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import analytics, inventory
+from .models import Order, OrderItem, Product, ProductStockBucket, StockHold
+
+
+class HoldExpired(Exception):
+    """Checkout found no cart, or holds that expired before checkout."""
+
+
+def hold_seconds():
+    return getattr(settings, "CART_HOLD_SECONDS", 900)
+
+
+@transaction.atomic
+def hold(customer, lines):
+    """
+    Replace the customer's cart with holds for `lines` ({product_id: quantity}).
+    Raises Product.DoesNotExist or inventory.InsufficientStock; nothing is held then.
+    """
+    StockHold.objects.filter(customer=customer).delete()
+    expires_at = timezone.now() + timedelta(seconds=hold_seconds())
+    products = Product.objects.select_for_update().order_by("pk").in_bulk(list(lines))
+    holds = []
+    # Product ids in ascending order, the same order in which orders take stock
+    for product_id in sorted(lines):
+        product = products.get(product_id)
+        if product is None:
+            raise Product.DoesNotExist(f"Product with ID {product_id} does not exist.")
+        if product.stock_shards:
+            # Wait for in-flight orders on every bucket so the sum below is exact
+            list(ProductStockBucket.objects.filter(product=product).select_for_update().order_by("bucket"))
+        quantity = lines[product_id]
+        if product.available_stock < quantity:
+            raise inventory.InsufficientStock(product, quantity)
+        holds.append(StockHold(customer=customer, product=product, quantity=quantity, expires_at=expires_at))
+    return StockHold.objects.bulk_create(holds)
+
+
+def release(customer):
+    """Empty the customer's cart, making its units available again."""
+    return StockHold.objects.filter(customer=customer).delete()[0]
+
+
+@transaction.atomic
+def checkout(customer):
+    """Create an Order from the customer's holds and delete them. Raises HoldExpired."""
+    holds = list(StockHold.objects.select_for_update().filter(customer=customer).select_related("product").order_by("product_id"))
+    now = timezone.now()
+    if not holds:
+        raise HoldExpired("Cart is empty.")
+    expired = [h.product.name for h in holds if h.expires_at <= now]
+    if expired:
+        raise HoldExpired(f"Holds expired for: {', '.join(expired)}. Update the cart and try again.")
+
+    order = Order.objects.create(customer=customer)
+    OrderItem.objects.bulk_create(
+        OrderItem(order=order, product=h.product, quantity=h.quantity, created_at=order.created_at, unit_price=h.product.price)
+        for h in holds
+    )
+    for h in holds:
+        inventory.take(h.product, h.quantity, reserved=True)
+    StockHold.objects.filter(pk__in=[h.pk for h in holds]).delete()
+
+    order.update_total_amount()
+    analytics.record_order_change(order, [], analytics.order_lines(order), created=True)
+    return order
+
+
+def expired_hold_ids(batch_size, now=None):
+    """Primary keys of up to `batch_size` expired holds, oldest first (range scan of the expiry index)."""
+    expired = StockHold.objects.filter(expires_at__lte=now or timezone.now()).order_by("expires_at")
+    return list(expired.values_list("pk", flat=True)[:batch_size])
+
+
+def release_expired(batch_size=1000):
+    """Delete expired holds in batches of `batch_size`, one short statement each; return the count."""
+    now = timezone.now()
+    released = 0
+    while True:
+        batch = expired_hold_ids(batch_size, now)
+        if not batch:
+            return released
+        released += StockHold.objects.filter(pk__in=batch).delete()[0]
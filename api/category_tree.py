@@ -0,0 +1,125 @@
+"""
+Conditional GETs for the category list (/api/categories/), the whole nested tree.
+
+A statement-level trigger on api_category bumps CategoryTreeVersion on every write, in the
+writing transaction. Each worker keeps the version it last read and re-reads it at most
+once per CATEGORY_TREE_VERSION_TTL seconds. Writes made through this worker (API, admin)
+reset it on commit, so other workers lag by at most the TTL. The rendered body of a version
+is kept in memory, and its strong ETag is a hash of those bytes. After a write, one thread
+per worker renders the new version while concurrent requests wait for it. A request whose
+If-None-Match matches therefore gets a 304 without any queries or serialization, and a
+repeat 200 costs no serialization either.
+"""
+
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category, CategoryTreeVersion
+
+# Kept for two versions, so a worker alternating between a lagging replica and the primary
+# does not re-render on every switch.
+MAX_BODIES = 2
+
+TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION api_category_tree_bump() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO api_categorytreeversion (id, version) VALUES (1, 1)
+    ON CONFLICT (id) DO UPDATE SET version = api_categorytreeversion.version + 1;
+    RETURN NULL;
+END $$;
+DROP TRIGGER IF EXISTS category_tree_version ON api_category;
+CREATE TRIGGER category_tree_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON api_category
+    FOR EACH STATEMENT EXECUTE FUNCTION api_category_tree_bump();
+"""
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS category_tree_version ON api_category;
+DROP FUNCTION IF EXISTS api_category_tree_bump();
+"""
+
+_lock = threading.Lock()
+_versions = {}  # database alias -> (version, read at)
+_bodies = {}  # version -> (etag, body)
+_rendering = {}  # version -> lock held by the thread rendering it
+
+
+def install_version_trigger(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(TRIGGER_SQL)
+
+
+def current_version(using=None):
+    """The tree version on `using` (the read database by default), re-read at most once per TTL."""
+    using = using or router.db_for_read(CategoryTreeVersion)
+    ttl = getattr(settings, "CATEGORY_TREE_VERSION_TTL", 1.0)
+    with _lock:
+        cached = _versions.get(using)
+        if cached is not None and time.monotonic() - cached[1] < ttl:
+            return cached[0]
+    version = CategoryTreeVersion.objects.using(using).filter(pk=1).values_list("version", flat=True).first() or 0
+    with _lock:
+        _versions[using] = (version, time.monotonic())
+    return version
+
+
+def rendered(version):
+    """(etag, body) cached for `version`, or None."""
+    with _lock:
+        return _bodies.get(version)
+
+
+def get_or_render(version, render):
+    """
+    (etag, body) of `version`, calling render() for the body bytes when it is not cached yet.
+    Concurrent requests for the same version wait for a single render instead of each
+    building the tree.
+    """
+    cached = rendered(version)
+    if cached is not None:
+        return cached
+    with _lock:
+        render_lock = _rendering.setdefault(version, threading.Lock())
+    try:
+        with render_lock:
+            cached = rendered(version)
+            if cached is None:
+                cached = store(version, render())
+    finally:
+        with _lock:
+            if _rendering.get(version) is render_lock:
+                del _rendering[version]
+    return cached
+
+
+def store(version, body):
+    """Cache the rendered body of `version` and return (etag, body)."""
+    entry = (f'"{version}-{hashlib.sha256(body).hexdigest()[:20]}"', body)
+    with _lock:
+        _bodies[version] = entry
+        while len(_bodies) > MAX_BODIES:
+            del _bodies[min(_bodies)]
+    return entry
+
+
+def invalidate():
+    """Forget the cached versions, so the next request re-reads them (its body cache stays valid)."""
+    with _lock:
+        _versions.clear()
+
+
+def clear():
+    with _lock:
+        _versions.clear()
+        _bodies.clear()
+        _rendering.clear()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def _category_written(**kwargs):
+    transaction.on_commit(invalidate, using=kwargs.get("using"))
@@ -0,0 +1,40 @@
+"""
+System checks for settings that only work when every worker shares the default cache.
+
+They run before ``manage.py bootstrap`` (and so at container start), so a misconfigured
+deployment fails to start instead of silently keeping that state per worker.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def default_cache_is_process_local():
+    return isinstance(caches["default"], PROCESS_LOCAL_CACHES)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    errors = []
+    if getattr(settings, "DATABASE_REPLICAS", []) and default_cache_is_process_local():
+        errors.append(
+            Error(
+                "Read replicas are configured but the default cache is per-process.",
+                hint="Read-your-writes pins would not reach the other workers; configure a shared CACHES backend.",
+                id="api.E001",
+            )
+        )
+    if getattr(settings, "THROTTLE_BACKEND", "local") == "cache" and default_cache_is_process_local():
+        errors.append(
+            Error(
+                'THROTTLE_BACKEND is "cache" but the default cache is per-process.',
+                hint='Each worker would get the full rate; configure a shared CACHES backend or use "local".',
+                id="api.E002",
+            )
+        )
+    return errors
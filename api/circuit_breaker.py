@@ -0,0 +1,146 @@
+"""
+Circuit breakers for the notification providers (Africa's Talking SMS and SMTP).
+
+A provider that hangs would otherwise hold each request that notifies it until the
+gunicorn timeout. Every call also has connect/read timeouts (SMS_CONNECT_TIMEOUT,
+SMS_READ_TIMEOUT, EMAIL_TIMEOUT). On top of that, each provider has a breaker:
+
+- closed: calls go through. CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive failures open it.
+- open: calls fail at once with CircuitOpen, and callers fall back immediately (simulated SMS,
+  no email). After CIRCUIT_BREAKER_RESET_SECONDS the breaker turns half-open.
+- half-open: a single probe call goes through while other calls keep failing fast. If the probe
+  succeeds the breaker closes; if it fails the breaker opens for another reset period.
+
+State is per worker process and shared by its threads. Each worker detects an outage on its
+own, after at most the threshold number of timed-out calls. The state is exported as the
+``circuit_breaker_state`` gauge (0 closed, 1 half-open, 2 open) of the live workers.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .metrics import CIRCUIT_BREAKER_REJECTIONS, CIRCUIT_BREAKER_STATE
+
+logger = logging.getLogger(__name__)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(Exception):
+    def __init__(self, breaker):
+        self.breaker = breaker
+        super().__init__(f"{breaker.name} circuit is open; failing fast")
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. Exceptions of type `failures` count as failures and
+    are re-raised; anything else passes through without affecting the breaker.
+    """
+
+    def __init__(self, name, failures=(Exception,), failure_threshold=None, reset_seconds=None):
+        self.name = name
+        self.failures = failures
+        self._failure_threshold = failure_threshold
+        self._reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        CIRCUIT_BREAKER_STATE.labels(breaker=name).set(STATE_VALUES[CLOSED])
+
+    @property
+    def failure_threshold(self):
+        return self._failure_threshold or getattr(settings, "CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5)
+
+    @property
+    def reset_seconds(self):
+        return self._reset_seconds if self._reset_seconds is not None else getattr(settings, "CIRCUIT_BREAKER_RESET_SECONDS", 30)
+
+    @property
+    def state(self):
+        with self._lock:
+            self._check_reset()
+            return self._state
+
+    def call(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) through the breaker; raise CircuitOpen instead when it is open."""
+        probe = self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except self.failures:
+            self._record_failure(probe)
+            raise
+        except BaseException:
+            if probe:
+                with self._lock:
+                    self._probing = False
+            raise
+        self._record_success()
+        return result
+
+    async def acall(self, func, *args, **kwargs):
+        """Await func(*args, **kwargs) through the breaker; the async counterpart of call()."""
+        probe = self._before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except self.failures:
+            self._record_failure(probe)
+            raise
+        except BaseException:
+            if probe:
+                with self._lock:
+                    self._probing = False
+            raise
+        self._record_success()
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._set_state(CLOSED)
+            self._consecutive_failures = 0
+            self._probing = False
+
+    def _before_call(self):
+        """Return whether this call is the half-open probe; raise CircuitOpen when it may not run."""
+        with self._lock:
+            if self._state == CLOSED:
+                return False
+            self._check_reset()
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+        CIRCUIT_BREAKER_REJECTIONS.labels(breaker=self.name).inc()
+        raise CircuitOpen(self)
+
+    def _record_success(self):
+        with self._lock:
+            self._consecutive_failures = 0
+            self._probing = False
+            if self._state != CLOSED:
+                logger.info("%s circuit closed", self.name)
+                self._set_state(CLOSED)
+
+    def _record_failure(self, probe):
+        with self._lock:
+            self._consecutive_failures += 1
+            if probe:
+                self._probing = False
+            if probe or (self._state == CLOSED and self._consecutive_failures >= self.failure_threshold):
+                logger.warning("%s circuit opened after %d consecutive failure(s)", self.name, self._consecutive_failures)
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def _check_reset(self):
+        """Turn half-open once the reset period has passed (caller holds the lock), gauge included."""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self._set_state(HALF_OPEN)
+
+    def _set_state(self, state):
+        self._state = state
+        CIRCUIT_BREAKER_STATE.labels(breaker=self.name).set(STATE_VALUES[state])
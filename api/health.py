@@ -0,0 +1,82 @@
+"""
+Liveness and readiness probes, answered by HealthCheckMiddleware ahead of the rest of the stack.
+
+- /healthz: the worker is up and serving. It makes no DB or cache calls, so a database
+  outage never makes Kubernetes restart healthy pods.
+- /readyz: warm-up has finished (api.warmup) and the database answers. The DB check runs at
+  most once per HEALTH_DB_CHECK_TTL seconds per worker. It also reports connection
+  saturation, which is this database's client connections out of max_connections.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.http import JsonResponse
+
+from . import warmup
+
+HEALTHZ_PATH = "/healthz"
+READYZ_PATH = "/readyz"
+
+_db_lock = threading.Lock()
+_db_result = {"checked_at": None, "report": None}
+
+
+class HealthCheckMiddleware:
+    """
+    Answer the probe paths before session, auth, CSRF and timing middleware run, so probes
+    cost no session lookups, log lines or metrics. It is first in MIDDLEWARE. Host
+    validation is skipped too, so kubelet probes to the pod IP need no ALLOWED_HOSTS entry.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path_info == HEALTHZ_PATH:
+            return JsonResponse({"status": "ok"})
+        if request.path_info == READYZ_PATH:
+            return readiness_view(request)
+        return self.get_response(request)
+
+
+def readiness_view(request):
+    """200 once this worker has warmed up and the database answers, 503 otherwise."""
+    warmup.ensure_started()
+    database = database_report()
+    ready = warmup.is_ready() and database["ok"]
+    return JsonResponse({"ready": ready, "warmup": warmup.state(), "database": database}, status=200 if ready else 503)
+
+
+def database_report():
+    """Connectivity and connection saturation of the default database, cached for HEALTH_DB_CHECK_TTL seconds."""
+    ttl = getattr(settings, "HEALTH_DB_CHECK_TTL", 15)
+    with _db_lock:
+        checked_at = _db_result["checked_at"]
+        if checked_at is None or time.monotonic() - checked_at >= ttl:
+            _db_result.update(report=_check_database(), checked_at=time.monotonic())
+        return {**_db_result["report"], "age_s": round(time.monotonic() - _db_result["checked_at"], 1)}
+
+
+def _check_database():
+    connection = connections[DEFAULT_DB_ALIAS]
+    start = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT count(*), current_setting('max_connections')::int "
+                    "FROM pg_stat_activity WHERE datname = current_database() AND backend_type = 'client backend'"
+                )
+                in_use, max_connections = cursor.fetchone()
+            else:
+                cursor.execute("SELECT 1")
+                in_use = max_connections = None
+    except DatabaseError as e:
+        return {"ok": False, "error": str(e).strip()[:200]}
+    report = {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+    if max_connections:
+        report.update(connections=in_use, max_connections=max_connections, saturation=round(in_use / max_connections, 3))
+    return report
@@ -0,0 +1,93 @@
+"""
+Idempotency-Key support for unsafe API actions.
+
+The first request with a given key stores a hash of its body and, once it succeeds, the
+response. Retries with the same key get that stored response back without re-running
+validation, stock checks or notifications. A retry that arrives while the first request
+is still running waits on the key's unique index and then replays. Failed (non-2xx)
+attempts release the key, so the client can retry with it. Keys expire after
+IDEMPOTENCY_KEY_TTL seconds and are purged by ``manage.py purge_idempotency_keys``.
+"""
+
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def expiry_cutoff():
+    return timezone.now() - timedelta(seconds=getattr(settings, "IDEMPOTENCY_KEY_TTL", 86400))
+
+
+def request_hash(request):
+    payload = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(f"{request.method} {request.path}\n{payload}".encode()).hexdigest()
+
+
+def idempotent(view_method):
+    """
+    Honor an Idempotency-Key header on a viewset action. Apply it inside @transaction.atomic
+    so the key row commits or rolls back together with the work it guards.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {"error": f"{IDEMPOTENCY_HEADER} must be at most 255 characters."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        digest = request_hash(request)
+        record = _claim(request.user, key, digest)
+        if record.response_status is not None or record.request_hash != digest:
+            return _replay(record, digest)
+
+        response = view_method(self, request, *args, **kwargs)
+        if status.is_success(response.status_code):
+            record.response_status = response.status_code
+            # Encode like the JSON renderer does (e.g. Decimal -> number) so replays match byte for byte
+            record.response_body = json.loads(json.dumps(response.data, cls=JSONEncoder))
+            record.save(update_fields=["response_status", "response_body"])
+        else:
+            record.delete()
+        return response
+
+    return wrapper
+
+
+def _claim(user, key, digest):
+    """Return the live record for `key`, creating it (and waiting out a concurrent holder) if needed."""
+    IdempotencyKey.objects.filter(user=user, key=key, created_at__lt=expiry_cutoff()).delete()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(user=user, key=key, request_hash=digest)
+    except IntegrityError:
+        # Already stored, or committed by a concurrent request we just waited for
+        return IdempotencyKey.objects.get(user=user, key=key)
+
+
+def _replay(record, digest):
+    if record.request_hash != digest:
+        return Response(
+            {"error": f"{IDEMPOTENCY_HEADER} was already used with a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(record.response_body, status=record.response_status)
+    response[REPLAYED_HEADER] = "true"
+    return response
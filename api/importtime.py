@@ -0,0 +1,62 @@
+"""
+Cold-import measurement with ``python -X importtime``.
+
+The modules are imported in a fresh interpreter so nothing is cached in sys.modules;
+the child inherits this process's environment (settings module, credentials).
+"""
+
+import os
+import subprocess
+import sys
+from collections import namedtuple
+
+ImportRecord = namedtuple("ImportRecord", ["module", "self_us", "cumulative_us", "depth"])
+
+
+def measure(modules):
+    """
+    Import `modules` in order in a new interpreter and return the ImportRecords they caused,
+    in -X importtime's order (children before their parent). Interpreter startup is excluded.
+    """
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    env.setdefault("DJANGO_SETTINGS_MODULE", "savannah_assess.settings")
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, env=env, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{result.stderr[-2000:]}")
+
+    records, subtree = [], []
+    for record in parse(result.stderr):
+        subtree.append(record)
+        if record.depth == 0:
+            if record.module in modules:
+                records.extend(subtree)
+            subtree = []
+    return records
+
+
+def parse(output):
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        records.append(ImportRecord(name.strip(), int(self_us), int(cumulative_us), depth))
+    return records
+
+
+def module_totals_ms(records):
+    """{module: cumulative ms} per requested module; later modules only count what earlier ones did not import."""
+    return {record.module: record.cumulative_us / 1000 for record in records if record.depth == 0}
+
+
+def by_package(records):
+    """{top-level package: self time in ms}, slowest first."""
+    totals = {}
+    for record in records:
+        package = record.module.split(".")[0]
+        totals[package] = totals.get(package, 0) + record.self_us
+    return {package: us / 1000 for package, us in sorted(totals.items(), key=lambda item: item[1], reverse=True)}
@@ -0,0 +1,94 @@
+"""
+Per-request timing breakdown (SQL, serializer, notification time).
+
+RequestTimingMiddleware creates a RequestMetrics for every request and installs a
+``connection.execute_wrapper`` that counts queries and keeps only the N slowest
+statements, so the cost per query is a couple of perf_counter() calls and a heap push.
+Application code records other phases with ``span("serializer")`` / ``@timed("notify")``.
+"""
+
+import functools
+import heapq
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Timings collected for one request."""
+
+    def __init__(self, slow_sql_count=5):
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.spans = {}
+        self._slow_sql = []  # min-heap of (duration, sequence, sql)
+        self._slow_sql_count = slow_sql_count
+        self._active = set()
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.query_count += 1
+            self.sql_time += duration
+            entry = (duration, self.query_count, sql)
+            if len(self._slow_sql) < self._slow_sql_count:
+                heapq.heappush(self._slow_sql, entry)
+            elif duration > self._slow_sql[0][0]:
+                heapq.heapreplace(self._slow_sql, entry)
+
+    def add(self, name, duration):
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+
+    def slowest_sql(self):
+        """[(duration_ms, sql)] for the slowest statements, slowest first."""
+        return [(round(duration * 1000, 2), sql) for duration, _, sql in sorted(self._slow_sql, reverse=True)]
+
+
+def current_metrics():
+    """Metrics of the request being handled, or None outside RequestTimingMiddleware."""
+    return _current.get()
+
+
+@contextmanager
+def collect(slow_sql_count=5):
+    metrics = RequestMetrics(slow_sql_count)
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Add the block's wall time to the current request's `name` phase (nested spans count once)."""
+    metrics = _current.get()
+    if metrics is None or name in metrics._active:
+        yield
+        return
+    metrics._active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics._active.discard(name)
+        metrics.add(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorator form of span()."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,184 @@
+"""
+Stock changes for orders, with optional sharding for hot products.
+
+A product with ``stock_shards = 0`` keeps its stock in ``Product.stock`` and every order
+updates that row. During a flash sale every order then queues on the same row lock.
+Sharding a product (``manage.py shard_stock``) splits its stock across N
+ProductStockBucket rows:
+
+- take() decrements one randomly chosen bucket that can cover the quantity, preferring
+  buckets not currently locked by other orders. Only when no single bucket is large
+  enough does it lock all buckets (in bucket order) and drain them.
+- Reads sum the buckets (``live_stock()``), so the API keeps reporting total stock.
+- Cart holds (api.carts) set units aside without moving them: available stock is stock on
+  hand minus unexpired holds, and take() refuses to dip into other customers' holds.
+- Buckets drift apart as orders land on them. ``manage.py rebalance_stock`` spreads the
+  total evenly again and refreshes ``Product.stock``. The in_stock filter relies on that
+  column being non-zero while any bucket holds stock.
+"""
+
+import random
+
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce, Mod
+from django.utils import timezone
+
+from .models import Product, ProductStockBucket, StockHold
+
+# First key of the pg_advisory_xact_lock(int, int) pair taken while checking holds on a sharded product
+HOLD_CHECK_LOCK = 4302
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product, quantity):
+        self.product = product
+        self.quantity = quantity
+        super().__init__(f"Insufficient stock for {product.name}. Requested: {quantity}")
+
+
+def live_stock():
+    """Expression for a product's current stock; the bucket subquery only runs for sharded rows."""
+    bucket_total = (
+        ProductStockBucket.objects.filter(product=OuterRef("pk"))
+        .order_by()
+        .values("product")
+        .annotate(total=Sum("stock"))
+        .values("total")
+    )
+    return Case(
+        When(stock_shards__gt=0, then=Coalesce(Subquery(bucket_total), 0)),
+        default=F("stock"),
+        output_field=IntegerField(),
+    )
+
+
+def held_quantities(product_ids=None):
+    """{product_id: units held by unexpired cart holds}, from a range scan of the hold expiry index."""
+    holds = StockHold.objects.filter(expires_at__gt=timezone.now())
+    if product_ids is not None:
+        holds = holds.filter(product_id__in=product_ids)
+    return dict(holds.order_by().values("product").annotate(total=Sum("quantity")).values_list("product", "total"))
+
+
+def held_quantity():
+    """Expression for the units of the outer product held by unexpired cart holds."""
+    held = (
+        StockHold.objects.filter(product=OuterRef("pk"), expires_at__gt=timezone.now())
+        .order_by()
+        .values("product")
+        .annotate(total=Sum("quantity"))
+        .values("total")
+    )
+    return Coalesce(Subquery(held), 0)
+
+
+def available_stock():
+    """
+    Expression for stock on hand minus unexpired holds. The uncorrelated IN list of held
+    products is evaluated once per query (hashed), so the per-product sum only runs for
+    products that have holds.
+    """
+    held_products = StockHold.objects.filter(expires_at__gt=timezone.now()).values("product")
+    return live_stock() - Case(When(pk__in=held_products, then=held_quantity()), default=0, output_field=IntegerField())
+
+
+def take(product, quantity, reserved=False):
+    """
+    Remove `quantity` units of `product` inside the caller's transaction, or raise InsufficientStock.
+    Units held by other customers' carts are not available. `reserved` means the units come from
+    a hold being checked out in the same transaction, so they are not checked again.
+    """
+    if not product.stock_shards:
+        if not Product.objects.filter(pk=product.pk, stock__gte=quantity).update(stock=F("stock") - quantity):
+            raise InsufficientStock(product, quantity)
+        if not reserved:
+            # The UPDATE holds the row lock that hold creation also takes, so this sees every committed hold
+            stock, held = Product.objects.filter(pk=product.pk).annotate(held=held_quantity()).values_list("stock", "held")[0]
+            if stock < held:
+                raise InsufficientStock(product, quantity)
+        return
+
+    _take_from_buckets(product, quantity)
+    if reserved or not held_quantities([product.pk]):
+        return
+    # Holds exist: orders on different buckets would each see only their own decrement, so the
+    # check against held units is serialized per product. Hold creation locks every bucket.
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [HOLD_CHECK_LOCK, product.pk])
+    on_hand = ProductStockBucket.objects.filter(product_id=product.pk).aggregate(total=Sum("stock"))["total"] or 0
+    if on_hand < held_quantities([product.pk]).get(product.pk, 0):
+        raise InsufficientStock(product, quantity)
+
+
+def _take_from_buckets(product, quantity):
+    buckets = ProductStockBucket.objects.filter(product_id=product.pk)
+    shards = product.stock_shards
+    start = random.randrange(shards)
+    # Buckets in rotated order from a random start, so concurrent orders spread across them
+    rotation = Mod(F("bucket") + (shards - start), shards)
+    candidates = buckets.filter(stock__gte=quantity).order_by(rotation)
+    # Prefer a bucket no other order holds; if all are busy, queue on one of them only
+    bucket = candidates.select_for_update(skip_locked=True).first() or candidates.select_for_update().first()
+    if bucket is not None:
+        buckets.filter(pk=bucket.pk).update(stock=F("stock") - quantity)
+        return
+
+    # No single bucket can cover the quantity: lock all of them, in a fixed order so
+    # concurrent fallbacks cannot deadlock, then drain the fullest first.
+    locked = list(buckets.select_for_update().order_by("bucket"))
+    if sum(b.stock for b in locked) < quantity:
+        raise InsufficientStock(product, quantity)
+    remaining = quantity
+    for b in sorted(locked, key=lambda b: b.stock, reverse=True):
+        part = min(b.stock, remaining)
+        b.stock -= part
+        remaining -= part
+        if not remaining:
+            break
+    ProductStockBucket.objects.bulk_update(locked, ["stock"])
+
+
+def give_back(product, quantity):
+    """Return `quantity` units of `product` (e.g. when an order is edited)."""
+    if not product.stock_shards:
+        Product.objects.filter(pk=product.pk).update(stock=F("stock") + quantity)
+        return
+    bucket = random.randrange(product.stock_shards)
+    ProductStockBucket.objects.filter(product_id=product.pk, bucket=bucket).update(stock=F("stock") + quantity)
+    # Keep the in_stock filter seeing the product; the row is only written when it was at zero
+    Product.objects.filter(pk=product.pk, stock=0).update(stock=quantity)
+
+
+@transaction.atomic
+def set_shards(product, shards):
+    """Split the product's stock across `shards` buckets, or fold it back into the column when 0."""
+    product = Product.objects.select_for_update().get(pk=product.pk)
+    total = product.on_hand_stock
+    ProductStockBucket.objects.filter(product=product).delete()
+    if shards:
+        ProductStockBucket.objects.bulk_create(
+            ProductStockBucket(product=product, bucket=i, stock=stock) for i, stock in enumerate(_spread(total, shards))
+        )
+    Product.objects.filter(pk=product.pk).update(stock=total, stock_shards=shards)
+    return total
+
+
+@transaction.atomic
+def rebalance(product, total=None):
+    """Spread the product's stock (or `total`, to set a new level) evenly over its buckets."""
+    locked = list(ProductStockBucket.objects.filter(product_id=product.pk).select_for_update().order_by("bucket"))
+    if not locked:
+        raise ValueError(f"Product {product.pk} is not sharded")
+    if total is None:
+        total = sum(b.stock for b in locked)
+    for b, stock in zip(locked, _spread(total, len(locked))):
+        b.stock = stock
+    ProductStockBucket.objects.bulk_update(locked, ["stock"])
+    Product.objects.filter(pk=product.pk).update(stock=total)
+    return total
+
+
+def _spread(total, shards):
+    share, extra = divmod(total, shards)
+    return [share + (1 if i < extra else 0) for i in range(shards)]
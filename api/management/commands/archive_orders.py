@@ -0,0 +1,106 @@
+import gzip
+import json
+from datetime import datetime, time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from api import partitions
+from api.models import Order, OrderItem
+
+
+class Command(BaseCommand):
+    """
+    Move orders created before a cutoff out of the database into gzipped JSONL files,
+    one per month (orders-YYYY-MM.jsonl.gz under ORDER_ARCHIVE_DIR). Each line is an
+    order with its items.
+
+    Whole months are exported and then their partitions are detached and dropped. A
+    month cut by --before, or any month on unpartitioned tables, is exported and deleted
+    in id batches instead, each batch in its own transaction. Files are appended to, so a
+    run that is interrupted and repeated may write an order twice; deduplicate on "id".
+    The sales rollups are kept, so analytics still cover archived orders.
+    """
+
+    help = "Archive orders older than --before (YYYY-MM-DD) to compressed JSONL files and remove them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", required=True, help="Archive orders created before this date (YYYY-MM-DD)")
+        parser.add_argument("--output-dir", default=None, help="Directory for the archive files (default ORDER_ARCHIVE_DIR)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Orders per batch (default 1000)")
+
+    def handle(self, *args, **options):
+        day = parse_date(options["before"] or "")
+        if day is None:
+            raise CommandError("--before must be a date in YYYY-MM-DD format")
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size must be positive")
+        self.batch_size = options["batch_size"]
+        cutoff = datetime.combine(day, time.min, timezone.get_current_timezone())
+        output_dir = Path(options["output_dir"] or settings.ORDER_ARCHIVE_DIR)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        oldest = Order.objects.filter(created_at__lt=cutoff).order_by("created_at").values_list("created_at", flat=True).first()
+        total = 0
+        month = partitions.month_start(timezone.localtime(oldest).date()) if oldest else None
+        while month is not None and partitions.month_bounds(month)[0] < cutoff:
+            start, end = partitions.month_bounds(month)
+            whole_month = end <= cutoff
+            path = output_dir / f"orders-{month:%Y-%m}.jsonl.gz"
+            count = self.archive_range(start, min(end, cutoff), path, delete=not whole_month)
+            if whole_month and count:
+                if not partitions.drop_month(month):
+                    self.delete_range(start, end)
+            if count:
+                self.stdout.write(f"{month:%Y-%m}: {count} order(s) -> {path}")
+            total += count
+            month = partitions.add_months(month, 1)
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} order(s) created before {day}"))
+
+    def archive_range(self, start, end, path, delete):
+        """Append the range's orders to `path`; with `delete`, remove each batch once written."""
+        in_range = Order.objects.filter(created_at__gte=start, created_at__lt=end).order_by("id")
+        count, last_id = 0, 0
+        with gzip.open(path, "at", encoding="utf-8") as archive:
+            while True:
+                with transaction.atomic():
+                    orders = list(
+                        in_range.filter(id__gt=last_id).values("id", "customer_id", "created_at", "total_amount")[
+                            : self.batch_size
+                        ]
+                    )
+                    if not orders:
+                        return count
+                    ids = [order["id"] for order in orders]
+                    items = {}
+                    for item in (
+                        OrderItem.objects.filter(order_id__in=ids, created_at__gte=start, created_at__lt=end)
+                        .values("order_id", "product_id", "product__name", "unit_price", "quantity")
+                        .order_by("order_id", "product_id")
+                    ):
+                        items.setdefault(item["order_id"], []).append(item)
+                    for order in orders:
+                        order["items"] = items.get(order["id"], [])
+                        archive.write(json.dumps(order, cls=DjangoJSONEncoder) + "\n")
+                    archive.flush()
+                    if delete:
+                        OrderItem.objects.filter(order_id__in=ids).delete()
+                        Order.objects.filter(id__in=ids).delete()
+                count += len(orders)
+                last_id = ids[-1]
+
+    def delete_range(self, start, end):
+        """Batch-delete a month that has no partition of its own (it sits in the DEFAULT partition)."""
+        in_range = Order.objects.filter(created_at__gte=start, created_at__lt=end).order_by("id").values_list("id", flat=True)
+        while True:
+            with transaction.atomic():
+                ids = list(in_range[: self.batch_size])
+                if not ids:
+                    return
+                OrderItem.objects.filter(order_id__in=ids).delete()
+                Order.objects.filter(id__in=ids).delete()
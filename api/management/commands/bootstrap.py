@@ -0,0 +1,130 @@
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+
+from api import partitions
+from api.models import Customer, LoadedFixture
+
+User = get_user_model()
+
+# Arbitrary key shared by all pods so concurrent bootstraps run one at a time.
+BOOTSTRAP_LOCK_ID = 0x5A7A_B007
+
+
+class Command(BaseCommand):
+    """
+    Prepare the database for serving in a single Django process: apply pending migrations,
+    create the database cache table, create upcoming monthly order partitions, ensure the superuser and reviewer accounts
+    exist and load fixtures whose contents changed.
+    Replaces the separate migrate / createsuperuserifnotexists / loaddata / shell steps that
+    entrypoint.sh used to run, each of which booted Django again.
+    """
+
+    help = "Apply migrations, create the admin and reviewer accounts and load changed fixtures."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fixture",
+            action="append",
+            dest="fixtures",
+            help="Fixture file to load when its checksum changed (repeatable; default api/fixtures/products.json)",
+        )
+        parser.add_argument("--no-reviewer", action="store_true", help="Skip the reviewer test account")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        self.timings = []
+        connection = connections[DEFAULT_DB_ALIAS]
+
+        with self.advisory_lock(connection):
+            with self.step("migrations"):
+                self.migrate(connection)
+            with self.step("cache table"):
+                # No-op unless CACHES uses the database cache and its table is missing
+                call_command("createcachetable")
+            with self.step("partitions"):
+                for name in partitions.ensure_partitions():
+                    self.stdout.write(f"Created partition {name}")
+            with self.step("superuser"):
+                call_command("createsuperuserifnotexists", stdout=self.stdout, stderr=self.stderr)
+            with self.step("fixtures"):
+                for path in options["fixtures"] or ["api/fixtures/products.json"]:
+                    self.load_fixture(path)
+            if not options["no_reviewer"]:
+                with self.step("reviewer"):
+                    self.create_reviewer()
+
+        total_ms = (time.perf_counter() - started) * 1000
+        breakdown = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.timings)
+        self.stdout.write(self.style.SUCCESS(f"Bootstrap finished in {total_ms:.0f} ms ({breakdown})"))
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        yield
+        self.timings.append((name, (time.perf_counter() - start) * 1000))
+
+    @contextmanager
+    def advisory_lock(self, connection):
+        """Serialize bootstraps of pods starting together (Postgres only)."""
+        if connection.vendor != "postgresql":
+            yield
+            return
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [BOOTSTRAP_LOCK_ID])
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [BOOTSTRAP_LOCK_ID])
+
+    def migrate(self, connection):
+        # Building the executor reads django_migrations once; the plan is computed in memory.
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        if not plan:
+            self.stdout.write("Migrations up to date")
+            return
+        self.stdout.write(f"Applying {len(plan)} migration(s)...")
+        call_command("migrate", interactive=False, verbosity=0)
+
+    def load_fixture(self, path):
+        """
+        Best effort, like the `loaddata ... || true` it replaced: a fixture that fails to load
+        is reported and skipped without recording its checksum, so the next start retries it.
+        """
+        try:
+            with open(path, "rb") as f:
+                checksum = hashlib.sha256(f.read()).hexdigest()
+            if LoadedFixture.objects.filter(path=path, checksum=checksum).exists():
+                self.stdout.write(f"Fixture {path} unchanged, skipping")
+                return
+            with transaction.atomic():
+                call_command("loaddata", path, verbosity=0)
+                LoadedFixture.objects.update_or_create(path=path, defaults={"checksum": checksum})
+        except Exception as e:
+            self.stderr.write(self.style.ERROR(f"Could not load fixture {path}: {e}"))
+            return
+        self.stdout.write(self.style.SUCCESS(f"Loaded fixture {path}"))
+
+    def create_reviewer(self):
+        username = os.environ.get("REVIEWER_USERNAME", "reviewer")
+        if User.objects.filter(username=username).exists():
+            self.stdout.write(f"Reviewer account '{username}' exists")
+            return
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username=username,
+                email=os.environ.get("REVIEWER_EMAIL", "reviewer@savannah.test"),
+                password=os.environ.get("REVIEWER_PASSWORD", "Review2024!"),
+            )
+            # The post_save signal already created a blank Customer for the new user
+            Customer.objects.filter(user=user).update(phone_number="+254700000000", address="Test Address, Nairobi")
+        self.stdout.write(self.style.SUCCESS(f"Created reviewer account '{username}'"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import partitions
+
+
+class Command(BaseCommand):
+    """
+    Create the monthly partitions of the order tables ahead of time, so new orders never
+    land in the DEFAULT partition. Safe to run repeatedly; existing months are skipped.
+    """
+
+    help = "Create monthly order partitions from the current month through --months ahead."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months", type=int, default=3, help="Months ahead of the current one (default 3)")
+
+    def handle(self, *args, **options):
+        if options["months"] < 0:
+            raise CommandError("--months must be 0 or more")
+        if not any(partitions.is_partitioned(table) for table in partitions.tables()):
+            self.stdout.write(self.style.WARNING("Order tables are not partitioned; nothing to do"))
+            return
+        created = partitions.ensure_partitions(options["months"])
+        for name in created:
+            self.stdout.write(f"Created {name}")
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} partition(s) created"))
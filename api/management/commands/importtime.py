@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import importtime
+
+
+class Command(BaseCommand):
+    """
+    Report cold import cost of the app as measured by `python -X importtime`.
+    By default measures the WSGI entry point (worker boot) and then the URLconf
+    (views, serializers and DRF, paid by a worker's first request).
+    """
+
+    help = "Show cold import time per module and the slowest packages and modules."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--module", action="append", dest="modules", help="Module to import (repeatable; default wsgi + URLconf)"
+        )
+        parser.add_argument("--top", type=int, default=15, help="Number of packages and modules to list (default 15)")
+
+    def handle(self, *args, **options):
+        modules = options["modules"] or ["savannah_assess.wsgi", settings.ROOT_URLCONF]
+        try:
+            records = importtime.measure(modules)
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        totals = importtime.module_totals_ms(records)
+        for module, ms in totals.items():
+            self.stdout.write(f"{module:<40} {ms:8.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"{'total':<40} {sum(totals.values()):8.1f} ms"))
+
+        self.stdout.write("\nSlowest packages (self time):")
+        for package, ms in list(importtime.by_package(records).items())[: options["top"]]:
+            self.stdout.write(f"  {package:<38} {ms:8.1f} ms")
+
+        self.stdout.write("\nSlowest modules (cumulative):")
+        nested = sorted((r for r in records if r.depth > 0), key=lambda r: r.cumulative_us, reverse=True)
+        for record in nested[: options["top"]]:
+            self.stdout.write(f"  {record.module:<38} {record.cumulative_us / 1000:8.1f} ms")
@@ -0,0 +1,58 @@
+import io
+import os
+import pstats
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.middleware import PROFILE_HEADER, make_profile_token
+
+
+class Command(BaseCommand):
+    """
+    Inspect request profiles captured by ProfilingMiddleware.
+    Open a .prof file in snakeviz or `python -m pstats` for interactive analysis.
+    """
+
+    help = "List and summarize captured request profiles, or print an X-Profile header token."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--show", metavar="FILE", help="Print the top functions of one profile")
+        parser.add_argument("--top", type=int, default=25, help="Number of functions to show (default 25)")
+        parser.add_argument(
+            "--sort", default="cumulative", choices=["cumulative", "tottime", "calls"], help="Sort order for --show"
+        )
+        parser.add_argument("--token", action="store_true", help="Print a signed X-Profile header value")
+
+    def handle(self, *args, **options):
+        if options["token"]:
+            self.stdout.write(f"{PROFILE_HEADER}: {make_profile_token()}")
+            return
+
+        profile_dir = getattr(settings, "PROFILING_DIR", "")
+        if not profile_dir:
+            raise CommandError("PROFILING_DIR is not configured")
+
+        if options["show"]:
+            path = os.path.join(profile_dir, os.path.basename(options["show"]))
+            if not os.path.exists(path):
+                raise CommandError(f"No profile named {options['show']}")
+            buffer = io.StringIO()
+            pstats.Stats(path, stream=buffer).strip_dirs().sort_stats(options["sort"]).print_stats(options["top"])
+            self.stdout.write(buffer.getvalue())
+            return
+
+        names = (
+            sorted((n for n in os.listdir(profile_dir) if n.endswith(".prof")), reverse=True)
+            if os.path.isdir(profile_dir)
+            else []
+        )
+        if not names:
+            self.stdout.write(self.style.WARNING(f"No profiles in {profile_dir}"))
+            return
+        for name in names:
+            path = os.path.join(profile_dir, name)
+            stats = pstats.Stats(path)
+            captured = datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d %H:%M:%S")
+            self.stdout.write(f"{name}  {captured}  {stats.total_tt * 1000:9.1f} ms  {stats.total_calls:>9} calls")
@@ -0,0 +1,88 @@
+import csv
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from api import provisioning
+
+
+class Command(BaseCommand):
+    """
+    Create users, their Customer profiles and API tokens from a CSV (header row) or JSONL
+    file. Recognised fields: username (required), email, password, first_name, last_name,
+    phone_number, address. Users without a password get an unusable one and sign in through
+    OIDC or a token.
+
+    Rows are processed in batches. Each batch's passwords are hashed across --workers
+    processes, and then its users, customers and tokens are inserted in one transaction.
+    Invalid rows, usernames repeated in the file and usernames that already exist are reported
+    and skipped.
+    """
+
+    help = "Bulk-create users with customer profiles and API tokens from a CSV or JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL file (format from the extension unless --format is given)")
+        parser.add_argument("--format", choices=["csv", "jsonl"], default=None, help="Input format")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Users per transaction (default 1000)")
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1, help="Password hashing processes (default: CPU count)"
+        )
+        parser.add_argument("--tokens-out", default=None, help="Write username,token for each created user to this CSV file")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size must be positive")
+        if not os.path.exists(options["path"]):
+            raise CommandError(f"{options['path']} does not exist")
+        self.seen = set()
+        self.invalid = 0
+        created = skipped = 0
+        tokens_out = open(options["tokens_out"], "w", newline="", encoding="utf-8") if options["tokens_out"] else None
+        pool = provisioning.hasher_pool(options["workers"])
+        try:
+            writer = csv.writer(tokens_out) if tokens_out else None
+            if writer:
+                writer.writerow(["username", "token"])
+            records = self.valid_records(options["path"], options["format"])
+            while batch := list(islice(records, options["batch_size"])):
+                existing = provisioning.existing_usernames(batch)
+                new = [r for r in batch if r["username"] not in existing]
+                passwords = provisioning.hash_passwords([r["password"] or None for r in new], pool)
+                try:
+                    users = provisioning.create_batch(new, passwords)
+                except IntegrityError as e:
+                    raise CommandError(
+                        f"Batch failed after {created} user(s) were created, probably because a username was "
+                        f"created concurrently ({e}). Run the command again; existing users are skipped."
+                    ) from e
+                created += len(users)
+                skipped += len(existing)
+                if writer:
+                    writer.writerows((user.username, key) for user, key in users)
+                self.stdout.write(f"{created} user(s) created, {skipped} already existed")
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}") from e
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            if tokens_out:
+                tokens_out.close()
+        summary = f"Created {created} user(s) with customer profiles and tokens; skipped {skipped} existing"
+        self.stdout.write(self.style.SUCCESS(f"{summary} and {self.invalid} invalid row(s)"))
+
+    def valid_records(self, path, fmt):
+        """Cleaned records with usernames not seen earlier in the file; other rows are reported to stderr."""
+        for line, record in provisioning.read_records(path, fmt):
+            try:
+                cleaned = provisioning.clean(line, record)
+                if cleaned["username"] in self.seen:
+                    raise provisioning.InvalidRecord(line, f"username {cleaned['username']!r} appears earlier in the file")
+            except provisioning.InvalidRecord as e:
+                self.invalid += 1
+                self.stderr.write(f"Skipping {e}")
+                continue
+            self.seen.add(cleaned["username"])
+            yield cleaned
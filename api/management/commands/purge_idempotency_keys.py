@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from api.idempotency import expiry_cutoff
+from api.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """
+    Delete expired Idempotency-Key records in primary-key batches, each in its own
+    short statement, so the purge never holds long locks on the table.
+    """
+
+    help = "Delete Idempotency-Key records older than IDEMPOTENCY_KEY_TTL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per statement (default 1000)")
+
+    def handle(self, *args, **options):
+        cutoff = expiry_cutoff()
+        expired = IdempotencyKey.objects.filter(created_at__lt=cutoff).order_by("pk").values_list("pk", flat=True)
+        deleted = 0
+        while True:
+            batch = list(expired[: options["batch_size"]])
+            if not batch:
+                break
+            deleted += IdempotencyKey.objects.filter(pk__in=batch).delete()[0]
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired idempotency key(s) created before {cutoff:%Y-%m-%d %H:%M}")
+        )
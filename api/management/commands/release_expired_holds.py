@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api import carts
+
+
+class Command(BaseCommand):
+    """
+    Delete expired cart holds in primary-key batches, each in its own short statement.
+    Expired holds already stopped counting against available stock; this only keeps the
+    hold table (and its expiry indexes) small.
+    """
+
+    help = "Delete cart stock holds whose expires_at has passed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per statement (default 1000)")
+
+    def handle(self, *args, **options):
+        released = carts.release_expired(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Released {released} expired cart hold(s)"))
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import inventory
+from api.models import Product
+
+
+class Command(BaseCommand):
+    """
+    Switch products between a single stock column and sharded stock buckets.
+    Shard only products that sell in bursts (flash sales); each bucket is one more row
+    to sum on reads.
+    """
+
+    help = "Split the stock of the given products across N buckets (--shards 0 folds it back into one column)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("product_ids", nargs="+", type=int, help="Products to (un)shard")
+        parser.add_argument("--shards", type=int, default=settings.STOCK_SHARDS, help="Buckets per product; 0 disables sharding")
+
+    def handle(self, *args, **options):
+        shards = options["shards"]
+        if shards < 0:
+            raise CommandError("--shards must be 0 or more")
+        products = Product.objects.in_bulk(options["product_ids"])
+        missing = sorted(set(options["product_ids"]) - set(products))
+        if missing:
+            raise CommandError(f"Unknown product id(s): {', '.join(map(str, missing))}")
+        for product in products.values():
+            total = inventory.set_shards(product, shards)
+            mode = f"{shards} buckets" if shards else "single column"
+            self.stdout.write(self.style.SUCCESS(f"{product.name}: {total} units, {mode}"))
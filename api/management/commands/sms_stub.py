@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services.sms_stub import StubSMSGateway
+
+
+class Command(BaseCommand):
+    """
+    Run a local stand-in for the Africa's Talking SMS API. With AFRICASTALKING_API_URL set to
+    its address (and any AFRICASTALKING_API_KEY), order confirmations are sent to it, and it
+    posts delivery reports to --callback-url as the real gateway would.
+    """
+
+    help = "Serve a stub Africa's Talking SMS API that posts delivery reports back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8025)
+        parser.add_argument(
+            "--callback-url", default=None, help="Delivery report URL, e.g. http://localhost:8000/api/sms/delivery-reports/"
+        )
+        parser.add_argument("--report-delay", type=float, default=0.5, help="Seconds before reporting a message (default 0.5)")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of messages reported Failed (0-1)")
+        parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every send request")
+
+    def handle(self, *args, **options):
+        gateway = StubSMSGateway(
+            host=options["host"],
+            port=options["port"],
+            callback_url=options["callback_url"],
+            report_delay=options["report_delay"],
+            failure_rate=options["failure_rate"],
+            latency=options["latency"],
+        ).start()
+        self.stdout.write(self.style.SUCCESS(f"Stub SMS gateway on {gateway.url}; set AFRICASTALKING_API_URL={gateway.url}"))
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            gateway.stop()
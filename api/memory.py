@@ -0,0 +1,125 @@
+"""
+tracemalloc helpers: per-worker allocation snapshots with diffs, and per-request peak memory.
+
+Tracing can be enabled for the whole worker at boot with PYTHONTRACEMALLOC=<frames>, or on
+demand through the admin-only /api/debug/memory/ endpoints. When it is off, sampled requests
+to the views in MEMORY_PEAK_VIEWS turn it on just for their own duration to measure their
+peak; while it is on for any other reason they are not measured.
+"""
+
+import linecache
+import os
+import threading
+import tracemalloc
+
+_IGNORED = (
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+)
+
+# Previous snapshot of this worker process, for diffs.
+_last_snapshot = None
+# PeakMemory of the request that started the current trace, if a request did
+_peak_owner = None
+_lock = threading.Lock()
+
+
+def status():
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "pid": os.getpid(),
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit(),
+        "current_kb": round(current / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def take_snapshot(limit=20):
+    """Top allocation sites now, plus the change since this worker's previous snapshot."""
+    global _last_snapshot
+    snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+    result = status()
+    result["top"] = [
+        {"site": _site(stat.traceback), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+    result["diff"] = (
+        [
+            {"site": _site(stat.traceback), "size_diff_kb": round(stat.size_diff / 1024, 1), "count_diff": stat.count_diff}
+            for stat in snapshot.compare_to(_last_snapshot, "lineno")[:limit]
+        ]
+        if _last_snapshot is not None
+        else None
+    )
+    _last_snapshot = snapshot
+    return result
+
+
+def reset_snapshots():
+    global _last_snapshot
+    _last_snapshot = None
+
+
+def _site(traceback):
+    frame = traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+class PeakMemory:
+    """
+    Measure the peak traced memory allocated while a request runs, in a trace of its own.
+
+    Only starts when nothing else is tracing, and only ever stops the trace it started, so
+    PYTHONTRACEMALLOC and the debug endpoints' snapshots and peak are left alone.
+    """
+
+    @classmethod
+    def start(cls):
+        """Start tracing for one request; None (no measurement) when tracing is already on."""
+        global _peak_owner
+        with _lock:
+            if tracemalloc.is_tracing():
+                return None
+            tracker = cls()
+            tracemalloc.start(1)
+            _peak_owner = tracker
+            return tracker
+
+    def finish(self):
+        """Stop tracing and return the peak in KiB; None if the debug endpoints took the trace over."""
+        global _peak_owner
+        with _lock:
+            if _peak_owner is not self:
+                return None
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            _peak_owner = None
+        return round(peak / 1024, 1)
+
+
+def start_tracing(frames):
+    """Start tracing for the debug endpoints, taking over from a request's peak measurement."""
+    global _peak_owner
+    with _lock:
+        if _peak_owner is not None:
+            tracemalloc.stop()  # one-frame request trace; restart with the frames asked for
+            _peak_owner = None
+        if not tracemalloc.is_tracing():
+            reset_snapshots()
+            tracemalloc.start(frames)
+
+
+def is_debug_tracing():
+    """Whether tracing is on other than for a single request's peak measurement."""
+    return tracemalloc.is_tracing() and _peak_owner is None
+
+
+def stop_tracing():
+    global _peak_owner
+    with _lock:
+        tracemalloc.stop()
+        _peak_owner = None
+        reset_snapshots()
@@ -0,0 +1,87 @@
+"""
+Prometheus metrics for the API and notification hot paths.
+
+Under gunicorn, set PROMETHEUS_MULTIPROC_DIR (entrypoint.sh does) so every worker
+writes its samples to shared files; the /metrics view then aggregates all workers
+and gunicorn.conf.py cleans up after exited workers.
+"""
+
+import os
+
+from django.conf import settings
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by view and method",
+    ["view", "method"],
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "DB queries issued per request by view",
+    ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float("inf")),
+)
+ORDERS_CREATED = Counter("orders_created_total", "Orders successfully created")
+STOCK_CONFLICTS = Counter("order_stock_conflicts_total", "Order attempts rejected for insufficient stock")
+NOTIFICATION_LATENCY = Histogram(
+    "notification_send_duration_seconds",
+    "Time spent sending a notification by channel",
+    ["channel"],
+)
+NOTIFICATION_FAILURES = Counter(
+    "notification_failures_total",
+    "Notifications that failed or fell back to simulation, by channel",
+    ["channel"],
+)
+
+CIRCUIT_BREAKER_STATE = Gauge(
+    "circuit_breaker_state",
+    "Notification provider circuit breaker state: 0 closed, 1 half-open, 2 open (worst live worker)",
+    ["breaker"],
+    multiprocess_mode="livemax",
+)
+CIRCUIT_BREAKER_REJECTIONS = Counter(
+    "circuit_breaker_rejections_total",
+    "Calls failed fast because the provider's circuit breaker was open",
+    ["breaker"],
+)
+SMS_DELIVERY_REPORTS = Counter(
+    "sms_delivery_reports_total",
+    "Africa's Talking delivery report callbacks received, by status",
+    ["status"],
+)
+SMS_DELIVERY_REPORTS_DROPPED = Counter(
+    "sms_delivery_reports_dropped_total",
+    "Delivery reports dropped because no logged message had their id",
+)
+
+
+def observe_request(request, duration, query_count):
+    match = getattr(request, "resolver_match", None)
+    view = match.view_name if match else "unmatched"
+    REQUEST_LATENCY.labels(view=view, method=request.method).observe(duration)
+    REQUEST_QUERIES.labels(view=view).observe(query_count)
+
+
+def metrics_view(request):
+    """Prometheus text exposition; requires `Authorization: Bearer <METRICS_TOKEN>` when configured."""
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=401)
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
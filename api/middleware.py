@@ -0,0 +1,154 @@
+import cProfile
+import itertools
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import instrumentation, metrics
+from .memory import PeakMemory
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimingMiddleware:
+    """
+    Record DB query count, SQL time, serializer time and notification time per request.
+
+    Emits them as a ``Server-Timing`` header and one JSON log line, and logs a warning
+    with the slowest SQL statements when a request exceeds REQUEST_TIMING_SLOW_MS or
+    REQUEST_TIMING_MAX_QUERIES. Latency and query counts also feed the Prometheus
+    request histograms in api.metrics. One in MEMORY_PEAK_SAMPLE_EVERY requests to the views
+    in MEMORY_PEAK_VIEWS also logs its peak traced Python memory as ``peak_mem_kb``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, "REQUEST_TIMING_SLOW_MS", 500)
+        self.max_queries = getattr(settings, "REQUEST_TIMING_MAX_QUERIES", 50)
+        self.slow_sql_count = getattr(settings, "REQUEST_TIMING_SLOW_SQL", 5)
+        self.peak_views = getattr(settings, "MEMORY_PEAK_VIEWS", set())
+        self.peak_sample_every = max(getattr(settings, "MEMORY_PEAK_SAMPLE_EVERY", 100), 1)
+        self.peak_candidates = itertools.count()
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with instrumentation.collect(self.slow_sql_count) as request_metrics, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(request_metrics.sql_wrapper))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000
+        metrics.observe_request(request, total_ms / 1000, request_metrics.query_count)
+
+        response["Server-Timing"] = self.server_timing(request_metrics, total_ms)
+        record = {
+            "event": "request_timing",
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 2),
+            "db_ms": round(request_metrics.sql_time * 1000, 2),
+            "queries": request_metrics.query_count,
+        }
+        record.update({f"{name}_ms": round(duration * 1000, 2) for name, duration in request_metrics.spans.items()})
+        peak_memory = getattr(request, "_peak_memory", None)
+        peak_kb = peak_memory.finish() if peak_memory is not None else None
+        if peak_kb is not None:
+            record["peak_mem_kb"] = peak_kb
+
+        if total_ms > self.slow_ms or request_metrics.query_count > self.max_queries:
+            record["slow"] = True
+            record["slowest_sql"] = [{"ms": ms, "sql": sql[:500]} for ms, sql in request_metrics.slowest_sql()]
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.resolver_match.view_name in self.peak_views and next(self.peak_candidates) % self.peak_sample_every == 0:
+            request._peak_memory = PeakMemory.start()
+
+    @staticmethod
+    def server_timing(request_metrics, total_ms):
+        parts = [f'db;dur={request_metrics.sql_time * 1000:.2f};desc="{request_metrics.query_count} queries"']
+        parts.extend(f"{name};dur={duration * 1000:.2f}" for name, duration in request_metrics.spans.items())
+        parts.append(f"total;dur={total_ms:.2f}")
+        return ", ".join(parts)
+
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_FLAG = "__profile"
+PROFILE_SIGNING_SALT = "api.profiling"
+
+
+def make_profile_token():
+    """Signed value for the X-Profile header; valid for PROFILING_TOKEN_MAX_AGE seconds."""
+    return signing.TimestampSigner(salt=PROFILE_SIGNING_SALT).sign("profile")
+
+
+class ProfilingMiddleware:
+    """
+    Run cProfile around a single request when asked to and save a .prof file in PROFILING_DIR.
+
+    Triggered by a valid signed ``X-Profile`` header (see ``manage.py profiles --token``)
+    or by ``?__profile=1`` from a logged-in staff user. The middleware is removed from
+    the stack entirely when PROFILING_DIR is unset, and otherwise costs one header and
+    one query-string lookup per request.
+    """
+
+    def __init__(self, get_response):
+        self.profile_dir = getattr(settings, "PROFILING_DIR", "")
+        if not self.profile_dir:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.max_age = getattr(settings, "PROFILING_TOKEN_MAX_AGE", 3600)
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:  # another profiler (e.g. a debugger) is already active
+            logger.warning("Request profiling skipped: %s", e)
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+
+        filename = self.profile_filename(request)
+        os.makedirs(self.profile_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.profile_dir, filename))
+        response["X-Profile-File"] = filename
+        logger.info("Saved request profile %s", filename)
+        return response
+
+    def should_profile(self, request):
+        token = request.headers.get(PROFILE_HEADER)
+        if token:
+            try:
+                signing.TimestampSigner(salt=PROFILE_SIGNING_SALT).unsign(token, max_age=self.max_age)
+                return True
+            except signing.BadSignature:
+                logger.warning("Ignoring invalid %s header", PROFILE_HEADER)
+                return False
+        if PROFILE_QUERY_FLAG in request.GET:
+            user = getattr(request, "user", None)
+            return bool(user and user.is_staff)
+        return False
+
+    @staticmethod
+    def profile_filename(request):
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", request.path).strip("_") or "root"
+        # The random suffix keeps same-second captures of one path (threads, re-used pids) apart.
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method}-{slug[:80]}-{os.getpid()}-{uuid.uuid4().hex[:12]}.prof"
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_product_stock_buckets"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockHold",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("quantity", models.PositiveIntegerField()),
+                ("expires_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "customer",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="stock_holds", to="api.customer"),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="stock_holds", to="api.product"),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["expires_at"], include=("product", "quantity"), name="stock_hold_expiry_idx"),
+                    models.Index(fields=["product", "expires_at"], include=("quantity",), name="stock_hold_product_expiry_idx"),
+                ],
+                "constraints": [models.UniqueConstraint(fields=("customer", "product"), name="stock_hold_unique_per_customer")],
+            },
+        ),
+    ]
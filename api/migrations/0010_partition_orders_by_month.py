@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def partition_tables(apps, schema_editor):
+    from api.partitions import partition_tables
+
+    partition_tables(schema_editor)
+
+
+class Migration(migrations.Migration):
+    """
+    Partition api_order and api_orderitem by month on created_at. The tables are rebuilt and
+    their rows copied, so on a large database run this migration in a maintenance window.
+    """
+
+    dependencies = [
+        ("api", "0009_stock_hold"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderitem",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(
+            "UPDATE api_orderitem SET created_at = o.created_at FROM api_order o WHERE o.id = api_orderitem.order_id",
+            migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name="orderitem",
+            name="order",
+            field=models.ForeignKey(
+                db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name="items", to="api.order"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="orderitem",
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name="orderitem",
+            constraint=models.UniqueConstraint(
+                fields=("order", "product", "created_at"), name="orderitem_unique_product_per_order"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["customer", "-created_at"], name="order_customer_recent_idx"),
+        ),
+        migrations.RunPython(partition_tables),
+    ]
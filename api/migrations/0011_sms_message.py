@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0010_partition_orders_by_month"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SMSMessage",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("recipient", models.CharField(max_length=20)),
+                ("message", models.TextField()),
+                ("message_id", models.CharField(blank=True, max_length=100, null=True, unique=True)),
+                ("status", models.CharField(max_length=30)),
+                ("failure_reason", models.CharField(blank=True, max_length=100)),
+                ("cost", models.CharField(blank=True, max_length=30)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "order",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="sms_messages",
+                        to="api.order",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "SMS message",
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:57
+
+from django.db import migrations, models
+
+
+def install_version_trigger(apps, schema_editor):
+    from api.category_tree import install_version_trigger
+
+    install_version_trigger(schema_editor.connection)
+
+
+def drop_version_trigger(apps, schema_editor):
+    from api.category_tree import DROP_TRIGGER_SQL
+
+    schema_editor.execute(DROP_TRIGGER_SQL)
+
+
+class Migration(migrations.Migration):
+    """Count category writes in CategoryTreeVersion with a statement trigger on api_category."""
+
+    dependencies = [
+        ("api", "0011_sms_message"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CategoryTreeVersion",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("version", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(install_version_trigger, drop_version_trigger),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_product_prices(apps, schema_editor):
+    # Existing items get today's product price: the best record left of what they cost.
+    OrderItem = apps.get_model("api", "OrderItem")
+    Product = apps.get_model("api", "Product")
+    OrderItem.objects.update(unit_price=Subquery(Product.objects.filter(pk=OuterRef("product_id")).values("price")[:1]))
+
+
+class Migration(migrations.Migration):
+    """Capture each order item's unit price so sales rollups do not follow later price changes."""
+
+    dependencies = [
+        ("api", "0012_category_tree_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderitem",
+            name="unit_price",
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.RunPython(copy_product_prices, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="orderitem",
+            name="unit_price",
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10),
+        ),
+    ]
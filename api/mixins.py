@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+from .db_routers import get_replica_aliases, read_from_replica
+
+
+def _pin_key(user):
+    return f"db-primary-pin:{user.pk}"
+
+
+def pin_user_to_primary(user):
+    """
+    Keep this user's reads on the primary for REPLICA_PIN_SECONDS (read-your-writes). The pin
+    lives in the default cache, shared by all workers (see CACHES), so the next read sees it
+    whichever worker serves it.
+    """
+    if user.is_authenticated:
+        cache.set(_pin_key(user), True, getattr(settings, "REPLICA_PIN_SECONDS", 5))
+
+
+def is_pinned_to_primary(user):
+    return user.is_authenticated and bool(cache.get(_pin_key(user)))
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe-method requests from a read replica.
+
+    Set ``replica_actions`` to restrict routing to specific actions (e.g. ``("list",)``).
+    A successful write pins the user to the primary for a short window so they
+    always see their own changes.
+    """
+
+    replica_actions = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._replica_context = None
+        if not get_replica_aliases() or request.method not in SAFE_METHODS:
+            return
+        if self.replica_actions is not None and self.action not in self.replica_actions:
+            return
+        if is_pinned_to_primary(request.user):
+            return
+        self._replica_context = read_from_replica()
+        self._replica_context.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        context = getattr(self, "_replica_context", None)
+        if context is not None:
+            self._replica_context = None
+            context.__exit__(None, None, None)
+        if get_replica_aliases() and request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_user_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,9 +1,14 @@
 from decimal import Decimal
 
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 
 class Customer(models.Model):
@@ -44,6 +49,33 @@ class Category(models.Model):
                     to_process.append(child)
         return descendant_ids | {self.id}  # Include self
 
+    @classmethod
+    def subtree_ids(cls, category_id):
+        """
+        Subquery yielding category_id and all of its descendants, resolved by the
+        database in a single recursive CTE (walks the parent_id index, no Python loop).
+        """
+        table = cls._meta.db_table
+        return RawSQL(
+            f"WITH RECURSIVE subtree(id) AS ("
+            f"SELECT id FROM {table} WHERE id = %s "
+            f"UNION SELECT c.id FROM {table} c JOIN subtree s ON c.parent_id = s.id"
+            f") SELECT id FROM subtree",
+            [category_id],
+        )
+
+
+class CategoryTreeVersion(models.Model):
+    """
+    Single row counting writes to api_category. A statement trigger bumps it (see api.category_tree),
+    so every insert, update, delete or truncate counts, including bulk and raw SQL ones.
+    """
+
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"category tree v{self.version}"
+
 
 class Product(models.Model):
     name = models.CharField(max_length=200)
@@ -51,20 +83,74 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="products")
     stock = models.PositiveIntegerField()
+    # 0: stock lives in the column above. N > 0: it is split across N ProductStockBucket rows (see api.inventory)
+    # and the column only holds the total as of the last rebalance.
+    stock_shards = models.PositiveSmallIntegerField(default=0)
+    # Maintained by Postgres on every insert/update; name terms rank above description terms.
+    search_vector = models.GeneratedField(
+        expression=SearchVector("name", weight="A", config="english") + SearchVector("description", weight="B", config="english"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="product_search_vector_gin"),
+            # Category listings filtered by price range, optionally restricted to in-stock rows.
+            models.Index(fields=["category", "price"], name="product_category_price_idx"),
+            models.Index(fields=["category", "price"], condition=Q(stock__gt=0), name="product_in_stock_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def on_hand_stock(self):
+        """Units in stock: the column, or the sum of the stock buckets when sharded."""
+        if not self.stock_shards:
+            return self.stock
+        live = getattr(self, "live_stock", None)
+        if live is not None:
+            return live
+        return self.stock_buckets.aggregate(total=models.Sum("stock"))["total"] or 0
+
+    @property
+    def available_stock(self):
+        """Units that can still be ordered: stock on hand minus unexpired cart holds."""
+        held = self.stock_holds.filter(expires_at__gt=timezone.now()).aggregate(total=models.Sum("quantity"))["total"]
+        return self.on_hand_stock - (held or 0)
+
     def has_sufficient_stock(self, quantity):
         """Checks if there is enough stock for a given quantity."""
-        return self.stock >= quantity
+        return self.available_stock >= quantity
+
+
+class ProductStockBucket(models.Model):
+    """One shard of a hot product's stock; orders decrement a single bucket instead of the product row."""
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="stock_buckets")
+    bucket = models.PositiveSmallIntegerField()
+    stock = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["product", "bucket"], name="stock_bucket_unique_per_product")]
+
+    def __str__(self):
+        return f"{self.product_id}[{self.bucket}]: {self.stock}"
 
 
 class Order(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
+    # Partition key: api_order is partitioned by month on created_at (see api.partitions).
     created_at = models.DateTimeField(auto_now_add=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
 
+    class Meta:
+        indexes = [
+            # A customer's recent orders, newest first, within each monthly partition.
+            models.Index(fields=["customer", "-created_at"], name="order_customer_recent_idx"),
+        ]
+
     def __str__(self):
         return f"Order {self.id} by {self.customer.user.username}"
 
@@ -78,17 +164,162 @@ class Order(models.Model):
 
 
 class OrderItem(models.Model):
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
+    # No database FK: api_order.id alone is not unique across partitions. Deletes still cascade in Django.
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items", db_constraint=False)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+    # Copy of the order's created_at, the partition key, so an order and its items share a month.
+    created_at = models.DateTimeField(editable=False)
+    # Product price when the line was ordered; sales rollups are based on it, not the current price.
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, editable=False)
 
     class Meta:
-        unique_together = ("order", "product")
+        constraints = [
+            # One line per product in an order (created_at is the same for all of an order's items).
+            models.UniqueConstraint(fields=["order", "product", "created_at"], name="orderitem_unique_product_per_order"),
+        ]
 
     def __str__(self):
         return f"{self.quantity} of {self.product.name}"
 
+    def save(self, *args, **kwargs):
+        if self.created_at is None:
+            self.created_at = self.order.created_at
+        if self.unit_price is None:
+            self.unit_price = self.product.price
+        super().save(*args, **kwargs)
+
     @property
     def subtotal(self):
-        """Calculates the subtotal for this line item."""
-        return self.product.price * self.quantity
+        """Calculates the subtotal for this line item at the price paid (None until it is saved)."""
+        if self.unit_price is None:
+            return None
+        return self.unit_price * self.quantity
+
+
+class DailySales(models.Model):
+    """Per-day sales rollup, maintained incrementally by api.analytics."""
+
+    date = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    units = models.BigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name_plural = "daily sales"
+
+    def __str__(self):
+        return f"{self.date}: {self.revenue}"
+
+
+class DailyCategorySales(models.Model):
+    """Per-day, per-category sales rollup (category of the product at the time of sale)."""
+
+    date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="daily_sales")
+    units = models.BigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name_plural = "daily category sales"
+        constraints = [models.UniqueConstraint(fields=["date", "category"], name="daily_category_sales_unique")]
+
+    def __str__(self):
+        return f"{self.date} {self.category_id}: {self.revenue}"
+
+
+class DailyProductSales(models.Model):
+    """Per-day, per-product sales rollup."""
+
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="daily_sales")
+    units = models.BigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name_plural = "daily product sales"
+        constraints = [models.UniqueConstraint(fields=["date", "product"], name="daily_product_sales_unique")]
+
+    def __str__(self):
+        return f"{self.date} {self.product_id}: {self.revenue}"
+
+
+class LoadedFixture(models.Model):
+    """Checksum of a fixture file as last loaded by `manage.py bootstrap`."""
+
+    path = models.CharField(max_length=255, unique=True)
+    checksum = models.CharField(max_length=64)
+    loaded_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.path} ({self.checksum[:12]})"
+
+
+class IdempotencyKey(models.Model):
+    """A client's Idempotency-Key for an order POST and the response it produced (see api.idempotency)."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="idempotency_keys")
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "key"], name="idempotency_key_unique_per_user")]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key}"
+
+
+class StockHold(models.Model):
+    """Units of a product set aside for a customer's cart until expires_at (see api.carts)."""
+
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="stock_holds")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="stock_holds")
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["customer", "product"], name="stock_hold_unique_per_customer")]
+        indexes = [
+            # Active holds across the catalog (range scan on expiry) and expired ones for the sweeper.
+            models.Index(fields=["expires_at"], include=["product", "quantity"], name="stock_hold_expiry_idx"),
+            # Units held for one product, answered from the index alone.
+            models.Index(fields=["product", "expires_at"], include=["quantity"], name="stock_hold_product_expiry_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} of {self.product_id} held until {self.expires_at:%H:%M:%S}"
+
+
+class SMSMessage(models.Model):
+    """One SMS to one recipient and its latest delivery status from Africa's Talking (see api.sms_log)."""
+
+    # Set when sending; delivery reports then move a message through Sent/Submitted/Buffered to a final status.
+    SENT = "Sent"
+    SIMULATED = "Simulated"
+    ERROR = "Error"
+    # Delivery report statuses that later reports must not overwrite.
+    FINAL_STATUSES = ("Success", "Failed", "Rejected", "Expired")
+
+    # No database FK (orders are partitioned); the log is kept when orders are archived.
+    order = models.ForeignKey(
+        Order, on_delete=models.DO_NOTHING, null=True, blank=True, related_name="sms_messages", db_constraint=False
+    )
+    recipient = models.CharField(max_length=20)
+    message = models.TextField()
+    # Africa's Talking messageId, the key of its delivery reports
+    message_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=30)
+    failure_reason = models.CharField(max_length=100, blank=True)
+    cost = models.CharField(max_length=30, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "SMS message"
+
+    def __str__(self):
+        return f"SMS to {self.recipient}: {self.status}"
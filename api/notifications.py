@@ -1,46 +1,76 @@
+import asyncio
 import logging
+import time
+import weakref
+from collections import namedtuple
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives, send_mail
+from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.db import close_old_connections, transaction
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 
+from .circuit_breaker import CircuitBreaker
+from .instrumentation import timed
+from .metrics import NOTIFICATION_FAILURES, NOTIFICATION_LATENCY
 from .services.sms_service import SMSService
+from .sms_log import record_sent
 
 logger = logging.getLogger(__name__)
 
+# SMTPException and socket timeouts are OSErrors (in smtplib and aiosmtplib alike); EMAIL_TIMEOUT bounds each SMTP operation.
+smtp_breaker = CircuitBreaker("smtp", failures=(OSError,))
 
-def send_order_confirmation_sms(order):
-    """Send SMS confirmation to customer after order placement"""
+SMTP_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+
+# What the async fan-out sends for an order, built before commit so nothing touches the ORM afterwards
+# except recording the SMS.
+OrderNotification = namedtuple("OrderNotification", ["order", "phone_number", "sms_message", "email"])
+
+_loop_resources = weakref.WeakKeyDictionary()  # event loop -> (semaphore, httpx.AsyncClient)
+_pending = {}  # background fan-out task -> order id, referenced until it finishes
+
+
+def order_sms_message(order):
+    """Text of the order confirmation SMS."""
     customer = order.customer
     first_item = order.items.first()
     item_summary = f"{first_item.product.name} (x{first_item.quantity})" if first_item else "items"
 
-    message = (
+    return (
         f"Hi {customer.user.first_name or customer.user.username}, "
         f"your order #{order.id} ({item_summary}...) for KES {order.total_amount} has been placed. "
         "Thank you for shopping with Savannah."
     )
 
+
+@timed("notify")
+def send_order_confirmation_sms(order):
+    """Send SMS confirmation to customer after order placement"""
     try:
+        message = order_sms_message(order)
         sms = SMSService()
-        resp = sms.send_sms([customer.phone_number], message)
+        resp = sms.send_sms([order.customer.phone_number], message)
         logger.info("send_order_confirmation_sms result: %s", resp)
+        # Savepoint: a failed insert must not abort the order's transaction
+        with transaction.atomic():
+            record_sent(resp, message, order=order)
         return resp
     except Exception as e:
         logger.warning("Failed to send order SMS: %s", e)
         return {"status": "failed", "error": str(e)}
 
 
-def send_new_order_admin_email(order):
+def admin_email_message(order):
     """
-    Send detailed email notification to admin when new order is placed.
-    Supports both HTML and plain text formats.
+    The admin email for a new order: HTML with a plain text alternative, or plain text only
+    when the template cannot be rendered. None when ADMIN_EMAIL is not configured.
     """
     admin_email = getattr(settings, "ADMIN_EMAIL", None)
     if not admin_email:
         logger.error("ADMIN_EMAIL not configured; cannot send admin email.")
-        return False
+        return None
 
     customer = order.customer
     subject = f"🛒 New Order #{order.id} - {customer.user.get_full_name() or customer.user.username}"
@@ -53,7 +83,7 @@ def send_new_order_admin_email(order):
                 "product_name": item.product.name,
                 "category": item.product.category.name,
                 "quantity": item.quantity,
-                "price": item.product.price,
+                "price": item.unit_price,
                 "subtotal": item.subtotal,
             }
         )
@@ -70,34 +100,49 @@ def send_new_order_admin_email(order):
         "total_amount": order.total_amount,
         "item_count": order.items.count(),
     }
+    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@example.com")
 
     # Try to use HTML template if available
     try:
         html_content = render_to_string("emails/new_order_admin.html", context)
-        text_content = strip_tags(html_content)  # Fallback plain text
-
-        # Create email with both HTML and plain text
-        from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@example.com")
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,
-            from_email=from_email,
-            to=[admin_email],
-        )
-        email.attach_alternative(html_content, "text/html")
-        email.send(fail_silently=False)
-
-        logger.info("Admin HTML email sent for order %s", order.id)
-        return True
-
     except Exception as e:
         # Fallback to plain text email
         logger.warning("HTML email failed, sending plain text: %s", e)
-        return send_plain_text_admin_email(order, admin_email, subject, context)
+        return EmailMessage(subject=subject, body=plain_text_admin_email(context), from_email=from_email, to=[admin_email])
+
+    # Create email with both HTML and plain text
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=strip_tags(html_content),
+        from_email=from_email,
+        to=[admin_email],
+    )
+    email.attach_alternative(html_content, "text/html")
+    return email
 
 
-def send_plain_text_admin_email(order, admin_email, subject, context):
-    """Fallback function to send plain text email if HTML fails"""
+@timed("notify")
+@NOTIFICATION_LATENCY.labels(channel="email").time()
+def send_new_order_admin_email(order):
+    """
+    Send detailed email notification to admin when new order is placed.
+    Supports both HTML and plain text formats.
+    """
+    email = admin_email_message(order)
+    if email is None:
+        return False
+    try:
+        smtp_breaker.call(email.send, fail_silently=False)
+    except Exception as e:
+        NOTIFICATION_FAILURES.labels(channel="email").inc()
+        logger.warning("Admin email for order %s not sent: %s", order.id, e)
+        return False
+    logger.info("Admin email sent for order %s", order.id)
+    return True
+
+
+def plain_text_admin_email(context):
+    """Body of the admin email when the HTML template fails"""
     lines = [
         "=" * 50,
         f"NEW ORDER NOTIFICATION - #{context['order_id']}",
@@ -135,19 +180,159 @@ def send_plain_text_admin_email(order, admin_email, subject, context):
         ]
     )
 
-    body = "\n".join(lines)
-    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@example.com")
+    return "\n".join(lines)
+
+
+# ----------------- Async fan-out (api.views.place_order) -----------------
+
 
+def order_notification(order):
+    return OrderNotification(order, order.customer.phone_number, order_sms_message(order), admin_email_message(order))
+
+
+async def send_order_notifications(notification, client):
+    """
+    Send the order's SMS (through `client`, an httpx.AsyncClient) and admin email concurrently,
+    then record the SMS. Returns the SMS response and whether the email was sent.
+    """
+    sms_response, email_sent = await asyncio.gather(
+        SMSService().asend_sms(client, [notification.phone_number], notification.sms_message),
+        asend_admin_email(notification.email),
+    )
+    await sync_to_async(_record_sms, thread_sensitive=False)(sms_response, notification)
+    return sms_response, email_sent
+
+
+async def send_order_notifications_now(notification):
+    """send_order_notifications() with its own HTTP client, for event loops that end with the request (WSGI)."""
+    import httpx
+
+    async with httpx.AsyncClient() as client:
+        return await send_order_notifications(notification, client)
+
+
+def dispatch_order_notifications(notification):
+    """
+    Send in the background on the running event loop, which must outlive the request (ASGI).
+    At most NOTIFICATION_CONCURRENCY fan-outs of a loop run at once; the others wait their turn.
+    Returns None without queueing when NOTIFICATION_BACKLOG fan-outs are already pending, and
+    the caller then sends inline.
+    """
+    if len(_pending) >= getattr(settings, "NOTIFICATION_BACKLOG", 1000):
+        return None
+    task = asyncio.get_running_loop().create_task(_send_bounded(notification))
+    _pending[task] = notification.order.id
+    task.add_done_callback(lambda done: _pending.pop(done, None))
+    return task
+
+
+async def drain():
+    """Wait for the running loop's background fan-outs to finish."""
+    while tasks := _loop_tasks():
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def shutdown(timeout=None):
+    """
+    On worker shutdown: give the loop's background fan-outs up to `timeout` seconds
+    (NOTIFICATION_SHUTDOWN_TIMEOUT by default), then log and cancel the ones still undelivered.
+    """
+    if timeout is None:
+        timeout = getattr(settings, "NOTIFICATION_SHUTDOWN_TIMEOUT", 20)
+    tasks = _loop_tasks()
+    if tasks:
+        logger.info("Waiting up to %ss for %d pending order notification(s)", timeout, len(tasks))
+        _, undelivered = await asyncio.wait(tasks, timeout=timeout)
+        for task in undelivered:
+            logger.error("Notifications for order %s not delivered before shutdown", _pending.get(task))
+            task.cancel()
+        await asyncio.gather(*undelivered, return_exceptions=True)
+    resources = _loop_resources.pop(asyncio.get_running_loop(), None)
+    if resources is not None:
+        await resources[1].aclose()
+
+
+async def lifespan(scope, receive, send):
+    """ASGI lifespan protocol: drain the background fan-outs when the server shuts down."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def _loop_tasks():
+    loop = asyncio.get_running_loop()
+    return [task for task in _pending if task.get_loop() is loop]
+
+
+async def asend_admin_email(email):
+    """Send an admin_email_message() without blocking the event loop."""
+    if email is None:
+        return False
+    start = time.perf_counter()
     try:
-        send_mail(
-            subject=subject,
-            message=body,
-            from_email=from_email,
-            recipient_list=[admin_email],
-            fail_silently=False,
-        )
-        logger.info("Admin plain text email sent for order %s", order.id)
-        return True
-    except Exception as exc:
-        logger.exception("Failed to send admin email for order %s: %s", order.id, exc)
+        await smtp_breaker.acall(_deliver_email, email)
+    except Exception as e:
+        NOTIFICATION_FAILURES.labels(channel="email").inc()
+        logger.warning("Admin email %r not sent: %s", email.subject, e)
         return False
+    finally:
+        NOTIFICATION_LATENCY.labels(channel="email").observe(time.perf_counter() - start)
+    logger.info("Admin email sent: %s", email.subject)
+    return True
+
+
+async def _deliver_email(email):
+    if settings.EMAIL_BACKEND != SMTP_BACKEND:
+        # console, locmem, file...: nothing to wait on
+        return await sync_to_async(email.send, thread_sensitive=False)(fail_silently=False)
+
+    import aiosmtplib
+
+    await aiosmtplib.send(
+        email.message(),
+        sender=email.from_email,
+        recipients=email.recipients(),
+        hostname=settings.EMAIL_HOST,
+        port=settings.EMAIL_PORT,
+        username=settings.EMAIL_HOST_USER or None,
+        password=settings.EMAIL_HOST_PASSWORD or None,
+        use_tls=settings.EMAIL_USE_SSL,
+        start_tls=settings.EMAIL_USE_TLS,
+        timeout=settings.EMAIL_TIMEOUT,
+    )
+
+
+async def _send_bounded(notification):
+    semaphore, client = _resources()
+    async with semaphore:
+        try:
+            await send_order_notifications(notification, client)
+        except Exception as e:
+            logger.warning("Notification failed for order %s: %s", notification.order.id, e)
+
+
+def _resources():
+    """This loop's fan-out semaphore and shared HTTP client (connections to the SMS API are reused)."""
+    loop = asyncio.get_running_loop()
+    if loop not in _loop_resources:
+        import httpx
+
+        limit = getattr(settings, "NOTIFICATION_CONCURRENCY", 100)
+        _loop_resources[loop] = (asyncio.Semaphore(limit), httpx.AsyncClient(limits=httpx.Limits(max_connections=limit)))
+    return _loop_resources[loop]
+
+
+def _record_sms(response, notification):
+    # Runs outside any request, so manage the thread's connection as a request would
+    close_old_connections()
+    try:
+        record_sent(response, notification.sms_message, order=notification.order)
+    except Exception as e:
+        logger.warning("Failed to record SMS for order %s: %s", notification.order.id, e)
+    finally:
+        close_old_connections()
@@ -0,0 +1,39 @@
+"""
+Lazy replacement for ``include("mozilla_django_oidc.urls")``.
+
+mozilla_django_oidc.urls imports its views, and through them josepy and cryptography,
+as soon as the URLconf loads. These patterns keep the same paths and names but
+import each view class on its first request.
+"""
+
+from django.conf import settings
+from django.urls import path
+from django.utils.module_loading import import_string
+
+
+def lazy_view(dotted_path, setting=None):
+    """View function that imports `dotted_path` (or the class named by `setting`) on first call."""
+    view = None
+
+    def dispatch(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(getattr(settings, setting, dotted_path) if setting else dotted_path).as_view()
+        return view(request, *args, **kwargs)
+
+    return dispatch
+
+
+urlpatterns = [
+    path(
+        "callback/",
+        lazy_view("mozilla_django_oidc.views.OIDCAuthenticationCallbackView", "OIDC_CALLBACK_CLASS"),
+        name="oidc_authentication_callback",
+    ),
+    path(
+        "authenticate/",
+        lazy_view("mozilla_django_oidc.views.OIDCAuthenticationRequestView", "OIDC_AUTHENTICATE_CLASS"),
+        name="oidc_authentication_init",
+    ),
+    path("logout/", lazy_view("mozilla_django_oidc.views.OIDCLogoutView"), name="oidc_logout"),
+]
@@ -0,0 +1,186 @@
+"""
+Monthly range partitions of the order tables on created_at (Postgres only).
+
+Migration 0010 converts api_order and api_orderitem into tables partitioned by month, each
+with a DEFAULT partition that catches rows outside the created months. On a partitioned
+table the primary key must include the partition key. Both keys are therefore
+(id, created_at), and OrderItem.order has no database FK, since api_order.id alone is no
+longer unique at the database level. Order items copy their order's created_at, so an
+order and its items always live in the same month.
+
+- ensure_partitions() creates the coming months ahead of time. It runs from
+  ``manage.py create_order_partitions`` (monthly CronJob) and ``manage.py bootstrap``.
+- Queries with a created_at predicate, such as ``/api/orders/?days=30`` or the admin
+  date drill-down, only scan the partitions for those months.
+- ``manage.py archive_orders`` exports old months to gzipped JSONL and then drops
+  whole-month partitions, which is instant and leaves no dead rows to vacuum.
+
+When the tables are not partitioned (SQLite, or test databases built without migrations),
+ensure_partitions() does nothing and archiving deletes rows in batches.
+"""
+
+from datetime import date, datetime, time
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Order, OrderItem
+
+PARTITION_KEY = "created_at"
+
+
+def tables():
+    return [Order._meta.db_table, OrderItem._meta.db_table]
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """[start, end) of the month as aware datetimes in the current time zone."""
+    tz = timezone.get_current_timezone()
+    return datetime.combine(month, time.min, tz), datetime.combine(add_months(month, 1), time.min, tz)
+
+
+def partition_name(table, month):
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(table):
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table])
+        return cursor.fetchone() is not None
+
+
+def monthly_partitions(table):
+    """{month: partition name} of the existing monthly partitions of `table`."""
+    prefix = f"{table}_y"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(%s)",
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    return {date(int(n[len(prefix) : len(prefix) + 4]), int(n[-2:]), 1): n for n in names if n.startswith(prefix)}
+
+
+def create_partition(table, month):
+    """
+    Add the month's partition. Rows of that month already in the DEFAULT partition are moved
+    into it first. The partition is created standalone and then attached, which locks the parent
+    less than CREATE TABLE ... PARTITION OF.
+
+    All of it runs in one transaction, so a failure leaves neither a stray table nor moved rows.
+    The DEFAULT partition is locked against writes before the move (reads carry on), so no row
+    of the month can land there before the ATTACH checks it.
+    """
+    name = partition_name(table, month)
+    start, end = month_bounds(month)
+    quoted = connection.ops.quote_name
+    default = quoted(f"{table}_default")
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {quoted(name)} (LIKE {quoted(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(f"LOCK TABLE {default} IN SHARE ROW EXCLUSIVE MODE")
+        in_month = f"{PARTITION_KEY} >= %s AND {PARTITION_KEY} < %s"
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {default} WHERE {in_month} RETURNING *) INSERT INTO {quoted(name)} SELECT * FROM moved",
+            [start, end],
+        )
+        cursor.execute(f"ALTER TABLE {quoted(table)} ATTACH PARTITION {quoted(name)} FOR VALUES FROM (%s) TO (%s)", [start, end])
+    return name
+
+
+def ensure_partitions(months_ahead=3, today=None):
+    """Create missing partitions from the current month through `months_ahead` months later; return their names."""
+    first = month_start(today or timezone.localdate())
+    created = []
+    for table in tables():
+        if not is_partitioned(table):
+            continue
+        existing = monthly_partitions(table)
+        for offset in range(months_ahead + 1):
+            month = add_months(first, offset)
+            if month not in existing:
+                created.append(create_partition(table, month))
+    return created
+
+
+def drop_month(month):
+    """Detach and drop the month's partitions of every order table; return whether any existed."""
+    dropped = False
+    quoted = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for table in reversed(tables()):
+            name = monthly_partitions(table).get(month) if is_partitioned(table) else None
+            if name:
+                cursor.execute(f"ALTER TABLE {quoted(table)} DETACH PARTITION {quoted(name)}")
+                cursor.execute(f"DROP TABLE {quoted(name)}")
+                dropped = True
+    return dropped
+
+
+def partition_tables(schema_editor):
+    """Rebuild the order tables as monthly partitioned tables, keeping rows, indexes and constraints."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table in tables():
+        _convert(schema_editor, table)
+
+
+def _convert(schema_editor, table):
+    quoted = schema_editor.quote_name
+    old = f"{table}_unpartitioned"
+    # Deferred FK checks queued earlier in this transaction would block dropping the old table
+    schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('u', 'f')",
+            [table],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN "
+            "(SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass)",
+            [table, table],
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"SELECT date_trunc('month', min({PARTITION_KEY})) FROM {quoted(table)}")
+        oldest = cursor.fetchone()[0]
+
+    schema_editor.execute(f"ALTER TABLE {quoted(table)} RENAME TO {quoted(old)}")
+    schema_editor.execute(
+        f"CREATE TABLE {quoted(table)} (LIKE {quoted(old)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY) "
+        f"PARTITION BY RANGE ({PARTITION_KEY})"
+    )
+    schema_editor.execute(f"CREATE TABLE {quoted(table + '_default')} PARTITION OF {quoted(table)} DEFAULT")
+    current = month_start(timezone.localdate())
+    month = month_start(oldest) if oldest else current
+    while month <= add_months(current, 3):
+        start, end = month_bounds(month)
+        schema_editor.execute(
+            f"CREATE TABLE {quoted(partition_name(table, month))} PARTITION OF {quoted(table)} FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+        month = add_months(month, 1)
+
+    schema_editor.execute(f"INSERT INTO {quoted(table)} SELECT * FROM {quoted(old)}")
+    schema_editor.execute(
+        f"SELECT setval(pg_get_serial_sequence(%s, 'id'), coalesce((SELECT max(id) FROM {quoted(table)}), 0) + 1, false)", [table]
+    )
+    schema_editor.execute(f"DROP TABLE {quoted(old)}")
+    schema_editor.execute(
+        f"ALTER TABLE {quoted(table)} ADD CONSTRAINT {quoted(table + '_pkey')} PRIMARY KEY (id, {PARTITION_KEY})"
+    )
+    for name, definition in constraints:
+        schema_editor.execute(f"ALTER TABLE {quoted(table)} ADD CONSTRAINT {quoted(name)} {definition}")
+    for definition in indexes:
+        schema_editor.execute(definition)
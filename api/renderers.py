@@ -0,0 +1,38 @@
+import json
+import logging
+
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    logger.debug("orjson not available; fast JSON path will use the stdlib encoder.")
+
+
+def can_render_fast(renderer, accepted_media_type):
+    """
+    True when the negotiated renderer would emit compact UTF-8 JSON, i.e. the
+    output of render_json() is byte-identical to what DRF would produce.
+    """
+    return (
+        type(renderer) is JSONRenderer
+        and renderer.compact
+        and not renderer.ensure_ascii
+        and renderer.get_indent(accepted_media_type, {}) is None
+    )
+
+
+def render_json(data):
+    """
+    Encode plain JSON types (dict/list/str/int/bool/None) exactly like DRF's
+    compact JSONRenderer, using orjson when installed.
+    """
+    if orjson is not None:
+        ret = orjson.dumps(data)
+    else:
+        ret = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+    # DRF always escapes these so the output stays a strict JavaScript subset.
+    return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
@@ -1,7 +1,23 @@
+from collections import defaultdict
+from decimal import Decimal
+
 from django.db import transaction
 from rest_framework import serializers
 
-from .models import Category, Order, OrderItem, Product
+from . import analytics, inventory
+from .instrumentation import span
+from .metrics import STOCK_CONFLICTS
+from .models import Category, DailySales, Order, OrderItem, Product, SMSMessage, StockHold
+
+PRICE_QUANTUM = Decimal("0.01")
+
+
+class TimedRepresentationMixin:
+    """Count to_representation() time toward the request's "serializer" timing phase."""
+
+    def to_representation(self, instance):
+        with span("serializer"):
+            return super().to_representation(instance)
 
 
 class RecursiveCategorySerializer(serializers.Serializer):
@@ -12,7 +28,7 @@ class RecursiveCategorySerializer(serializers.Serializer):
         return serializer.data
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """Category serializer with nested children support."""
 
     children = RecursiveCategorySerializer(many=True, read_only=True)
@@ -28,14 +44,18 @@ class CategorySerializer(serializers.ModelSerializer):
         return value.strip()
 
 
-class ProductSerializer(serializers.ModelSerializer):
-    """Product serializer with category information."""
+class ProductSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    """
+    Product serializer with category information. `stock` is the stock on hand (what a PUT
+    sets); the read-only `available` is that minus unexpired cart holds.
+    """
 
     category_name = serializers.CharField(source="category.name", read_only=True)
+    available = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
-        fields = ["id", "name", "description", "price", "category", "category_name", "stock"]
+        fields = ["id", "name", "description", "price", "category", "category_name", "stock", "available"]
 
     def validate_price(self, value):
         """Ensure price is positive."""
@@ -49,12 +69,97 @@ class ProductSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Stock cannot be negative.")
         return value
 
+    def get_available(self, instance):
+        # ProductViewSet annotates `available` in SQL; otherwise it costs a query per product
+        available = getattr(instance, "available", None)
+        return instance.available_stock if available is None else available
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if instance.stock_shards:
+            data["stock"] = instance.on_hand_stock
+        return data
+
+    def update(self, instance, validated_data):
+        """Setting stock on a sharded product redistributes it across the buckets."""
+        instance = super().update(instance, validated_data)
+        for annotation in ("available", "live_stock"):  # annotated before the update
+            instance.__dict__.pop(annotation, None)
+        if instance.stock_shards and "stock" in validated_data:
+            inventory.rebalance(instance, total=validated_data["stock"])
+        return instance
+
+
+def product_list_data(queryset):
+    """
+    Fast read-path equivalent of ``ProductSerializer(queryset, many=True).data``.
+
+    Fetches plain tuples via values_list() (category name joined in SQL) instead of
+    building model instances and field objects per row. `stock` (on hand) and `available`
+    (minus unexpired cart holds) are computed in SQL. Keep the keys and value
+    formatting in sync with ProductSerializer.Meta.fields.
+    """
+    annotations = queryset.query.annotations
+    if "live_stock" not in annotations:
+        queryset = queryset.annotate(live_stock=inventory.live_stock())
+    if "available" not in annotations:
+        queryset = queryset.annotate(available=inventory.available_stock())
+    rows = queryset.values_list("id", "name", "description", "price", "category_id", "category__name", "live_stock", "available")
+    return [
+        {
+            "id": pk,
+            "name": name,
+            "description": description,
+            # Same rendering as DRF's DecimalField (coerce to string, fixed 2 places).
+            "price": format(price.quantize(PRICE_QUANTUM), "f"),
+            "category": category_id,
+            "category_name": category_name,
+            "stock": stock,
+            "available": available,
+        }
+        for pk, name, description, price, category_id, category_name, stock, available in rows
+    ]
+
+
+def category_tree_data(roots, nodes):
+    """
+    Fast read-path equivalent of ``CategorySerializer(roots, many=True).data``.
+
+    `nodes` is a queryset holding every category that may appear in the nested children
+    (the whole table for the list, the subtree for a detail view). It is fetched in one
+    query and linked up in Python, instead of one children query per category. Children
+    come out in creation (id) order. Keep the keys in sync with CategorySerializer.Meta.fields.
+    """
+    children = defaultdict(list)
+    for pk, name, parent_id in nodes.order_by("id").values_list("id", "name", "parent_id"):
+        children[parent_id].append((pk, name, parent_id))
+
+    rendered = {}
+
+    def render(pk, name, parent_id):
+        # Subtrees repeat in the list (each category is also listed at the top level): build each once.
+        if pk not in rendered:
+            rendered[pk] = {"id": pk, "name": name, "parent": parent_id, "children": [render(*child) for child in children[pk]]}
+        return rendered[pk]
+
+    return [render(*row) for row in roots.values_list("id", "name", "parent_id")]
+
+
+class ProductSearchSerializer(ProductSerializer):
+    """Product search hit with relevance rank and highlighted description snippet."""
+
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+
+    class Meta(ProductSerializer.Meta):
+        fields = ProductSerializer.Meta.fields + ["rank", "snippet"]
+
 
 class OrderItemReadSerializer(serializers.ModelSerializer):
     """Read-only serializer for order items with calculated subtotal."""
 
     product_name = serializers.CharField(source="product.name", read_only=True)
-    product_price = serializers.DecimalField(source="product.price", max_digits=10, decimal_places=2, read_only=True)
+    product_price = serializers.DecimalField(source="unit_price", max_digits=10, decimal_places=2, read_only=True)
     subtotal = serializers.SerializerMethodField()
 
     class Meta:
@@ -63,7 +168,7 @@ class OrderItemReadSerializer(serializers.ModelSerializer):
 
     def get_subtotal(self, obj):
         """Calculate subtotal for this order item."""
-        return obj.quantity * obj.product.price
+        return obj.quantity * obj.unit_price
 
 
 class OrderItemWriteSerializer(serializers.Serializer):
@@ -87,7 +192,7 @@ class OrderItemWriteSerializer(serializers.Serializer):
         return value
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """Order serializer with separate read/write serializers for items."""
 
     items = OrderItemReadSerializer(many=True, read_only=True)
@@ -114,24 +219,22 @@ class OrderSerializer(serializers.ModelSerializer):
 
         for item_data in products_data:
             product = Product.objects.get(id=item_data["product_id"])
-            quantity = item_data["quantity"]
-
-            OrderItem.objects.create(order=order, product=product, quantity=quantity)
-            product.stock -= quantity
-            product.save()
+            OrderItem.objects.create(order=order, product=product, quantity=item_data["quantity"])
+        self._take_stock(order)
 
         order.update_total_amount()
+        analytics.record_order_change(order, [], analytics.order_lines(order), created=True)
         return order
 
     @transaction.atomic
     def update(self, instance, validated_data):
         """Update order with stock restoration and new item management."""
         products_data = validated_data.pop("products", [])
+        lines_before = analytics.order_lines(instance)
 
         # Restore stock for all existing items
-        for existing_item in instance.items.all():
-            existing_item.product.stock += existing_item.quantity
-            existing_item.product.save()
+        for existing_item in instance.items.select_related("product"):
+            inventory.give_back(existing_item.product, existing_item.quantity)
 
         # Clear existing items
         instance.items.all().delete()
@@ -139,11 +242,79 @@ class OrderSerializer(serializers.ModelSerializer):
         # Create new items
         for item_data in products_data:
             product = Product.objects.get(id=item_data["product_id"])
-            quantity = item_data["quantity"]
-
-            OrderItem.objects.create(order=instance, product=product, quantity=quantity)
-            product.stock -= quantity
-            product.save()
+            OrderItem.objects.create(order=instance, product=product, quantity=item_data["quantity"])
+        self._take_stock(instance)
 
         instance.update_total_amount()
+        analytics.record_order_change(instance, lines_before, analytics.order_lines(instance))
         return instance
+
+    @staticmethod
+    def _take_stock(order):
+        """Decrement stock per line in product id order, so concurrent orders lock rows in the same order."""
+        for item in order.items.select_related("product").order_by("product_id"):
+            try:
+                inventory.take(item.product, item.quantity)
+            except inventory.InsufficientStock as e:
+                # Lost a race after the view's stock pre-check
+                STOCK_CONFLICTS.inc()
+                raise serializers.ValidationError({"products": [str(e)]})
+
+
+class StockHoldSerializer(serializers.ModelSerializer):
+    """One product held in the customer's cart."""
+
+    product_name = serializers.CharField(source="product.name", read_only=True)
+
+    class Meta:
+        model = StockHold
+        fields = ["product", "product_name", "quantity", "expires_at"]
+
+
+class CartSerializer(serializers.Serializer):
+    """Cart contents to hold: replaces any existing holds of the customer."""
+
+    products = OrderItemWriteSerializer(many=True)
+
+    def validate_products(self, value):
+        """Ensure at least one product, each listed once."""
+        if not value:
+            raise serializers.ValidationError("Cart must contain at least one product.")
+        product_ids = [item["product_id"] for item in value]
+        if len(set(product_ids)) != len(product_ids):
+            raise serializers.ValidationError("Each product may appear only once.")
+        return value
+
+
+class SMSMessageSerializer(serializers.ModelSerializer):
+    """An SMS notification and its latest delivery status."""
+
+    class Meta:
+        model = SMSMessage
+        fields = ["id", "recipient", "message_id", "status", "failure_reason", "cost", "created_at", "updated_at"]
+
+
+class DailySalesSerializer(serializers.ModelSerializer):
+    """Revenue and units for one day."""
+
+    class Meta:
+        model = DailySales
+        fields = ["date", "orders", "units", "revenue"]
+
+
+class CategorySalesSerializer(serializers.Serializer):
+    """Revenue and units for one category over the requested range."""
+
+    category = serializers.IntegerField()
+    category_name = serializers.CharField()
+    units = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class ProductSalesSerializer(serializers.Serializer):
+    """Revenue and units for one product over the requested range."""
+
+    product = serializers.IntegerField()
+    product_name = serializers.CharField()
+    units = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
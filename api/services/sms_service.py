@@ -1,14 +1,27 @@
+import functools
 import logging
+import time
 
 from django.conf import settings
 
+from api.circuit_breaker import CircuitBreaker
+from api.metrics import NOTIFICATION_FAILURES, NOTIFICATION_LATENCY
+
 logger = logging.getLogger(__name__)
 
-try:
-    import africastalking
-except ImportError:
-    africastalking = None
-    logger.debug("Africa's Talking SDK not available; SMS will be simulated.")
+# Connection errors, timeouts and HTTP errors (requests' exceptions are OSErrors) open the breaker.
+sms_breaker = CircuitBreaker("sms", failures=(OSError,))
+
+
+@functools.lru_cache(maxsize=None)
+def load_africastalking():
+    """Import the Africa's Talking SDK on first use; it is slow to import and unused when SMS is simulated."""
+    try:
+        import africastalking
+    except ImportError:
+        logger.debug("Africa's Talking SDK not available; SMS will be simulated.")
+        return None
+    return africastalking
 
 
 class SMSService:
@@ -18,7 +31,8 @@ class SMSService:
         self.sender_id = getattr(settings, "AFRICASTALKING_SENDER_ID", "AFRICASTALKING")
         self._sms = None
 
-        if africastalking and self.username and self.api_key:
+        africastalking = load_africastalking() if self.username and self.api_key else None
+        if africastalking:
             try:
                 # Initialize Africa's Talking
                 africastalking.initialize(self.username, self.api_key)
@@ -54,7 +68,46 @@ class SMSService:
         else:
             logger.warning("Africa's Talking credentials not configured properly")
 
+        api_url = getattr(settings, "AFRICASTALKING_API_URL", "")
+        if self._sms is not None and api_url:
+            # e.g. the local stub gateway (manage.py sms_stub); the SDK has no option for this
+            self._sms._baseUrl = api_url.rstrip("/") + "/version1"
+
     def send_sms(self, recipients, message: str):
+        validated_recipients = self._validate_recipients(recipients)
+        if not self._sms:
+            return self._simulate(validated_recipients, message)
+
+        start = time.perf_counter()
+        try:
+            response = sms_breaker.call(self._send, message, validated_recipients)
+            logger.info("Africa's Talking SMS sent successfully: %s", response)
+            return response
+
+        except Exception as exc:
+            return self._fallback(exc, validated_recipients, message)
+        finally:
+            NOTIFICATION_LATENCY.labels(channel="sms").observe(time.perf_counter() - start)
+
+    async def asend_sms(self, client, recipients, message: str):
+        """send_sms() for the event loop, posting through `client` (an httpx.AsyncClient)."""
+        validated_recipients = self._validate_recipients(recipients)
+        if not self._sms:
+            return self._simulate(validated_recipients, message)
+
+        start = time.perf_counter()
+        try:
+            response = await sms_breaker.acall(self._asend, client, message, validated_recipients)
+            logger.info("Africa's Talking SMS sent successfully: %s", response)
+            return response
+
+        except Exception as exc:
+            return self._fallback(exc, validated_recipients, message)
+        finally:
+            NOTIFICATION_LATENCY.labels(channel="sms").observe(time.perf_counter() - start)
+
+    @staticmethod
+    def _validate_recipients(recipients):
         if isinstance(recipients, str):
             recipients = [recipients]
 
@@ -68,40 +121,70 @@ class SMSService:
                 else:
                     recipient = "+254" + recipient
             validated_recipients.append(recipient)
+        return validated_recipients
 
-        if not self._sms:
-            logger.info("--- SIMULATED SMS ---")
-            logger.info("To: %s", validated_recipients)
-            logger.info("Message: %s", message)
-            logger.info("Sender: %s", self.sender_id)
-            logger.info("---------------------")
-            return {
-                "status": "simulated",
-                "recipients": validated_recipients,
-                "message": message,
-                "SMSMessageData": {
-                    "Message": "Simulated SMS sent successfully",
-                    "Recipients": [{"number": num, "status": "Success", "cost": "KES 0.8000"} for num in validated_recipients],
-                },
-            }
+    def _simulate(self, validated_recipients, message):
+        logger.info("--- SIMULATED SMS ---")
+        logger.info("To: %s", validated_recipients)
+        logger.info("Message: %s", message)
+        logger.info("Sender: %s", self.sender_id)
+        logger.info("---------------------")
+        return {
+            "status": "simulated",
+            "recipients": validated_recipients,
+            "message": message,
+            "SMSMessageData": {
+                "Message": "Simulated SMS sent successfully",
+                "Recipients": [{"number": num, "status": "Success", "cost": "KES 0.8000"} for num in validated_recipients],
+            },
+        }
 
-        try:
-            # Use the sender_id if provided
-            if self.sender_id:
-                response = self._sms.send(message, validated_recipients, self.sender_id)
-            else:
-                response = self._sms.send(message, validated_recipients)
+    @staticmethod
+    def _fallback(exc, validated_recipients, message):
+        NOTIFICATION_FAILURES.labels(channel="sms").inc()
+        logger.exception("Error sending SMS via Africa's Talking: %s", exc)
+        # Fallback to simulation if real SMS fails
+        logger.info("Falling back to SMS simulation due to error")
+        return {
+            "status": "fallback_simulation",
+            "error": str(exc),
+            "recipients": validated_recipients,
+            "message": message,
+        }
 
-            logger.info("Africa's Talking SMS sent successfully: %s", response)
-            return response
+    def _send(self, message, recipients):
+        """
+        POST to the messaging API as the SDK's SMS.send() does, but with connect/read timeouts;
+        the SDK's own requests have none, so a hung gateway would block until the worker timeout.
+        """
+        import requests  # only needed when SMS is really sent
 
-        except Exception as exc:
-            logger.exception("Error sending SMS via Africa's Talking: %s", exc)
-            # Fallback to simulation if real SMS fails
-            logger.info("Falling back to SMS simulation due to error")
-            return {
-                "status": "fallback_simulation",
-                "error": str(exc),
-                "recipients": validated_recipients,
-                "message": message,
-            }
+        url, data = self._request(message, recipients)
+        timeout = (getattr(settings, "SMS_CONNECT_TIMEOUT", 3), getattr(settings, "SMS_READ_TIMEOUT", 10))
+        response = requests.post(url, data=data, headers=self._sms._headers, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def _asend(self, client, message, recipients):
+        import httpx
+
+        url, data = self._request(message, recipients)
+        timeout = httpx.Timeout(getattr(settings, "SMS_READ_TIMEOUT", 10), connect=getattr(settings, "SMS_CONNECT_TIMEOUT", 3))
+        try:
+            response = await client.post(url, data=data, headers=self._sms._headers, timeout=timeout)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            # Count like requests' errors (OSErrors) against the breaker
+            raise OSError(f"{type(e).__name__}: {e}") from e
+        return response.json()
+
+    def _request(self, message, recipients):
+        """URL and form data of the messaging API call for `recipients`."""
+        for phone in recipients:
+            if not load_africastalking().Service.validate_phone(phone):
+                raise ValueError("Invalid phone number: " + phone)
+        data = {"username": self._sms._username, "to": ",".join(recipients), "message": message, "bulkSMSMode": 1}
+        # Use the sender_id if provided
+        if self.sender_id:
+            data["from"] = self.sender_id
+        return self._sms._make_url("/messaging"), data
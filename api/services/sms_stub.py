@@ -0,0 +1,114 @@
+"""
+Local stand-in for the Africa's Talking SMS API, for development, tests and load tests.
+
+StubSMSGateway answers ``POST /version1/messaging`` like the real API: every recipient is
+accepted with a new messageId. Given a callback URL, it then POSTs delivery reports for
+each message there, as Africa's Talking does: "Sent", then "Success" (or "Failed" for a
+`failure_rate` share of messages), `report_delay` seconds later. Run it with
+``manage.py sms_stub`` and point AFRICASTALKING_API_URL at it.
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import requests
+
+MESSAGING_PATH = "/version1/messaging"
+
+
+class StubSMSGateway:
+    def __init__(self, host="127.0.0.1", port=0, callback_url=None, report_delay=0.5, failure_rate=0.0, latency=0.0):
+        self.callback_url = callback_url
+        self.report_delay = report_delay
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.sent = []  # (message_id, number, message) of every accepted message
+        self._reporter = ThreadPoolExecutor(max_workers=8, thread_name_prefix="sms-stub-report")
+        self._session = requests.Session()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._reporter.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def accept(self, recipients, message):
+        """Record the messages and return the API's SMSMessageData response."""
+        accepted = []
+        for number in recipients:
+            message_id = f"ATXid_stub_{uuid.uuid4().hex}"
+            self.sent.append((message_id, number, message))
+            accepted.append(
+                {"statusCode": 101, "number": number, "status": "Success", "cost": "KES 0.8000", "messageId": message_id}
+            )
+            if self.callback_url:
+                self._reporter.submit(self._report, message_id, number)
+        return {"SMSMessageData": {"Message": f"Sent to {len(accepted)}/{len(recipients)}", "Recipients": accepted}}
+
+    def _report(self, message_id, number):
+        failed = random.random() < self.failure_rate
+        time.sleep(self.report_delay)
+        self._post_report(message_id, number, "Sent")
+        final = {"status": "Failed", "failureReason": "DeliveryFailure"} if failed else {"status": "Success"}
+        self._post_report(message_id, number, **final)
+
+    def _post_report(self, message_id, number, status, failureReason=""):
+        data = {"id": message_id, "status": status, "phoneNumber": number, "networkCode": "63902", "retryCount": 0}
+        if failureReason:
+            data["failureReason"] = failureReason
+        try:
+            self._session.post(self.callback_url, data=data, timeout=5)
+        except requests.RequestException:
+            pass
+
+    def _handler_class(self):
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.split("?")[0] != MESSAGING_PATH:
+                    self.send_error(404)
+                    return
+                if not self.headers.get("apiKey"):
+                    self.send_error(401)
+                    return
+                form = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode())
+                recipients = [n for n in form.get("to", [""])[0].split(",") if n]
+                if gateway.latency:
+                    time.sleep(gateway.latency)
+                body = json.dumps(gateway.accept(recipients, form.get("message", [""])[0])).encode()
+                self.send_response(201)
+                # The SDK only decodes JSON when the content type is exactly this
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,84 @@
+"""
+Local stand-in for an SMTP server, for tests and benchmarks.
+
+StubSMTPServer speaks just enough SMTP (no STARTTLS or AUTH) for Django's SMTP backend and
+aiosmtplib to deliver to it, and keeps every accepted message in ``messages``. `latency`
+seconds are spent before each message is accepted, like a slow relay. Point EMAIL_HOST and
+EMAIL_PORT at it with EMAIL_USE_TLS off.
+"""
+
+import socketserver
+import threading
+import time
+
+
+class StubSMTPServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.latency = latency
+        self.messages = []  # (sender, recipients, data) of every accepted message
+        self.server = socketserver.ThreadingTCPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def host(self):
+        return self.server.server_address[0]
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.reply("220 stub ESMTP")
+                sender, recipients = None, []
+                for line in self.rfile:
+                    command = line.decode(errors="replace").strip()
+                    verb = command[:4].upper()
+                    if verb == "EHLO":
+                        self.reply("250-stub", "250 8BITMIME")
+                    elif verb == "MAIL":
+                        sender, recipients = command[10:].strip(), []
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        recipients.append(command[8:].strip())
+                        self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        data = []
+                        for data_line in self.rfile:
+                            if data_line == b".\r\n":
+                                break
+                            data.append(data_line)
+                        if stub.latency:
+                            time.sleep(stub.latency)
+                        stub.messages.append((sender, recipients, b"".join(data)))
+                        self.reply("250 OK")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:  # HELO, RSET, NOOP
+                        self.reply("250 OK")
+
+            def reply(self, *lines):
+                self.wfile.write("".join(f"{line}\r\n" for line in lines).encode())
+
+        return Handler
@@ -0,0 +1,222 @@
+"""
+SMS message log and Africa's Talking delivery reports.
+
+record_sent() stores one SMSMessage per recipient of a SMSService.send_sms() response.
+It runs inside the caller's transaction, which for order confirmations is the order's.
+
+Africa's Talking POSTs a delivery report to ``/api/sms/delivery-reports/`` each time a
+message changes status; during bulk sends that is thousands of requests per second. The
+view only adds the report to a per-worker buffer and answers 200:
+
+- The buffer keeps one report per messageId: the latest, except that a final status
+  (Success, Failed, ...) is never replaced by an intermediate one.
+- It is written with one ``UPDATE ... FROM (VALUES ...)`` statement per SMS_DLR_BATCH_SIZE
+  messages, as soon as that many are pending, and otherwise every SMS_DLR_FLUSH_SECONDS
+  by a background thread (0 disables the thread).
+- A report can arrive before the transaction that stored its message commits. Reports that
+  match no message are kept for SMS_DLR_MAX_ATTEMPTS flushes and then dropped. A retried
+  report never replaces one for the same message that arrived in the meantime.
+- Without SMS_CALLBACK_TOKEN the callback is refused outside DEBUG, so nobody else can
+  rewrite message statuses.
+
+Buffered reports are flushed on graceful shutdown and lost if the worker is killed.
+"""
+
+import atexit
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .metrics import SMS_DELIVERY_REPORTS, SMS_DELIVERY_REPORTS_DROPPED
+from .models import SMSMessage
+
+logger = logging.getLogger(__name__)
+
+# Delivery report statuses counted under their own metric label; anything else is "other"
+KNOWN_STATUSES = ("Sent", "Submitted", "Buffered", *SMSMessage.FINAL_STATUSES)
+
+
+def record_sent(response, message, order=None):
+    """Store one SMSMessage per recipient of a send_sms() response and return them."""
+    if not isinstance(response, dict):
+        return []
+    outcome = response.get("status")
+    if outcome == "fallback_simulation":
+        error = str(response.get("error", ""))[:100]
+        rows = [
+            SMSMessage(order=order, recipient=number, message=message, status=SMSMessage.ERROR, failure_reason=error)
+            for number in response.get("recipients", [])
+        ]
+        return SMSMessage.objects.bulk_create(rows)
+
+    rows = []
+    for recipient in response.get("SMSMessageData", {}).get("Recipients", []):
+        status = recipient.get("status", "")
+        message_id = recipient.get("messageId")
+        if outcome == "simulated":
+            status, message_id = SMSMessage.SIMULATED, None
+        elif status == "Success":
+            # Accepted by Africa's Talking; delivery reports take it from here
+            status = SMSMessage.SENT
+        rows.append(
+            SMSMessage(
+                order=order,
+                recipient=recipient.get("number", "")[:20],
+                message=message,
+                message_id=message_id if message_id and message_id != "None" else None,
+                status=status[:30],
+                cost=str(recipient.get("cost", ""))[:30],
+            )
+        )
+    return SMSMessage.objects.bulk_create(rows)
+
+
+def apply_reports(reports):
+    """
+    Write {message_id: (status, failure_reason)} with one UPDATE and return the ids of the
+    messages found. Messages already in a final status keep it.
+    """
+    finals = ", ".join(["%s"] * len(SMSMessage.FINAL_STATUSES))
+    values = ", ".join(["(%s, %s, %s)"] * len(reports))
+    sql = (
+        f"UPDATE {SMSMessage._meta.db_table} AS m SET "
+        f"status = CASE WHEN m.status IN ({finals}) THEN m.status ELSE v.status END, "
+        f"failure_reason = CASE WHEN m.status IN ({finals}) THEN m.failure_reason ELSE v.failure_reason END, "
+        "updated_at = %s "
+        f"FROM (VALUES {values}) AS v(message_id, status, failure_reason) "
+        "WHERE m.message_id = v.message_id RETURNING m.message_id"
+    )
+    params = [*SMSMessage.FINAL_STATUSES, *SMSMessage.FINAL_STATUSES, timezone.now()]
+    for message_id, (status, reason) in reports.items():
+        params += [message_id, status[:30], reason[:100]]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {row[0] for row in cursor.fetchall()}
+
+
+class DeliveryReportBuffer:
+    """Delivery reports waiting to be written, keyed by messageId; shared by the worker's threads."""
+
+    def __init__(self):
+        self._pending = {}  # message_id -> (status, failure_reason, flushes that matched no row)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, message_id, status, failure_reason=""):
+        with self._lock:
+            self._merge(message_id, status, failure_reason)
+            full = len(self._pending) >= getattr(settings, "SMS_DLR_BATCH_SIZE", 500)
+        if full:
+            self.flush()
+        else:
+            self._start_flusher()
+
+    def _merge(self, message_id, status, failure_reason):
+        current = self._pending.get(message_id)
+        if current and current[0] in SMSMessage.FINAL_STATUSES and status not in SMSMessage.FINAL_STATUSES:
+            return
+        self._pending[message_id] = (status, failure_reason, current[2] if current else 0)
+
+    def flush(self):
+        """Write all pending reports; return the number of messages updated."""
+        batch_size = getattr(settings, "SMS_DLR_BATCH_SIZE", 500)
+        max_attempts = getattr(settings, "SMS_DLR_MAX_ATTEMPTS", 5)
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            items = list(pending.items())
+            updated = 0
+            retry = []
+            for start in range(0, len(items), batch_size):
+                chunk = {message_id: report[:2] for message_id, report in items[start : start + batch_size]}
+                try:
+                    found = apply_reports(chunk)
+                except DatabaseError:
+                    # The database, not the ids, failed: re-queue the chunk without using up attempts
+                    logger.exception("Failed to apply %d SMS delivery reports; will retry", len(chunk))
+                    retry += [(message_id, pending[message_id], 0) for message_id in chunk]
+                    continue
+                updated += len(found)
+                retry += [(message_id, pending[message_id], 1) for message_id in chunk if message_id not in found]
+            dropped = 0
+            with self._lock:
+                for message_id, (status, reason, attempts), used in retry:
+                    if used and attempts + 1 >= max_attempts:
+                        dropped += 1
+                    elif message_id not in self._pending:
+                        # A report that arrived during the flush is newer than the one being retried
+                        self._pending[message_id] = (status, reason, attempts + used)
+            if dropped:
+                SMS_DELIVERY_REPORTS_DROPPED.inc(dropped)
+                logger.warning("Dropped %d SMS delivery reports for unknown message ids", dropped)
+            return updated
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+
+    def _start_flusher(self):
+        interval = getattr(settings, "SMS_DLR_FLUSH_SECONDS", 1.0)
+        if not interval or (self._flusher and self._flusher.is_alive()):
+            return
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._flush_periodically, args=(interval,), daemon=True)
+                self._flusher.start()
+
+    def _flush_periodically(self, interval):
+        while True:
+            time.sleep(interval)
+            if self._pending:
+                try:
+                    self.flush()
+                finally:
+                    # One reconnect per interval is cheap; an idle connection per worker is not
+                    connection.close()
+
+
+reports = DeliveryReportBuffer()
+atexit.register(reports.flush)
+
+
+@csrf_exempt
+@require_POST
+def delivery_report_view(request):
+    """
+    Africa's Talking delivery report callback (form fields id, status, failureReason; JSON is
+    accepted too). Requires ``?token=<SMS_CALLBACK_TOKEN>``; only DEBUG serves it without one.
+    """
+    token = getattr(settings, "SMS_CALLBACK_TOKEN", "")
+    if not token and not settings.DEBUG:
+        logger.error("SMS_CALLBACK_TOKEN is not set; refusing SMS delivery report callbacks")
+        return HttpResponse(status=503)
+    if token and not constant_time_compare(request.GET.get("token", ""), token):
+        return HttpResponse(status=403)
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return HttpResponseBadRequest("Invalid JSON")
+        if not isinstance(data, dict):
+            return HttpResponseBadRequest("Expected a JSON object")
+    else:
+        data = request.POST
+    message_id, status = data.get("id"), data.get("status")
+    if not message_id or not status:
+        return HttpResponseBadRequest("id and status are required")
+    SMS_DELIVERY_REPORTS.labels(status=status if status in KNOWN_STATUSES else "other").inc()
+    reports.add(str(message_id), str(status), str(data.get("failureReason") or ""))
+    return HttpResponse("OK")
@@ -0,0 +1,130 @@
+"""
+Token-bucket throttles for order writes and anonymous catalog reads.
+
+Rates use DRF's DEFAULT_THROTTLE_RATES format ("30/min") and refill continuously, so a
+client may burst up to the full allowance and then proceeds at the steady rate. Buckets
+live in process memory by default, which costs one dict lookup under a lock and no I/O.
+Each gunicorn worker then enforces the rate on its own share of traffic. With
+THROTTLE_BACKEND = "cache" the buckets are kept in the default Django cache and
+shared by all workers, which needs a shared cache backend (system check api.E002).
+Concurrent updates from different workers may occasionally let an extra request through.
+
+Throttles run after authentication, and a rejected request never reaches a
+serializer or the database.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """'30/min' -> (30, 60.0): capacity and the seconds it takes to refill completely."""
+    count, period = rate.split("/")
+    return int(count), float(DURATIONS[period[0]])
+
+
+class LocalBuckets:
+    """
+    In-process token buckets keyed by client, shared by the worker's threads.
+
+    Buckets are kept in least-recently-used order. Past max_keys the bucket idle the longest
+    is forgotten, which costs O(1) whatever the scope of either key. A forgotten bucket starts
+    full again; after max_keys other clients have been seen since, it has usually refilled anyway.
+    """
+
+    max_keys = 10000
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_seconds, now):
+        """Take one token; return 0 when allowed, else the seconds until a token is available."""
+        rate = capacity / refill_seconds
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return 0 if allowed else (1 - tokens) / rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBuckets:
+    """Token buckets stored in the Django cache, shared across workers and pods."""
+
+    def consume(self, key, capacity, refill_seconds, now):
+        rate = capacity / refill_seconds
+        cache_key = f"throttle:{key}"
+        tokens, updated = cache.get(cache_key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        cache.set(cache_key, (tokens - 1 if allowed else tokens, now), timeout=int(refill_seconds) + 1)
+        return 0 if allowed else (1 - tokens) / rate
+
+
+local_buckets = LocalBuckets()
+cache_buckets = CacheBuckets()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Base class: subclasses set `scope` and implement get_cache_key() (None means not throttled)."""
+
+    scope = None
+
+    def __init__(self):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        self.capacity, self.refill_seconds = parse_rate(rate) if rate else (None, None)
+        self.wait_seconds = None
+
+    def allow_request(self, request, view):
+        if self.capacity is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        buckets = cache_buckets if getattr(settings, "THROTTLE_BACKEND", "local") == "cache" else local_buckets
+        self.wait_seconds = buckets.consume(f"{self.scope}:{key}", self.capacity, self.refill_seconds, time.time())
+        return self.wait_seconds == 0
+
+    def wait(self):
+        return self.wait_seconds
+
+    def get_cache_key(self, request, view):
+        raise NotImplementedError(".get_cache_key() must be overridden")
+
+
+class OrderWriteThrottle(TokenBucketThrottle):
+    """Order creates/updates per user; these transactions lock product rows."""
+
+    scope = "order_writes"
+
+    def get_cache_key(self, request, view):
+        if request.method in SAFE_METHODS or not request.user.is_authenticated:
+            return None
+        return request.user.pk
+
+
+class AnonCatalogThrottle(TokenBucketThrottle):
+    """Anonymous catalog reads per client IP."""
+
+    scope = "anon_catalog"
+
+    def get_cache_key(self, request, view):
+        if request.method not in SAFE_METHODS or request.user.is_authenticated:
+            return None
+        return self.get_ident(request)
@@ -5,15 +5,32 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 # Local application imports
-from .views import CategoryViewSet, OrderViewSet, ProductViewSet, obtain_auth_token, order_form_view
+from .sms_log import delivery_report_view
+from .views import (
+    CartViewSet,
+    CategoryViewSet,
+    MemoryProfileViewSet,
+    OrderViewSet,
+    ProductViewSet,
+    SalesAnalyticsViewSet,
+    obtain_auth_token,
+    order_form_view,
+    place_order,
+)
 
 router = DefaultRouter()
 router.register(r"categories", CategoryViewSet, basename="category")
 router.register(r"products", ProductViewSet, basename="product")
 router.register(r"orders", OrderViewSet, basename="order")
+router.register(r"cart", CartViewSet, basename="cart")
+router.register(r"analytics", SalesAnalyticsViewSet, basename="analytics")
+router.register(r"debug/memory", MemoryProfileViewSet, basename="memory")
 
 urlpatterns = [
+    # Before the router, whose orders/<pk>/ route would match it
+    path("orders/place/", place_order, name="order-place"),
     path("", include(router.urls)),
     path("order_form/", order_form_view, name="order_form"),
     path("obtain-token/", obtain_auth_token, name="obtain-token"),
+    path("sms/delivery-reports/", delivery_report_view, name="sms-delivery-reports"),
 ]
@@ -1,28 +1,70 @@
 # Standard library imports
 import json
 import logging
+from datetime import timedelta
+from decimal import Decimal
 
 # Django imports
+from asgiref.sync import sync_to_async
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.core.handlers.asgi import ASGIRequest
 from django.db import transaction
-from django.db.models import Avg
+from django.db.models import Avg, F, Prefetch, Sum
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
 from django.views.decorators.csrf import csrf_exempt
 
 # Third-party imports
 from rest_framework import status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
 # Local application imports
-from . import notifications
-from .models import Category, Customer, Order, Product
+from . import carts, category_tree, inventory, memory, notifications
+from .idempotency import idempotent
+from .instrumentation import span
+from .metrics import ORDERS_CREATED, STOCK_CONFLICTS
+from .mixins import ReplicaReadMixin
+from .models import (
+    Category,
+    Customer,
+    DailyCategorySales,
+    DailyProductSales,
+    DailySales,
+    Order,
+    OrderItem,
+    Product,
+    SMSMessage,
+    StockHold,
+)
 from .permissions import IsCustomerOrReadOnly, IsOwnerOrReadOnly
-from .serializers import CategorySerializer, OrderSerializer, ProductSerializer
+from .renderers import can_render_fast, render_json
+from .serializers import (
+    CartSerializer,
+    CategorySalesSerializer,
+    CategorySerializer,
+    DailySalesSerializer,
+    OrderSerializer,
+    ProductSalesSerializer,
+    ProductSearchSerializer,
+    ProductSerializer,
+    SMSMessageSerializer,
+    StockHoldSerializer,
+    category_tree_data,
+    product_list_data,
+)
+from .throttling import AnonCatalogThrottle, OrderWriteThrottle
 
 logger = logging.getLogger(__name__)
 
+TRUTHY_PARAMS = ("1", "true", "yes")
 
-class CategoryViewSet(viewsets.ModelViewSet):
+
+class CategoryViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     Categories API:
     - Public read access (anyone can view categories)
@@ -32,39 +74,139 @@ class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all().order_by("name")
     serializer_class = CategorySerializer
     permission_classes = [IsCustomerOrReadOnly]
+    throttle_classes = [AnonCatalogThrottle]
+
+    def list(self, request, *args, **kwargs):
+        """
+        The whole tree, pre-rendered once per tree version (see api.category_tree) and sent with a
+        strong ETag; a matching If-None-Match gets 304 Not Modified without touching the database.
+        """
+        if self.paginator is not None or not can_render_fast(request.accepted_renderer, request.accepted_media_type):
+            return super().list(request, *args, **kwargs)
+        etag, body = category_tree.get_or_render(category_tree.current_version(), self._render_tree)
+        response = get_conditional_response(request, etag=etag) or HttpResponse(body, content_type="application/json")
+        response["ETag"] = etag
+        return response
+
+    def _render_tree(self):
+        with span("serializer"):
+            return render_json(category_tree_data(self.filter_queryset(self.get_queryset()), self.get_queryset()))
+
+    def retrieve(self, request, *args, **kwargs):
+        """The category with its whole subtree, read in a fixed number of queries rather than one per descendant."""
+        category = self.get_object()
+        subtree = self.get_queryset().filter(id__in=Category.subtree_ids(category.id))
+        with span("serializer"):
+            return Response(category_tree_data(subtree.filter(id=category.id), subtree)[0])
 
     @action(detail=True, methods=["get"], permission_classes=[AllowAny])
     def average_price(self, request, pk=None):
         """Calculate average price for products in this category (including all descendant categories)"""
         category = self.get_object()
-        descendant_ids = category.get_all_descendant_ids()
         avg_price = (
-            Product.objects.filter(category__id__in=descendant_ids).aggregate(average_price=Avg("price")).get("average_price")
+            Product.objects.filter(category_id__in=Category.subtree_ids(category.id))
+            .aggregate(average_price=Avg("price"))
+            .get("average_price")
         )
         return Response({"category": category.name, "average_price": float(avg_price or 0)})
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     Products API:
     - Public read access (anyone can view products)
     - Write access requires customer authentication
     """
 
-    queryset = Product.objects.all().order_by("name")
+    queryset = Product.objects.select_related("category").order_by("name")
     serializer_class = ProductSerializer
     permission_classes = [IsCustomerOrReadOnly]
+    throttle_classes = [AnonCatalogThrottle]
 
     def get_queryset(self):
-        """Filter products by category if requested"""
-        queryset = super().get_queryset()
-        category_id = self.request.query_params.get("category")
+        """
+        Filter products by query params:
+        - category=<id>, with include_descendants=true to cover the whole subtree
+        - min_price / max_price
+        - in_stock=true
+        """
+        queryset = super().get_queryset().annotate(live_stock=inventory.live_stock(), available=inventory.available_stock())
+        params = self.request.query_params
+
+        category_id = params.get("category")
         if category_id:
-            queryset = queryset.filter(category_id=category_id)
+            category_id = self._parse_param("category", category_id, int)
+            if params.get("include_descendants", "").lower() in TRUTHY_PARAMS:
+                queryset = queryset.filter(category_id__in=Category.subtree_ids(category_id))
+            else:
+                queryset = queryset.filter(category_id=category_id)
+
+        if params.get("min_price"):
+            queryset = queryset.filter(price__gte=self._parse_param("min_price", params["min_price"], Decimal))
+        if params.get("max_price"):
+            queryset = queryset.filter(price__lte=self._parse_param("max_price", params["max_price"], Decimal))
+        if params.get("in_stock", "").lower() in TRUTHY_PARAMS:
+            # stock > 0 keeps the partial index usable; buckets and cart holds are then checked per candidate row
+            queryset = queryset.filter(stock__gt=0, available__gt=0)
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        """
+        Compact JSON listings skip DRF serializer instances: rows come from values_list()
+        and are encoded with orjson, producing the same bytes as the ProductSerializer path.
+        """
+        if self.paginator is not None or not can_render_fast(request.accepted_renderer, request.accepted_media_type):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        with span("serializer"):
+            body = render_json(product_list_data(queryset))
+        return HttpResponse(body, content_type="application/json")
+
+    @staticmethod
+    def _parse_param(name, value, cast):
+        try:
+            parsed = cast(value)
+        except (ValueError, ArithmeticError):
+            parsed = None
+        if parsed is None or (isinstance(parsed, Decimal) and not parsed.is_finite()):
+            raise ValidationError({name: f"Invalid value: {value}"})
+        return parsed
+
+    @action(detail=False, methods=["get"], permission_classes=[AllowAny])
+    def search(self, request):
+        """Full-text search over name and description, best matches first with highlighted snippets"""
+        term = request.query_params.get("q", "").strip()
+        if not term:
+            return Response({"error": "Query parameter 'q' is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+        except ValueError:
+            return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        query = SearchQuery(term, search_type="websearch", config="english")
+        # The GIN index on search_vector serves the match; rank and headline only run on matching rows.
+        results = (
+            self.get_queryset()
+            .filter(search_vector=query)
+            .annotate(
+                rank=SearchRank(F("search_vector"), query),
+                snippet=SearchHeadline(
+                    "description",
+                    query,
+                    config="english",
+                    start_sel="<mark>",
+                    stop_sel="</mark>",
+                    max_words=25,
+                    min_words=10,
+                ),
+            )
+            .order_by("-rank", "id")[:limit]
+        )
+        serializer = ProductSearchSerializer(results, many=True)
+        return Response(serializer.data)
 
-class OrderViewSet(viewsets.ModelViewSet):
+
+class OrderViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     Orders API:
     - Requires authentication
@@ -75,6 +217,8 @@ class OrderViewSet(viewsets.ModelViewSet):
     queryset = Order.objects.all().order_by("-created_at")
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
+    throttle_classes = [OrderWriteThrottle]
+    replica_actions = ("list",)
 
     def get_customer(self, user):
         """Get customer profile for authenticated user"""
@@ -99,19 +243,42 @@ class OrderViewSet(viewsets.ModelViewSet):
             return customer
 
     def get_queryset(self):
-        """Return only orders belonging to the authenticated user"""
+        """
+        Return only orders belonging to the authenticated user. The list accepts ?days=N for
+        orders of the last N days; the created_at bound lets Postgres skip older monthly partitions.
+        """
         if self.request.user.is_anonymous:
             return Order.objects.none()
         try:
             customer = self.get_customer(self.request.user)
-            return self.queryset.filter(customer=customer)
         except ValueError:
             return Order.objects.none()
+        queryset = self.queryset.filter(customer=customer)
+        if self.action in ("list", "retrieve"):
+            # Reads only: update() re-serializes the order after replacing its items, and a
+            # prefetch taken before that would render the old ones.
+            queryset = queryset.select_related("customer__user").prefetch_related(
+                Prefetch("items", queryset=OrderItem.objects.select_related("product").order_by("id"))
+            )
+        days = self.request.query_params.get("days")
+        if days and self.action == "list":
+            days = ProductViewSet._parse_param("days", days, int)
+            queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(days=days))
+        return queryset
+
+    @action(detail=True, methods=["get"])
+    def sms(self, request, pk=None):
+        """Delivery status of the order's SMS notifications (updated from Africa's Talking delivery reports)"""
+        order = self.get_object()
+        messages = SMSMessage.objects.filter(order_id=order.pk).order_by("created_at", "id")
+        return Response(SMSMessageSerializer(messages, many=True).data)
 
     @transaction.atomic
+    @idempotent
     def create(self, request, *args, **kwargs):
         """
         Create order with stock validation and notifications.
+        Retries carrying the same Idempotency-Key header replay the first successful response.
         """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -148,27 +315,215 @@ class OrderViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
             if not product.has_sufficient_stock(quantity):
+                STOCK_CONFLICTS.inc()
                 return Response(
-                    {"error": f"Insufficient stock for {product.name}. " f"Requested: {quantity}, Available: {product.stock}"},
+                    {
+                        "error": f"Insufficient stock for {product.name}. "
+                        f"Requested: {quantity}, Available: {product.available_stock}"
+                    },
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
         # CRITICAL FIX: Pass customer to serializer.save()
         order = serializer.save(customer=customer)
+        transaction.on_commit(ORDERS_CREATED.inc)
+        self.notify(order)
+
+        response_serializer = self.get_serializer(order)
+        headers = self.get_success_headers(response_serializer.data)
+        return Response(response_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    def notify(self, order):
+        """Send the customer's SMS and the admin email for a new order"""
         try:
             notifications.send_order_confirmation_sms(order)
             notifications.send_new_order_admin_email(order)
         except Exception as e:
             logger.warning(f"Notification failed for order {order.id}: {e}")
 
-        response_serializer = self.get_serializer(order)
-        headers = self.get_success_headers(response_serializer.data)
-        return Response(response_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+class OrderPlacementViewSet(OrderViewSet):
+    """OrderViewSet.create for place_order: the notifications are prepared here and sent by the async view."""
+
+    def notify(self, order):
+        try:
+            self.request._request.order_notification = notifications.order_notification(order)
+        except Exception as e:
+            logger.warning(f"Notification failed for order {order.id}: {e}")
+
+
+class CartViewSet(viewsets.ViewSet):
+    """
+    Cart API (stock holds that expire after CART_HOLD_SECONDS):
+    - list: the customer's holds and when they expire
+    - create: hold {"products": [{"product_id", "quantity"}]}, replacing the current cart
+    - release: drop the cart and free its units
+    - checkout: turn unexpired holds into an order without re-checking stock
+    """
+
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [OrderWriteThrottle]
+    get_customer = OrderViewSet.get_customer
+    notify = OrderViewSet.notify
+
+    def _customer(self):
+        try:
+            return self.get_customer(self.request.user)
+        except ValueError as e:
+            raise ValidationError({"error": str(e)})
+
+    def list(self, request):
+        """Unexpired holds in the customer's cart"""
+        holds = StockHold.objects.filter(customer__user=request.user, expires_at__gt=timezone.now()).select_related("product")
+        return Response(StockHoldSerializer(holds.order_by("product_id"), many=True).data)
+
+    def create(self, request):
+        """Hold stock for the given products"""
+        serializer = CartSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        lines = {item["product_id"]: item["quantity"] for item in serializer.validated_data["products"]}
+        try:
+            holds = carts.hold(self._customer(), lines)
+        except inventory.InsufficientStock as e:
+            STOCK_CONFLICTS.inc()
+            return Response({"error": f"{e}, Available: {e.product.available_stock}"}, status=status.HTTP_400_BAD_REQUEST)
+        except Product.DoesNotExist as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(StockHoldSerializer(holds, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"])
+    def release(self, request):
+        """Empty the cart"""
+        released = carts.release(self._customer())
+        return Response({"released": released})
+
+    @action(detail=False, methods=["post"])
+    @transaction.atomic
+    @idempotent
+    def checkout(self, request):
+        """Create an order from the held products"""
+        customer = self._customer()
+        try:
+            order = carts.checkout(customer)
+        except carts.HoldExpired as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        except inventory.InsufficientStock as e:
+            # The held units are gone, e.g. stock was corrected in the admin after the hold
+            STOCK_CONFLICTS.inc()
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        transaction.on_commit(ORDERS_CREATED.inc)
+        self.notify(order)
+        return Response(OrderSerializer(order, context={"request": request}).data, status=status.HTTP_201_CREATED)
+
+
+class SalesAnalyticsViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    """
+    Sales analytics API (staff only), served entirely from the daily rollup tables:
+    - by_day: revenue, units and order count per day
+    - by_category / by_product: totals over the range, highest revenue first
+    All actions accept optional ?start=YYYY-MM-DD&end=YYYY-MM-DD (inclusive).
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def _date_range(self, queryset):
+        for param, lookup in (("start", "date__gte"), ("end", "date__lte")):
+            value = self.request.query_params.get(param)
+            if value:
+                parsed = parse_date_param(param, value)
+                queryset = queryset.filter(**{lookup: parsed})
+        return queryset
+
+    @action(detail=False, methods=["get"])
+    def by_day(self, request):
+        """Revenue and units per day"""
+        queryset = self._date_range(DailySales.objects.order_by("date"))
+        return Response(DailySalesSerializer(queryset, many=True).data)
+
+    @action(detail=False, methods=["get"])
+    def by_category(self, request):
+        """Revenue and units per category"""
+        queryset = (
+            self._date_range(DailyCategorySales.objects.all())
+            .values("category")
+            .annotate(category_name=F("category__name"), units=Sum("units"), revenue=Sum("revenue"))
+            .order_by("-revenue", "category")
+        )
+        return Response(CategorySalesSerializer(queryset, many=True).data)
+
+    @action(detail=False, methods=["get"])
+    def by_product(self, request):
+        """Revenue and units per product"""
+        queryset = (
+            self._date_range(DailyProductSales.objects.all())
+            .values("product")
+            .annotate(product_name=F("product__name"), units=Sum("units"), revenue=Sum("revenue"))
+            .order_by("-revenue", "product")
+        )
+        return Response(ProductSalesSerializer(queryset, many=True).data)
+
+
+class MemoryProfileViewSet(viewsets.ViewSet):
+    """
+    tracemalloc controls for the worker that serves the request (staff only):
+    - list: tracing state and traced memory of this worker
+    - start / stop: switch tracing on (?frames=N, default 10) or off
+    - snapshot: top allocation sites (?limit=N, default 20) and the diff against this
+      worker's previous snapshot
+    Each gunicorn worker keeps its own snapshots; the response's pid says which one answered.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def list(self, request):
+        return Response(memory.status())
+
+    @action(detail=False, methods=["post"])
+    def start(self, request):
+        """Start tracing allocations in this worker"""
+        memory.start_tracing(self._int_param("frames", 10, 1, 100))
+        return Response(memory.status())
+
+    @action(detail=False, methods=["post"])
+    def stop(self, request):
+        """Stop tracing and drop this worker's snapshots"""
+        memory.stop_tracing()
+        return Response(memory.status())
+
+    @action(detail=False, methods=["post"])
+    def snapshot(self, request):
+        """Top allocation sites and growth since the previous snapshot"""
+        if not memory.is_debug_tracing():
+            return Response(
+                {"error": "tracemalloc is not tracing in this worker; POST start first"}, status=status.HTTP_409_CONFLICT
+            )
+        return Response(memory.take_snapshot(self._int_param("limit", 20, 1, 200)))
+
+    def _int_param(self, name, default, low, high):
+        value = self.request.query_params.get(name, default)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValidationError({name: "Must be an integer."})
+        if not low <= value <= high:
+            raise ValidationError({name: f"Must be between {low} and {high}."})
+        return value
+
+
+def parse_date_param(name, value):
+    """Parse a YYYY-MM-DD query param, raising a 400 on bad input"""
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: f"Invalid date: {value}. Use YYYY-MM-DD."})
+    return parsed
 
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@throttle_classes([OrderWriteThrottle])
 @csrf_exempt  # For demo simplicity; remove in production with proper CSRF
 def order_form_view(request):
     """Handle order creation via a simple form submission"""
@@ -186,6 +541,25 @@ def order_form_view(request):
     return Response({"error": "Method not allowed"}, status=405)
 
 
+_create_order = OrderPlacementViewSet.as_view({"post": "create"})
+
+
+@csrf_exempt
+async def place_order(request):
+    """
+    POST /api/orders/place/: create an order like POST /api/orders/ (same body, validation,
+    idempotency and response), then send the SMS and admin email concurrently. Under ASGI the
+    response goes out once the order commits, and the notifications follow on the event loop.
+    """
+    response = await sync_to_async(_create_order)(request)
+    notification = getattr(request, "order_notification", None)
+    if notification is not None and response.status_code == status.HTTP_201_CREATED:
+        # WSGI runs this view in an event loop that ends with the request; a full backlog sends inline too
+        if not isinstance(request, ASGIRequest) or notifications.dispatch_order_notifications(notification) is None:
+            await notifications.send_order_notifications_now(notification)
+    return response
+
+
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def obtain_auth_token(request):
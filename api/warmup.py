@@ -0,0 +1,151 @@
+"""
+Worker warm-up: pay the first-request costs before the worker takes traffic.
+
+gunicorn.conf.py runs ``warm_up(database=False)`` once in the master after the app is
+preloaded (URL resolver and templates, shared with workers copy-on-write) and
+``warm_up(application)`` in every worker from ``post_fork``. The worker's warm-up
+issues the WARMUP_PATHS requests, plus the detail pages of the best-selling products and
+the product list of the top seller's category, through the real WSGI application. Every
+request is bounded; the unfiltered product list is never fetched. That exercises the middleware, views and serializers,
+and pulls the category tree and hot product rows into Postgres' buffer cache.
+``/readyz`` reports ready once it has finished without errors. A failed warm-up is logged
+as an error, keeps the worker unready and is retried from ``/readyz`` every RETRY_SECONDS.
+"""
+
+import io
+import json
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Sum
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+RETRY_SECONDS = 30
+
+_lock = threading.Lock()
+_state = {"status": "pending", "timings": {}, "errors": []}
+_finished_at = [0.0]  # monotonic time the last worker warm-up ended
+
+
+def is_ready():
+    return _state["status"] == "done"
+
+
+def state():
+    return {"status": _state["status"], "timings_ms": dict(_state["timings"]), "errors": list(_state["errors"])}
+
+
+def warm_up(application=None, database=True):
+    """Run the warm-up steps; failures are logged and recorded but never raised."""
+    with _lock:
+        _state.update(status="running", timings={}, errors=[])
+        _step("urls", _warm_urls)
+        _step("templates", _warm_templates)
+        if database:
+            if application is None:
+                from django.core.handlers.wsgi import WSGIHandler
+
+                application = WSGIHandler()
+            _step("requests", _warm_requests, application)
+            _state["status"] = "failed" if _state["errors"] else "done"
+            _finished_at[0] = time.monotonic()
+        else:
+            _state["status"] = "pending"
+            connections.close_all()  # never hand a connection opened in the master to forked workers
+    level = logging.ERROR if _state["status"] == "failed" else logging.INFO
+    logger.log(level, json.dumps({"event": "warmup", "database": database, **state()}))
+
+
+def ensure_started():
+    """
+    Start warm-up in the background when nothing has run it (e.g. runserver, no gunicorn hooks),
+    or retry a failed one after RETRY_SECONDS.
+    """
+    status = _state["status"]
+    retry = status == "failed" and time.monotonic() - _finished_at[0] >= RETRY_SECONDS
+    if (status == "pending" or retry) and not _lock.locked():
+        threading.Thread(target=warm_up, name="warmup", daemon=True).start()
+
+
+def _step(name, func, *args):
+    start = time.perf_counter()
+    try:
+        func(*args)
+    except Exception as e:
+        logger.warning("Warm-up step %s failed: %s", name, e)
+        _state["errors"].append(f"{name}: {e}")
+    _state["timings"][name] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def _warm_urls():
+    # The first reverse() populates the resolver, compiling every pattern of the URLconf
+    for name in ("category-list", "product-list", "order-list"):
+        reverse(name)
+
+
+def _warm_templates():
+    names = list(getattr(settings, "WARMUP_TEMPLATES", []))
+    if getattr(settings, "BROWSABLE_API", False):
+        names.append("rest_framework/api.html")
+    for name in names:
+        get_template(name)
+
+
+def warmup_paths():
+    from .models import DailyProductSales, Product
+
+    paths = list(getattr(settings, "WARMUP_PATHS", []))
+    top = getattr(settings, "WARMUP_TOP_PRODUCTS", 0)
+    if top:
+        since = timezone.now().date() - timedelta(days=30)
+        best_sellers = (
+            DailyProductSales.objects.filter(date__gte=since)
+            .values("product")
+            .annotate(revenue=Sum("revenue"))
+            .order_by("-revenue")
+            .values_list("product", flat=True)[:top]
+        )
+        best_sellers = list(best_sellers)
+        paths.extend(reverse("product-detail", args=[pk]) for pk in best_sellers)
+        category = Product.objects.filter(pk__in=best_sellers[:1]).values_list("category", flat=True).first()
+        if category is not None:
+            paths.append(f"{reverse('product-list')}?category={category}")
+    return paths
+
+
+def _warm_requests(application):
+    host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+    failed = []
+    for path in warmup_paths():
+        path_info, _, query = path.partition("?")
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path_info,
+            "QUERY_STRING": query,
+            "SERVER_NAME": host,
+            "SERVER_PORT": "80",
+            "HTTP_HOST": host,
+            "HTTP_ACCEPT": "application/json",
+            "wsgi.input": io.BytesIO(),
+            "wsgi.url_scheme": "http",
+        }
+        statuses = []
+        body = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        try:
+            for _ in body:
+                pass
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+        if not statuses[0].startswith("2"):
+            failed.append(f"{path} -> {statuses[0]}")
+    if failed:
+        raise RuntimeError(", ".join(failed))
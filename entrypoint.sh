@@ -6,41 +6,27 @@ APP_PORT=${PORT:-8888}
 
 cd /app/
 
-# Run database migrations
-echo "Applying database migrations..."
-python manage.py migrate --noinput
-
-# Ensure superuser exists
-echo "Creating superuser if not exists..."
-python manage.py createsuperuserifnotexists
-
-# Load initial data (ignore errors if already loaded)
-echo "Loading initial data fixtures..."
-python manage.py loaddata api/fixtures/products.json || true
-
-# Create reviewer test account
-echo "Setting up reviewer test account..."
-python manage.py shell << 'EOF'
-from django.contrib.auth.models import User
-from api.models import Customer
-
-if not User.objects.filter(username='reviewer').exists():
-    user = User.objects.create_user(
-        username='reviewer',
-        email='reviewer@savannah.test',
-        password='Review2024!'
-    )
-    Customer.objects.create(
-        user=user,
-        phone_number='+254700000000',
-        address='Test Address, Nairobi'
-    )
-    print("✓ Reviewer account created")
-else:
-    print("✓ Reviewer account exists")
-EOF
-
-exec gunicorn --timeout 90 \
+# Migrations, admin/reviewer accounts and fixtures in one Django process. The k8s
+# deployment sets SKIP_BOOTSTRAP=1 because its migrate init container already ran it.
+if [ "${SKIP_BOOTSTRAP:-0}" != "1" ]; then
+    python manage.py bootstrap
+fi
+
+# Shared directory for per-worker Prometheus samples; wiped so stale worker files don't linger
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/dev/shm/prometheus}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# APP_SERVER=asgi runs uvicorn workers on savannah_assess.asgi: POST /api/orders/place/ then answers as soon
+# as the order commits and sends its notifications on the worker's event loop. Sync views run in threads.
+if [ "${APP_SERVER:-wsgi}" = "asgi" ]; then
+    APP_ARGS="--worker-class uvicorn_worker.UvicornWorker savannah_assess.asgi:application"
+else
+    APP_ARGS="savannah_assess.wsgi:application"
+fi
+
+exec gunicorn --config gunicorn.conf.py \
+    --timeout 90 \
     --worker-tmp-dir /dev/shm \
     --workers 3 \
     --bind 0.0.0.0:${APP_PORT} \
@@ -48,4 +34,4 @@ exec gunicorn --timeout 90 \
     --error-logfile - \
     --log-level info \
     --capture-output \
-    savannah_assess.wsgi:application
\ No newline at end of file
+    $APP_ARGS
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""Gunicorn settings; command-line flags in entrypoint.sh take precedence."""
+
+import os
+
+# Import Django and the app once in the master; workers fork from it with URL patterns and
+# templates already loaded (see when_ready) and share those pages copy-on-write.
+preload_app = True
+
+
+def when_ready(server):
+    """Warm what needs no database before the first worker is forked."""
+    from api.warmup import warm_up
+
+    warm_up(database=False)
+
+
+def post_fork(server, worker):
+    """Warm each worker (DB-backed pages) before it accepts connections; /readyz reports the result."""
+    from django.core.handlers.wsgi import WSGIHandler
+
+    from api.warmup import warm_up
+
+    application = server.app.wsgi()
+    # ASGI workers (APP_SERVER=asgi) are warmed through a WSGI handler of the same project
+    warm_up(application if isinstance(application, WSGIHandler) else None)
+
+
+def child_exit(server, worker):
+    """Drop an exited worker's live Prometheus samples so /metrics only aggregates running workers."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
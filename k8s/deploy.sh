@@ -66,6 +66,9 @@ kubectl apply -f django-app.yaml
 print_status "Creating services..."
 kubectl apply -f django-service.yaml
 
+print_status "Scheduling maintenance jobs..."
+kubectl apply -f maintenance-cronjobs.yaml
+
 print_status "Waiting for Django app to be ready..."
 kubectl wait --for=condition=available --timeout=300s deployment/django-app-deployment -n savannah-assess
 
@@ -1,8 +1,5 @@
 #!/bin/bash
 set -e
 
-echo "Applying database migrations..."
-python manage.py migrate --noinput
-
-echo "Creating superuser if not exists..."
-python manage.py createsuperuserifnotexists
+echo "Bootstrapping database (migrations, accounts, fixtures)..."
+python manage.py bootstrap
@@ -13,4 +13,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "savannah_assess.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from api import notifications  # noqa: E402  (needs the apps loaded by get_asgi_application)
+
+
+async def application(scope, receive, send):
+    """Django, plus the lifespan protocol so a stopping worker drains its order notifications."""
+    if scope["type"] == "lifespan":
+        await notifications.lifespan(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
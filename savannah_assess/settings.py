@@ -1,4 +1,3 @@
-import logging
 import os
 from pathlib import Path
 
@@ -30,6 +29,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "api",
     "rest_framework",
     "mozilla_django_oidc",
@@ -38,6 +38,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.health.HealthCheckMiddleware",  # answers /healthz and /readyz before anything else runs
+    "api.middleware.RequestTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -48,6 +50,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.middleware.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "savannah_assess.urls"
@@ -81,6 +84,36 @@ DATABASES = {
     }
 }
 
+# Read replicas: comma-separated "host[:port]" list, each exposed as a "replica_<n>" alias.
+# Safe-method catalog and order-list reads are routed there by api.mixins.ReplicaReadMixin.
+DB_REPLICA_HOSTS = config("DB_REPLICA_HOSTS", default="", cast=lambda v: [s.strip() for s in v.split(",") if s.strip()])
+for _index, _replica in enumerate(DB_REPLICA_HOSTS, start=1):
+    _host, _, _port = _replica.partition(":")
+    DATABASES[f"replica_{_index}"] = {
+        **DATABASES["default"],
+        "HOST": _host,
+        "PORT": _port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["api.db_routers.PrimaryReplicaRouter"]
+# Seconds a user's reads stay on the primary after a successful write (read-your-writes).
+REPLICA_PIN_SECONDS = config("REPLICA_PIN_SECONDS", default=5, cast=int)
+
+# The default cache holds state every worker and pod must see: read-your-writes pins
+# (api.mixins) and THROTTLE_BACKEND="cache" buckets. The database cache needs no extra service
+# (``manage.py bootstrap`` creates its table); set CACHE_BACKEND and CACHE_LOCATION to move it to
+# Redis or Memcached. A per-process backend (LocMemCache) breaks both across workers.
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": config("CACHE_LOCATION", default="django_cache"),
+    }
+}
+if CACHES["default"]["BACKEND"].endswith("DatabaseCache"):
+    # Culling at the default 300 entries would drop live pins and buckets
+    CACHES["default"]["OPTIONS"] = {"MAX_ENTRIES": config("CACHE_MAX_ENTRIES", default=100000, cast=int)}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -95,10 +128,13 @@ AUTHENTICATION_BACKENDS = (
     "django.contrib.auth.backends.ModelBackend",
 )
 
+# Browsable API (HTML) renderer; off by default in production so API workers never load its templates and forms.
+BROWSABLE_API = config("BROWSABLE_API", default=DEBUG, cast=bool)
+
 # DRF config - Updated for better OIDC integration
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "mozilla_django_oidc.contrib.drf.OIDCAuthentication",
+        "api.authentication.LazyOIDCAuthentication",  # imports mozilla_django_oidc on first Bearer token
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.TokenAuthentication",  # Fallback
     ],
@@ -107,14 +143,105 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.JSONRenderer",
-        "rest_framework.renderers.BrowsableAPIRenderer",
+        *(["rest_framework.renderers.BrowsableAPIRenderer"] if BROWSABLE_API else []),
     ],
+    # Token-bucket rates for api.throttling (order writes per user, anonymous catalog reads per IP)
+    "DEFAULT_THROTTLE_RATES": {
+        "order_writes": config("THROTTLE_ORDER_WRITES", default="30/min"),
+        "anon_catalog": config("THROTTLE_ANON_CATALOG", default="300/min"),
+    },
 }
 
+# "local": per-worker in-process buckets (no I/O), so each worker allows the full rate; "cache":
+# buckets shared through the default cache (CACHES), refused at startup if that is per-process.
+THROTTLE_BACKEND = config("THROTTLE_BACKEND", default="local")
+
+# Worker warm-up (api.warmup, run from gunicorn.conf.py): GET these paths, the detail pages of
+# the WARMUP_TOP_PRODUCTS best sellers of the last 30 days and their top seller's category
+# listing, and load these templates before a worker serves traffic. /readyz returns 503 until it
+# has finished without errors. Keep each path bounded (the unfiltered product list is not).
+WARMUP_PATHS = config("WARMUP_PATHS", default="/api/categories/", cast=lambda v: [s.strip() for s in v.split(",") if s.strip()])
+WARMUP_TOP_PRODUCTS = config("WARMUP_TOP_PRODUCTS", default=10, cast=int)
+WARMUP_TEMPLATES = config(
+    "WARMUP_TEMPLATES", default="home.html,order_form.html", cast=lambda v: [s.strip() for s in v.split(",") if s.strip()]
+)
+
+# Seconds an order Idempotency-Key (and its stored response) is honored; expired keys are
+# removed by `manage.py purge_idempotency_keys`.
+IDEMPOTENCY_KEY_TTL = config("IDEMPOTENCY_KEY_TTL", default=86400, cast=int)
+
+# Seconds a cart keeps its products' stock held (api.carts); expired holds stop counting at
+# once and their rows are deleted by `manage.py release_expired_holds`.
+CART_HOLD_SECONDS = config("CART_HOLD_SECONDS", default=900, cast=int)
+
+# Where `manage.py archive_orders` writes its gzipped JSONL files (mount cold storage here).
+ORDER_ARCHIVE_DIR = config("ORDER_ARCHIVE_DIR", default=str(BASE_DIR / "archive"))
+
+# Default number of stock buckets for `manage.py shard_stock` (hot products only; see api.inventory).
+STOCK_SHARDS = config("STOCK_SHARDS", default=8, cast=int)
+
+# Seconds a worker trusts its last read of the category tree version (api.category_tree); other
+# workers' category writes show up in /api/categories/ and its ETag after at most this long.
+CATEGORY_TREE_VERSION_TTL = config("CATEGORY_TREE_VERSION_TTL", default=1.0, cast=float)
+
+# Seconds a worker reuses its /readyz database check result, keeping probe queries negligible.
+# Keep it above the readiness probe's periodSeconds (5 in k8s/django-app.yaml), or every probe queries.
+HEALTH_DB_CHECK_TTL = config("HEALTH_DB_CHECK_TTL", default=15, cast=int)
+
+# Per-request timing (api.middleware.RequestTimingMiddleware): requests slower than
+# REQUEST_TIMING_SLOW_MS or issuing more than REQUEST_TIMING_MAX_QUERIES are logged
+# as warnings together with their REQUEST_TIMING_SLOW_SQL slowest statements.
+REQUEST_TIMING_SLOW_MS = config("REQUEST_TIMING_SLOW_MS", default=500, cast=int)
+REQUEST_TIMING_MAX_QUERIES = config("REQUEST_TIMING_MAX_QUERIES", default=50, cast=int)
+REQUEST_TIMING_SLOW_SQL = config("REQUEST_TIMING_SLOW_SQL", default=5, cast=int)
+
+# Views whose per-request peak Python memory (tracemalloc) is added to the request_timing
+# log line as peak_mem_kb, e.g. "product-list,order-list,category-list". Tracing makes a
+# request ~3x slower, so only one in MEMORY_PEAK_SAMPLE_EVERY requests to these views per
+# worker is measured (unless the worker already runs with PYTHONTRACEMALLOC set). Off by default.
+MEMORY_PEAK_VIEWS = config(
+    "MEMORY_PEAK_VIEWS",
+    default="",
+    cast=lambda v: {s.strip() for s in v.split(",") if s.strip()},
+)
+MEMORY_PEAK_SAMPLE_EVERY = config("MEMORY_PEAK_SAMPLE_EVERY", default=100, cast=int)
+
+# On-demand request profiling (api.middleware.ProfilingMiddleware); disabled unless
+# PROFILING_DIR is set. Signed X-Profile header tokens expire after PROFILING_TOKEN_MAX_AGE seconds.
+PROFILING_DIR = config("PROFILING_DIR", default="")
+PROFILING_TOKEN_MAX_AGE = config("PROFILING_TOKEN_MAX_AGE", default=3600, cast=int)
+
+# Bearer token required by /metrics when set (leave empty on a private scrape network).
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
 # Africa's Talking
 AFRICASTALKING_USERNAME = config("AFRICASTALKING_USERNAME", default="sandbox")
 AFRICASTALKING_API_KEY = config("AFRICASTALKING_API_KEY", default=None)
 AFRICASTALKING_SENDER_ID = config("AFRICASTALKING_SENDER_ID", default="")
+# Base URL of the Africa's Talking API (e.g. a local `manage.py sms_stub`); empty uses the SDK default.
+AFRICASTALKING_API_URL = config("AFRICASTALKING_API_URL", default="")
+# Notification provider timeouts (seconds) and circuit breakers (api.circuit_breaker): after
+# CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive failures a provider is skipped (immediate
+# fallback) for CIRCUIT_BREAKER_RESET_SECONDS, then probed with a single call.
+SMS_CONNECT_TIMEOUT = config("SMS_CONNECT_TIMEOUT", default=3.0, cast=float)
+SMS_READ_TIMEOUT = config("SMS_READ_TIMEOUT", default=10.0, cast=float)
+EMAIL_TIMEOUT = config("EMAIL_TIMEOUT", default=10, cast=int)
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = config("CIRCUIT_BREAKER_FAILURE_THRESHOLD", default=5, cast=int)
+CIRCUIT_BREAKER_RESET_SECONDS = config("CIRCUIT_BREAKER_RESET_SECONDS", default=30.0, cast=float)
+# Most order notification fan-outs (SMS + email) in flight at once per ASGI worker (api.views.place_order)
+NOTIFICATION_CONCURRENCY = config("NOTIFICATION_CONCURRENCY", default=100, cast=int)
+# Most fan-outs pending per worker; beyond that the request sends its notifications inline.
+NOTIFICATION_BACKLOG = config("NOTIFICATION_BACKLOG", default=1000, cast=int)
+# Seconds a stopping ASGI worker waits for pending fan-outs (keep below gunicorn's graceful timeout, 30).
+NOTIFICATION_SHUTDOWN_TIMEOUT = config("NOTIFICATION_SHUTDOWN_TIMEOUT", default=20.0, cast=float)
+# Delivery report callbacks (api.sms_log): shared secret expected as ?token= (required unless
+# DEBUG; without it callbacks are refused with 503), and how buffered reports are written: per
+# SMS_DLR_BATCH_SIZE messages or every SMS_DLR_FLUSH_SECONDS, giving up on unknown message ids
+# after SMS_DLR_MAX_ATTEMPTS flushes that matched no row (a failed write does not count).
+SMS_CALLBACK_TOKEN = config("SMS_CALLBACK_TOKEN", default="")
+SMS_DLR_BATCH_SIZE = config("SMS_DLR_BATCH_SIZE", default=500, cast=int)
+SMS_DLR_FLUSH_SECONDS = config("SMS_DLR_FLUSH_SECONDS", default=1.0, cast=float)
+SMS_DLR_MAX_ATTEMPTS = config("SMS_DLR_MAX_ATTEMPTS", default=5, cast=int)
 ADMIN_EMAIL = config("ADMIN_EMAIL", default="stephenowin233@gmail.com")
 EMAIL_BACKEND = config("EMAIL_BACKEND", default="django.core.mail.backends.console.EmailBackend")
 
@@ -147,17 +274,10 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # --- OIDC AUTH CONFIG (mozilla-django-oidc) ---
 
-logger = logging.getLogger(__name__)
-
 OIDC_OP_DOMAIN = config("OIDC_OP_DOMAIN", default="dev-u7tcvwcdk05v8p33.us.auth0.com")
 OIDC_RP_CLIENT_ID = config("OIDC_RP_CLIENT_ID")
 OIDC_RP_CLIENT_SECRET = config("OIDC_RP_CLIENT_SECRET")
 
-logger.info(f"OIDC_OP_DOMAIN: {OIDC_OP_DOMAIN}")
-logger.info(f"OIDC_OP_AUTHORIZATION_ENDPOINT: https://{OIDC_OP_DOMAIN}/authorize")
-logger.info(f"OIDC_OP_TOKEN_ENDPOINT: https://{OIDC_OP_DOMAIN}/oauth/token")
-logger.info(f"OIDC_OP_JWKS_ENDPOINT: https://{OIDC_OP_DOMAIN}/.well-known/jwks.json")
-
 # Core OIDC endpoints
 OIDC_OP_AUTHORIZATION_ENDPOINT = f"https://{OIDC_OP_DOMAIN}/authorize"
 OIDC_OP_TOKEN_ENDPOINT = f"https://{OIDC_OP_DOMAIN}/oauth/token"
@@ -8,6 +8,8 @@ from django.http import JsonResponse
 from django.urls import include, path
 
 # Local application imports
+from api.metrics import metrics_view
+
 logger = logging.getLogger(__name__)
 
 
@@ -65,7 +67,8 @@ def api_root(request):
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
-    path("oidc/", include("mozilla_django_oidc.urls")),
+    path("oidc/", include("api.oidc_urls")),
+    path("metrics", metrics_view, name="metrics"),
     path("", api_root, name="api-root"),
     path("api/landing/", api_landing, name="api-landing"),
 ]
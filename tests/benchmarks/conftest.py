@@ -0,0 +1,121 @@
+"""
+Large seeded dataset for the endpoint benchmarks.
+
+Sizes come from environment variables so the suite can be scaled down for a quick
+local run. The data is committed into the test database, so with --reuse-db it is
+seeded once and reused by later runs.
+"""
+
+import os
+import random
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+
+from api.models import Category, Customer, Order, OrderItem, Product
+
+SEED_PREFIX = "bench-"
+BATCH_SIZE = 5000
+
+
+@pytest.fixture(autouse=True)
+def unthrottled(settings):
+    """Benchmarks replay each endpoint far faster than the production throttle rates allow."""
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}}
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def benchmark_sizes():
+    return {
+        "products": _env_int("BENCH_PRODUCTS", 100_000),
+        "order_items": _env_int("BENCH_ORDER_ITEMS", 1_000_000),
+        "category_roots": _env_int("BENCH_CATEGORY_ROOTS", 4),
+        "category_depth": _env_int("BENCH_CATEGORY_DEPTH", 7),
+        "customers": _env_int("BENCH_CUSTOMERS", 1000),
+        "items_per_order": 4,
+    }
+
+
+def _seed_categories(roots, depth):
+    """Binary trees `depth` levels deep under each root, created level by level."""
+    level = Category.objects.bulk_create([Category(name=f"{SEED_PREFIX}{root}") for root in range(roots)])
+    all_categories = list(level)
+    for _ in range(depth - 1):
+        children = [Category(name=f"{parent.name}.{branch}", parent=parent) for parent in level for branch in range(2)]
+        level = Category.objects.bulk_create(children, batch_size=BATCH_SIZE)
+        all_categories.extend(level)
+    return all_categories
+
+
+def _seed(sizes):
+    rng = random.Random(42)
+    categories = _seed_categories(sizes["category_roots"], sizes["category_depth"])
+
+    Product.objects.bulk_create(
+        (
+            Product(
+                name=f"{SEED_PREFIX}product {i:06d}",
+                description=f"Seeded product {i} for endpoint benchmarks, durable and well reviewed.",
+                price=Decimal(rng.randint(100, 500_000)) / 100,
+                category=categories[i % len(categories)],
+                stock=1_000_000,
+            )
+            for i in range(sizes["products"])
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    prices = dict(Product.objects.filter(name__startswith=SEED_PREFIX).values_list("id", "price"))
+    product_ids = list(prices)
+
+    # bulk_create skips the post_save signal, so customers are created explicitly.
+    users = User.objects.bulk_create(
+        [User(username=f"{SEED_PREFIX}user{i}", email=f"user{i}@bench.test") for i in range(sizes["customers"])],
+        batch_size=BATCH_SIZE,
+    )
+    customers = Customer.objects.bulk_create(
+        [Customer(user=user, phone_number="+254700000000", address="Bench Street") for user in users],
+        batch_size=BATCH_SIZE,
+    )
+
+    per_order = sizes["items_per_order"]
+    order_count = sizes["order_items"] // per_order
+    for start in range(0, order_count, BATCH_SIZE):
+        orders = Order.objects.bulk_create(
+            [Order(customer=customers[i % len(customers)]) for i in range(start, min(start + BATCH_SIZE, order_count))]
+        )
+        items = [
+            OrderItem(
+                order=order,
+                product_id=product_id,
+                quantity=rng.randint(1, 5),
+                created_at=order.created_at,
+                unit_price=prices[product_id],
+            )
+            for order in orders
+            for product_id in rng.sample(product_ids, per_order)
+        ]
+        OrderItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+    return categories[0], customers[0]
+
+
+@pytest.fixture(scope="session")
+def benchmark_dataset(django_db_setup, django_db_blocker):
+    """Seed (or reuse) the benchmark dataset and return handles used by the benchmarks."""
+    sizes = benchmark_sizes()
+    with django_db_blocker.unblock():
+        root = Category.objects.filter(name=f"{SEED_PREFIX}0").first()
+        if root is None:
+            root, customer = _seed(sizes)
+        else:
+            customer = Customer.objects.get(user__username=f"{SEED_PREFIX}user0")
+        yield {
+            "sizes": sizes,
+            "root_category": root,
+            "customer": customer,
+            "product": Product.objects.filter(name__startswith=SEED_PREFIX).order_by("id").first(),
+            "order": Order.objects.filter(customer=customer).order_by("id").first(),
+        }
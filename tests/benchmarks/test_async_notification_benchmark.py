@@ -0,0 +1,96 @@
+"""
+Order notifications: serial SMS then email in POST /api/orders/ vs the concurrent fan-out of
+POST /api/orders/place/ under ASGI.
+
+Both paths talk to local stub servers (api.services.sms_stub, api.services.smtp_stub) that
+take BENCH_NOTIFY_LATENCY_MS to accept each message. For every order it measures the response
+time and the end-to-end notification latency (request start until both messages were accepted).
+
+Run with: ./runtests.sh tests/benchmarks/test_async_notification_benchmark.py --runbenchmarks -s
+
+Environment:
+    BENCH_NOTIFY_ORDERS       orders per path (default 20)
+    BENCH_NOTIFY_LATENCY_MS   stub latency per message (default 200)
+"""
+
+import os
+import statistics
+import time
+from decimal import Decimal
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api import notifications
+from api.services.sms_stub import StubSMSGateway
+from api.services.smtp_stub import StubSMTPServer
+from tests.factories import CustomerFactory, ProductFactory
+
+ORDERS = int(os.environ.get("BENCH_NOTIFY_ORDERS", 20))
+LATENCY = int(os.environ.get("BENCH_NOTIFY_LATENCY_MS", 200)) / 1000
+
+
+def _summary(label, responses, notified):
+    return (
+        f"{label}: response p50 {statistics.median(responses) * 1000:.0f} ms, "
+        f"notifications done p50 {statistics.median(notified) * 1000:.0f} ms"
+    )
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_fan_out_vs_serial_notifications():
+    customer = CustomerFactory(phone_number="+254700000049")
+    product = ProductFactory(price=Decimal("10.00"), stock=ORDERS * 2)
+    body = {"products": [{"product_id": product.id, "quantity": 1}]}
+    token = Token.objects.create(user=customer.user)
+
+    with StubSMSGateway(latency=LATENCY) as gateway, StubSMTPServer(latency=LATENCY) as smtp:
+        with override_settings(
+            AFRICASTALKING_API_KEY="stub-key",
+            AFRICASTALKING_API_URL=gateway.url,
+            AFRICASTALKING_SENDER_ID="",
+            EMAIL_BACKEND=notifications.SMTP_BACKEND,
+            EMAIL_HOST=smtp.host,
+            EMAIL_PORT=smtp.port,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+        ):
+            client = APIClient()
+            client.force_authenticate(customer.user)
+            serial = []
+            for _ in range(ORDERS):
+                start = time.perf_counter()
+                assert client.post("/api/orders/", body, format="json").status_code == 201
+                serial.append(time.perf_counter() - start)  # notifications are done when it responds
+
+            async def place_orders():
+                async_client = AsyncClient()
+                responses, notified = [], []
+                for _ in range(ORDERS):
+                    start = time.perf_counter()
+                    response = await async_client.post(
+                        "/api/orders/place/",
+                        body,
+                        content_type="application/json",
+                        headers={"Authorization": f"Token {token.key}"},
+                    )
+                    responses.append(time.perf_counter() - start)
+                    assert response.status_code == 201
+                    await notifications.drain()
+                    notified.append(time.perf_counter() - start)
+                return responses, notified
+
+            responses, notified = async_to_sync(place_orders)()
+
+    assert len(gateway.sent) == len(smtp.messages) == ORDERS * 2
+    print(f"\n{ORDERS} orders, providers take {LATENCY * 1000:.0f} ms per message")
+    print(_summary("serial (WSGI)      ", serial, serial))
+    print(_summary("fan-out (ASGI)     ", responses, notified))
+    assert statistics.median(notified) < statistics.median(serial)
+    assert statistics.median(responses) < LATENCY
@@ -0,0 +1,82 @@
+"""
+Orders per second on one hot product: single stock row vs sharded stock buckets.
+
+Each worker process (like a gunicorn worker) places orders for the same product through
+inventory.take() in its own transactions, the same statements the order API issues for
+the stock change. Processes rather than threads, so the GIL does not cap throughput.
+
+Run with: ./runtests.sh tests/benchmarks/test_hot_product_benchmark.py --runbenchmarks -s
+
+Environment:
+    BENCH_HOT_WORKERS   concurrent order writers (default 16)
+    BENCH_HOT_ORDERS    orders per writer (default 50)
+    BENCH_HOT_SHARDS    buckets in sharded mode (default 8)
+    BENCH_HOT_HOLD_MS   rest of the order transaction after the stock change (default 10)
+"""
+
+import multiprocessing
+import os
+import time
+from decimal import Decimal
+
+import pytest
+from django.db import connection, connections, transaction
+
+from api import inventory
+from api.models import Category, Customer, Order, OrderItem, Product
+
+# Time each order keeps its stock row locked after the decrement: the remaining statements
+# and client round trips of the order transaction (items, totals, rollups, idempotency key).
+HOLD_SECONDS = int(os.environ.get("BENCH_HOT_HOLD_MS", 10)) / 1000
+
+
+def _place_orders(product_id, customer_id, orders):
+    product = Product.objects.get(pk=product_id)
+    for _ in range(orders):
+        with transaction.atomic():
+            order = Order.objects.create(customer_id=customer_id)
+            inventory.take(product, 1)
+            time.sleep(HOLD_SECONDS)
+            OrderItem.objects.create(order=order, product=product, quantity=1)
+    connection.close()
+
+
+def _orders_per_second(product, customer, workers, orders):
+    connections.close_all()  # forked workers open their own connections
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_place_orders, args=(product.pk, customer.pk, orders)) for _ in range(workers)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+    assert all(process.exitcode == 0 for process in processes)
+    return workers * orders / elapsed
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+def test_hot_product_order_throughput(django_user_model):
+    workers = int(os.environ.get("BENCH_HOT_WORKERS", 16))
+    orders = int(os.environ.get("BENCH_HOT_ORDERS", 50))
+    shards = int(os.environ.get("BENCH_HOT_SHARDS", 8))
+    total = workers * orders
+
+    category = Category.objects.create(name="Flash sale")
+    customer = Customer.objects.get(user=django_user_model.objects.create(username="flash-buyer"))
+    single = Product.objects.create(name="Hot single", description="", price=Decimal("10"), category=category, stock=total)
+    sharded = Product.objects.create(name="Hot sharded", description="", price=Decimal("10"), category=category, stock=total)
+    inventory.set_shards(sharded, shards)
+    sharded.refresh_from_db()
+
+    single_rate = _orders_per_second(single, customer, workers, orders)
+    sharded_rate = _orders_per_second(sharded, customer, workers, orders)
+    print(
+        f"\n{workers} writers x {orders} orders on one product: single row {single_rate:.0f} orders/s, "
+        f"{shards} buckets {sharded_rate:.0f} orders/s ({sharded_rate / single_rate:.1f}x)"
+    )
+
+    assert Product.objects.get(pk=single.pk).available_stock == 0
+    assert Product.objects.get(pk=sharded.pk).available_stock == 0
+    assert sharded_rate > single_rate
@@ -0,0 +1,56 @@
+"""
+Product list: DRF ProductSerializer path vs the values_list()/orjson fast path.
+
+Run with: ./runtests.sh tests/benchmarks/test_product_list_benchmark.py --runbenchmarks -s
+"""
+
+import time
+from decimal import Decimal
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from api import inventory
+from api.models import Category, Product
+from api.renderers import render_json
+from api.serializers import ProductSerializer, product_list_data
+
+ROWS = 10_000
+ROUNDS = 5
+
+
+def _best_of(func):
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        body = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), body
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_product_list_fast_path_vs_serializer():
+    categories = Category.objects.bulk_create([Category(name=f"Bench category {i}") for i in range(50)])
+    Product.objects.bulk_create(
+        Product(
+            name=f"Bench product {i:05d}",
+            description=f"Description for product {i} — durable, imported, ünïcode.",
+            price=Decimal(i % 5000) + Decimal("0.99"),
+            category=categories[i % len(categories)],
+            stock=i % 100,
+        )
+        for i in range(ROWS)
+    )
+    # Annotated like ProductViewSet.get_queryset, so neither path looks up cart holds per row
+    queryset = Product.objects.select_related("category").annotate(available=inventory.available_stock()).order_by("name")
+
+    serializer_time, serializer_body = _best_of(lambda: JSONRenderer().render(ProductSerializer(queryset.all(), many=True).data))
+    fast_time, fast_body = _best_of(lambda: render_json(product_list_data(queryset.all())))
+
+    print(
+        f"\n{ROWS} products: serializer {serializer_time * 1000:.1f} ms, "
+        f"fast path {fast_time * 1000:.1f} ms ({serializer_time / fast_time:.1f}x)"
+    )
+    assert fast_body == serializer_body
+    assert fast_time < serializer_time
@@ -0,0 +1,45 @@
+"""
+SMS delivery report callbacks: buffered, batched UPDATEs vs one UPDATE per callback.
+
+Each callback goes through the full middleware stack (Django test client, no network), and
+every UPDATE commits as it would in production.
+Run with: ./runtests.sh tests/benchmarks/test_sms_delivery_report_benchmark.py --runbenchmarks -s
+"""
+
+import time
+
+import pytest
+from django.test import Client, override_settings
+
+from api import sms_log
+from api.models import SMSMessage
+
+MESSAGES = 2_000
+DLR_URL = "/api/sms/delivery-reports/?token=bench"
+
+
+def _deliver(client, status):
+    start = time.perf_counter()
+    for i in range(MESSAGES):
+        client.post(DLR_URL, {"id": f"ATXid_bench_{i}", "status": status})
+    sms_log.reports.flush()
+    return MESSAGES / (time.perf_counter() - start)
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+@override_settings(SMS_DLR_FLUSH_SECONDS=0, SMS_CALLBACK_TOKEN="bench")
+def test_buffered_delivery_reports_vs_per_callback_updates():
+    SMSMessage.objects.bulk_create(
+        SMSMessage(recipient="+254700000000", message="bench", message_id=f"ATXid_bench_{i}", status="Sent")
+        for i in range(MESSAGES)
+    )
+    client = Client()
+    with override_settings(SMS_DLR_BATCH_SIZE=1):
+        unbuffered = _deliver(client, "Submitted")
+    with override_settings(SMS_DLR_BATCH_SIZE=500):
+        buffered = _deliver(client, "Success")
+
+    print(f"\n{MESSAGES} callbacks: one UPDATE each {unbuffered:.0f}/s, batched {buffered:.0f}/s ({buffered / unbuffered:.1f}x)")
+    assert SMSMessage.objects.filter(status="Success").count() == MESSAGES
+    assert buffered > unbuffered
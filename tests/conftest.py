@@ -6,11 +6,16 @@ from typing import Any, Callable, Dict
 
 import pytest
 from django.contrib.auth.models import User
+from django.db import connection
 from playwright.sync_api import APIRequestContext, Playwright
 from pytest_django.live_server_helper import LiveServer
 from rest_framework.authtoken.models import Token
 
+from api import category_tree
 from api.models import Category, Customer, Product
+from api.notifications import smtp_breaker
+from api.services.sms_service import sms_breaker
+from api.throttling import local_buckets
 
 os.environ.setdefault("DJANGO_ALLOW_ASYNC_UNSAFE", "true")
 
@@ -21,6 +26,7 @@ def pytest_addoption(parser):
     """Add custom pytest command line options."""
     parser.addoption("--e2e", action="store_true", default=False, help="Enable when running end-to-end tests.")
     parser.addoption("--runplaywright", action="store_true", default=False, help="Run playwright tests")
+    parser.addoption("--runbenchmarks", action="store_true", default=False, help="Run benchmark tests")
 
 
 def pytest_configure(config):
@@ -28,21 +34,49 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "playwright: mark test as playwright test")
     config.addinivalue_line("markers", "api: mark test as API test")
     config.addinivalue_line("markers", "order: mark test as order-related test")
+    config.addinivalue_line("markers", "benchmark: mark test as benchmark (needs --runbenchmarks)")
 
 
 def pytest_collection_modifyitems(config, items):
-    """Skip Playwright tests if --runplaywright option is not given."""
-    if config.getoption("--runplaywright"):
-        return
+    """Skip Playwright and benchmark tests unless their command line option is given."""
     skip_playwright = pytest.mark.skip(reason="need --runplaywright option to run")
+    skip_benchmark = pytest.mark.skip(reason="need --runbenchmarks option to run")
     for item in items:
-        if "playwright" in item.keywords:
+        if "playwright" in item.keywords and not config.getoption("--runplaywright"):
             item.add_marker(skip_playwright)
+        if "benchmark" in item.keywords and not config.getoption("--runbenchmarks"):
+            item.add_marker(skip_benchmark)
 
 
 # ----------------- Core Test Infrastructure Fixtures -----------------
 
 
+@pytest.fixture(autouse=True)
+def reset_throttle_buckets():
+    """Start every test with full in-process throttle buckets."""
+    local_buckets.clear()
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker):
+    """Test databases are built without migrations; add the trigger migration 0012 creates."""
+    with django_db_blocker.unblock():
+        category_tree.install_version_trigger(connection)
+
+
+@pytest.fixture(autouse=True)
+def reset_category_tree_cache():
+    """Tests roll back category writes, so a version number can come back with other categories."""
+    category_tree.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breakers():
+    """Start every test with the notification providers' circuit breakers closed."""
+    sms_breaker.reset()
+    smtp_breaker.reset()
+
+
 @pytest.fixture(scope="session")
 def browser_context_args(browser_context_args: dict) -> dict:
     """Configure browser context arguments for testing."""
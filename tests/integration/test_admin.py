@@ -0,0 +1,83 @@
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Order, OrderItem
+from tests.factories import CustomerFactory, ProductFactory
+
+
+@pytest.fixture
+def orders():
+    product = ProductFactory(price=Decimal("12.50"))
+    customers = [CustomerFactory(phone_number=f"+25470000010{i}") for i in range(3)]
+    created = []
+    for i in range(9):
+        order = Order.objects.create(customer=customers[i % 3], total_amount=Decimal("25.00"))
+        OrderItem.objects.create(order=order, product=product, quantity=2)
+        created.append(order)
+    return created
+
+
+def _changelist(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response, [q["sql"] for q in ctx.captured_queries]
+
+
+@pytest.mark.django_db
+def test_order_changelist_uses_estimated_count_and_joins_customers(admin_client, orders):
+    with mock.patch("api.admin.estimated_rows", return_value=2_000_000) as estimate:
+        response, queries = _changelist(admin_client, "/admin/api/order/")
+    estimate.assert_called_once_with("api_order", "default")
+    assert response.context["cl"].result_count == 2_000_000
+    order_queries = [q for q in queries if '"api_order"' in q]
+    assert not any("COUNT(" in q for q in order_queries)
+    # One query for the page of orders, customers and usernames included
+    assert len(order_queries) == 1
+
+    # More orders, same number of queries
+    Order.objects.create(customer=orders[0].customer)
+    with mock.patch("api.admin.estimated_rows", return_value=2_000_000):
+        assert len(_changelist(admin_client, "/admin/api/order/")[1]) == len(queries)
+
+
+@pytest.mark.django_db
+def test_small_or_filtered_changelists_are_counted_exactly(admin_client, orders):
+    customer = orders[0].customer
+    with mock.patch("api.admin.estimated_rows", return_value=50):
+        response, _ = _changelist(admin_client, "/admin/api/order/")
+    assert response.context["cl"].result_count == 9
+
+    with mock.patch("api.admin.estimated_rows", return_value=2_000_000) as estimate:
+        response, _ = _changelist(admin_client, f"/admin/api/order/?customer__id__exact={customer.pk}")
+    estimate.assert_not_called()
+    assert response.context["cl"].result_count == 3
+    # The filter renders a select2 autocomplete holding only the selected customer
+    content = response.content.decode()
+    assert 'data-ajax--url="/admin/autocomplete/"' in content
+    assert f'<option value="{customer.pk}" selected>{customer.user.username}</option>' in content
+
+    response = admin_client.get("/admin/api/order/?customer__id__exact=abc")
+    assert response.status_code == 302
+    assert response["Location"].endswith("?e=1")
+
+
+@pytest.mark.django_db
+def test_order_item_changelist_computes_subtotals_in_sql(admin_client, orders):
+    response, queries = _changelist(admin_client, "/admin/api/orderitem/?o=4")
+    items = list(response.context["cl"].result_list)
+    assert [item.line_total for item in items] == [Decimal("25.00")] * 9
+    assert "25.00" in response.content.decode()
+    assert len([q for q in queries if '"api_orderitem"' in q]) == 2  # count + page
+    assert not any(q.startswith('SELECT "api_product"') for q in queries)
+
+
+@pytest.mark.django_db
+def test_order_change_page_loads_items_with_their_products(admin_client, orders):
+    _, queries = _changelist(admin_client, f"/admin/api/order/{orders[0].pk}/change/")
+    (items_query,) = [q for q in queries if 'FROM "api_orderitem"' in q]
+    assert 'JOIN "api_product"' in items_query
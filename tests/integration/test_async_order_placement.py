@@ -0,0 +1,151 @@
+import logging
+import time
+from decimal import Decimal
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api import notifications
+from api.models import Order, SMSMessage
+from api.services.sms_stub import StubSMSGateway
+from api.services.smtp_stub import StubSMTPServer
+from savannah_assess import asgi
+from tests.factories import CustomerFactory, ProductFactory
+
+PLACE_URL = "/api/orders/place/"
+
+
+@pytest.fixture
+def providers():
+    """Stub SMS and SMTP servers, each taking 0.3 s to accept a message."""
+    with StubSMSGateway(latency=0.3) as gateway, StubSMTPServer(latency=0.3) as smtp:
+        with override_settings(
+            AFRICASTALKING_API_KEY="stub-key",
+            AFRICASTALKING_API_URL=gateway.url,
+            AFRICASTALKING_SENDER_ID="",
+            EMAIL_BACKEND=notifications.SMTP_BACKEND,
+            EMAIL_HOST=smtp.host,
+            EMAIL_PORT=smtp.port,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+        ):
+            yield gateway, smtp
+
+
+@pytest.fixture
+def customer():
+    return CustomerFactory(phone_number="+254700000049")
+
+
+def _body(quantity=2):
+    product = ProductFactory(name="Tea", price=Decimal("100.00"), stock=5)
+    return {"products": [{"product_id": product.id, "quantity": quantity}]}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_place_order_under_wsgi_sends_notifications_concurrently_before_responding(providers, customer):
+    gateway, smtp = providers
+    client = APIClient()
+    client.force_authenticate(customer.user)
+
+    start = time.monotonic()
+    response = client.post(PLACE_URL, _body(), format="json")
+    elapsed = time.monotonic() - start
+
+    assert response.status_code == 201
+    assert response.json()["total_amount"] == "200.00"
+    assert len(gateway.sent) == len(smtp.messages) == 1
+    assert elapsed < 0.55  # both providers' 0.3 s at once, not one after the other
+    assert SMSMessage.objects.get().order_id == response.json()["id"]
+
+    assert client.post(PLACE_URL, _body(quantity=50), format="json").status_code == 400
+    assert len(gateway.sent) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_place_order_under_asgi_responds_at_commit(providers, customer):
+    gateway, smtp = providers
+    token = Token.objects.create(user=customer.user)
+    body = _body()
+
+    async def place():
+        start = time.monotonic()
+        response = await AsyncClient().post(
+            PLACE_URL, body, content_type="application/json", headers={"Authorization": f"Token {token.key}"}
+        )
+        elapsed, sent_at_response = time.monotonic() - start, (len(gateway.sent), len(smtp.messages))
+        await notifications.drain()
+        return response, elapsed, sent_at_response
+
+    response, elapsed, sent_at_response = async_to_sync(place)()
+
+    assert response.status_code == 201
+    assert elapsed < 0.3
+    assert sent_at_response == (0, 0)
+    assert len(gateway.sent) == len(smtp.messages) == 1
+    order = Order.objects.get()
+    assert response.json()["id"] == order.pk
+    assert SMSMessage.objects.get().order_id == order.pk
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(NOTIFICATION_BACKLOG=0)
+def test_full_backlog_sends_inline(providers, customer):
+    gateway, smtp = providers
+    token = Token.objects.create(user=customer.user)
+    body = _body()
+
+    async def place():
+        response = await AsyncClient().post(
+            PLACE_URL, body, content_type="application/json", headers={"Authorization": f"Token {token.key}"}
+        )
+        return response, (len(gateway.sent), len(smtp.messages))
+
+    response, sent_at_response = async_to_sync(place)()
+    assert response.status_code == 201
+    assert sent_at_response == (1, 1)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_lifespan_shutdown_drains_then_logs_undelivered(providers, customer, caplog):
+    gateway, smtp = providers
+    orders = [Order.objects.create(customer=customer) for _ in range(2)]
+
+    async def lifespan_shutdown(timeout):
+        messages = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+        sent = []
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        with override_settings(NOTIFICATION_SHUTDOWN_TIMEOUT=timeout):
+            await asgi.application({"type": "lifespan"}, receive, send)
+        return sent
+
+    async def run():
+        notifications.dispatch_order_notifications(notifications.order_notification(orders[0]))
+        delivered = await lifespan_shutdown(timeout=5)
+        sent_after_drain = len(gateway.sent)
+        notifications.dispatch_order_notifications(notifications.order_notification(orders[1]))
+        await lifespan_shutdown(timeout=0.05)
+        return delivered, sent_after_drain
+
+    logger = logging.getLogger("api.notifications")
+    logger.addHandler(caplog.handler)  # the "api" logger does not propagate to the root
+    try:
+        delivered, sent_after_drain = async_to_sync(run)()
+    finally:
+        logger.removeHandler(caplog.handler)
+    assert delivered == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    assert sent_after_drain == 1
+    assert len(gateway.sent) == 1
+    assert f"Notifications for order {orders[1].id} not delivered before shutdown" in caplog.text
+    assert not notifications._pending
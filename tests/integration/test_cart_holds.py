@@ -0,0 +1,97 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Order, StockHold
+from tests.factories import CustomerFactory, ProductFactory
+
+
+def _client(phone):
+    customer = CustomerFactory(phone_number=phone)
+    client = APIClient()
+    client.force_authenticate(customer.user)
+    return client, customer
+
+
+@pytest.fixture
+def lamp():
+    return ProductFactory(name="Lamp", price=Decimal("20.00"), stock=5)
+
+
+def _hold(client, product, quantity):
+    return client.post("/api/cart/", {"products": [{"product_id": product.id, "quantity": quantity}]}, format="json")
+
+
+@pytest.mark.django_db
+def test_hold_reduces_available_stock_for_everyone_else(lamp):
+    alice, _ = _client("+254700000011")
+    bob, _ = _client("+254700000012")
+
+    response = _hold(alice, lamp, 4)
+    assert response.status_code == 201
+    assert response.json()[0]["quantity"] == 4
+
+    detail = bob.get(f"/api/products/{lamp.id}/").json()
+    assert (detail["stock"], detail["available"]) == (5, 1)
+    listed = {p["id"]: (p["stock"], p["available"]) for p in bob.get("/api/products/").json()}
+    assert listed[lamp.id] == (5, 1)
+    # Writing back what was read keeps the held units in stock
+    assert bob.put(f"/api/products/{lamp.id}/", detail, format="json").status_code == 200
+    lamp.refresh_from_db()
+    assert lamp.stock == 5
+    assert _hold(bob, lamp, 2).status_code == 400
+    with mock.patch("api.views.notifications"):
+        order = bob.post("/api/orders/", {"products": [{"product_id": lamp.id, "quantity": 2}]}, format="json")
+    assert order.status_code == 400
+
+    # Replacing the cart frees the previous holds
+    assert _hold(alice, lamp, 1).status_code == 201
+    assert bob.get(f"/api/products/{lamp.id}/").json()["available"] == 4
+
+
+@pytest.mark.django_db
+def test_checkout_converts_holds_to_order(lamp):
+    alice, customer = _client("+254700000013")
+    _hold(alice, lamp, 3)
+
+    with mock.patch("api.views.notifications") as notifications:
+        response = alice.post("/api/cart/checkout/")
+    assert response.status_code == 201
+    assert response.json()["total_amount"] == "60.00"
+    notifications.send_order_confirmation_sms.assert_called_once()
+
+    lamp.refresh_from_db()
+    assert lamp.stock == 2
+    assert not StockHold.objects.filter(customer=customer).exists()
+    assert alice.post("/api/cart/checkout/").status_code == 409
+
+
+@pytest.mark.django_db
+def test_expired_holds_stop_counting_and_are_swept(lamp):
+    alice, customer = _client("+254700000014")
+    _hold(alice, lamp, 5)
+    StockHold.objects.filter(customer=customer).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    assert lamp.available_stock == 5
+    assert lamp.id in [p["id"] for p in alice.get("/api/products/", {"in_stock": "true"}).json()]
+    assert alice.post("/api/cart/checkout/").status_code == 409
+    assert Order.objects.filter(customer=customer).count() == 0
+
+    out = StringIO()
+    call_command("release_expired_holds", "--batch-size", "1", stdout=out)
+    assert "Released 1 expired cart hold(s)" in out.getvalue()
+    assert not StockHold.objects.exists()
+
+
+@pytest.mark.django_db
+def test_in_stock_filter_skips_fully_held_products(lamp):
+    alice, _ = _client("+254700000015")
+    _hold(alice, lamp, 5)
+    ids = [p["id"] for p in APIClient().get("/api/products/", {"in_stock": "true"}).json()]
+    assert lamp.id not in ids
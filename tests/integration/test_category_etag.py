@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api import category_tree
+from api.models import Category
+from api.serializers import CategorySerializer
+from tests.factories import CustomerFactory
+
+URL = "/api/categories/"
+
+
+@pytest.fixture
+def tree():
+    root = Category.objects.create(name="Produce")
+    Category.objects.create(name="Fruit", parent=root)
+    return root
+
+
+@pytest.mark.django_db
+@override_settings(CATEGORY_TREE_VERSION_TTL=60)
+def test_tree_carries_strong_etag_and_matching_requests_get_304_without_queries(client, tree, django_assert_num_queries):
+    first = client.get(URL)
+    assert first.status_code == 200
+    etag = first["ETag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert json.loads(first.content) == json.loads(
+        json.dumps(CategorySerializer(Category.objects.order_by("name"), many=True).data)
+    )
+
+    with django_assert_num_queries(0):
+        not_modified = client.get(URL, HTTP_IF_NONE_MATCH=etag)
+        repeat = client.get(URL)
+        other = client.get(URL, HTTP_IF_NONE_MATCH='"0-stale"')
+    assert not_modified.status_code == 304
+    assert not_modified["ETag"] == etag
+    assert not_modified.content == b""
+    assert repeat.content == first.content and repeat["ETag"] == etag
+    assert other.status_code == 200
+
+
+@pytest.mark.django_db
+def test_detail_renders_the_subtree_in_a_fixed_number_of_queries(client, tree, django_assert_num_queries):
+    fruit = Category.objects.get(name="Fruit")
+    berries = Category.objects.create(name="Berries", parent=fruit)
+    Category.objects.create(name="Apples", parent=fruit)
+    Category.objects.create(name="Strawberries", parent=berries)
+    Category.objects.create(name="Bakery")
+
+    with django_assert_num_queries(3):
+        response = client.get(f"{URL}{tree.id}/")
+    assert response.json() == json.loads(json.dumps(CategorySerializer(tree).data))
+    assert [child["name"] for child in response.json()["children"][0]["children"]] == ["Berries", "Apples"]
+
+
+@pytest.mark.django_db
+@override_settings(CATEGORY_TREE_VERSION_TTL=60)
+def test_writes_through_the_api_change_the_etag_at_once(client, tree, django_capture_on_commit_callbacks):
+    etag = client.get(URL)["ETag"]
+    api = APIClient()
+    api.force_authenticate(CustomerFactory(phone_number="+254700000050").user)
+    with django_capture_on_commit_callbacks(execute=True):
+        assert api.post(URL, {"name": "Dairy"}, format="json").status_code == 201
+
+    response = client.get(URL, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert "Dairy" in {category["name"] for category in response.json()}
+
+
+@pytest.mark.django_db
+@override_settings(CATEGORY_TREE_VERSION_TTL=0)
+def test_bulk_writes_bump_the_version_through_the_trigger(client, tree):
+    etag = client.get(URL)["ETag"]
+    Category.objects.filter(pk=tree.pk).update(name="Fresh produce")  # no signals
+
+    response = client.get(URL, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert "Fresh produce" in {category["name"] for category in response.json()}
+
+
+def test_concurrent_requests_for_a_new_version_render_it_once():
+    renders, started = [], threading.Event()
+
+    def render():
+        renders.append(1)
+        started.set()
+        time.sleep(0.2)
+        return b"[]"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(category_tree.get_or_render, 7, render)
+        assert started.wait(5)
+        results = [first] + [pool.submit(category_tree.get_or_render, 7, render) for _ in range(3)]
+        bodies = {future.result() for future in results}
+
+    assert len(renders) == 1
+    assert len(bodies) == 1
+    assert not category_tree._rendering
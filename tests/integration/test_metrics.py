@@ -0,0 +1,90 @@
+import subprocess
+import sys
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from django.test import Client, RequestFactory
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+from api.metrics import metrics_view
+from api.models import Product
+from tests.factories import CustomerFactory, ProductFactory
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+def test_request_latency_and_queries_are_exported():
+    ProductFactory()
+    Client().get("/api/products/")
+
+    body = Client().get("/metrics").content.decode()
+    assert 'http_request_duration_seconds_count{method="GET",view="product-list"}' in body
+    assert 'http_request_db_queries_bucket{le="1.0",view="product-list"}' in body
+
+
+@pytest.mark.django_db
+def test_stock_conflicts_and_created_orders_are_counted(django_capture_on_commit_callbacks):
+    customer = CustomerFactory(phone_number="+254700000004")
+    product = ProductFactory(stock=1)
+    client = APIClient()
+    client.force_authenticate(customer.user)
+    conflicts, created = _sample("order_stock_conflicts_total"), _sample("orders_created_total")
+
+    resp = client.post("/api/orders/", {"products": [{"product_id": product.id, "quantity": 5}]}, format="json")
+    assert resp.status_code == 400
+    with django_capture_on_commit_callbacks(execute=True):
+        resp = client.post("/api/orders/", {"products": [{"product_id": product.id, "quantity": 1}]}, format="json")
+    assert resp.status_code == 201
+
+    assert _sample("order_stock_conflicts_total") == conflicts + 1
+    assert _sample("orders_created_total") == created + 1
+    assert _sample("notification_send_duration_seconds_count", channel="email") > 0
+
+
+@pytest.mark.django_db
+def test_stock_lost_after_the_pre_check_is_counted_as_a_conflict():
+    customer = CustomerFactory(phone_number="+254700000042")
+    product = ProductFactory(stock=1)
+    client = APIClient()
+    client.force_authenticate(customer.user)
+    conflicts = _sample("order_stock_conflicts_total")
+
+    # Another order takes the stock between the pre-check and the serializer
+    with mock.patch.object(Product, "has_sufficient_stock", return_value=True):
+        resp = client.post("/api/orders/", {"products": [{"product_id": product.id, "quantity": 2}]}, format="json")
+    assert resp.status_code == 400
+
+    assert client.post("/api/cart/", {"products": [{"product_id": product.id, "quantity": 1}]}, format="json").status_code == 201
+    Product.objects.filter(pk=product.pk).update(stock=0)
+    assert client.post("/api/cart/checkout/").status_code == 409
+
+    assert _sample("order_stock_conflicts_total") == conflicts + 2
+
+
+def test_metrics_token(settings):
+    settings.METRICS_TOKEN = "s3cret"
+    assert metrics_view(RequestFactory().get("/metrics")).status_code == 401
+    resp = metrics_view(RequestFactory().get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret"))
+    assert resp.status_code == 200
+
+
+def test_multiprocess_mode_aggregates_workers(tmp_path, monkeypatch):
+    # Two separate "workers" each record one order into the shared directory.
+    for _ in range(2):
+        subprocess.run(
+            [sys.executable, "-c", "from api.metrics import ORDERS_CREATED; ORDERS_CREATED.inc()"],
+            cwd=REPO_ROOT,
+            env={"PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PATH": ""},
+            check=True,
+        )
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+
+    body = metrics_view(RequestFactory().get("/metrics")).content.decode()
+    assert "orders_created_total 2.0" in body
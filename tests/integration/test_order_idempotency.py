@@ -0,0 +1,74 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import IdempotencyKey, Order
+from tests.factories import CustomerFactory, ProductFactory
+
+
+@pytest.fixture
+def shop():
+    customer = CustomerFactory(phone_number="+254700000003")
+    client = APIClient()
+    client.force_authenticate(customer.user)
+    return client, customer, ProductFactory(name="Tea", price=Decimal("100.00"), stock=5)
+
+
+def _post(client, product, quantity, key):
+    return client.post(
+        "/api/orders/", {"products": [{"product_id": product.id, "quantity": quantity}]}, format="json", HTTP_IDEMPOTENCY_KEY=key
+    )
+
+
+@pytest.mark.django_db
+def test_retry_replays_first_response_without_side_effects(shop):
+    client, customer, tea = shop
+    with mock.patch("api.views.notifications") as notifications:
+        first = _post(client, tea, 2, "retry-1")
+        second = _post(client, tea, 2, "retry-1")
+
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json()
+    assert second["Idempotent-Replayed"] == "true"
+    assert Order.objects.filter(customer=customer).count() == 1
+    tea.refresh_from_db()
+    assert tea.stock == 3
+    notifications.send_order_confirmation_sms.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_reused_key_with_different_body_is_rejected(shop):
+    client, _, tea = shop
+    assert _post(client, tea, 1, "retry-2").status_code == 201
+    assert _post(client, tea, 2, "retry-2").status_code == 422
+
+
+@pytest.mark.django_db
+def test_failed_attempt_releases_key(shop):
+    client, _, tea = shop
+    assert _post(client, tea, 10, "retry-3").status_code == 400
+    assert not IdempotencyKey.objects.filter(key="retry-3").exists()
+    tea.stock = 20
+    tea.save()
+    assert _post(client, tea, 10, "retry-3").status_code == 201
+
+
+@pytest.mark.django_db
+def test_expired_keys_are_purged_in_batches(shop, settings):
+    client, customer, tea = shop
+    for key in ("old-1", "old-2", "old-3", "fresh"):
+        _post(client, tea, 1, key)
+    IdempotencyKey.objects.exclude(key="fresh").update(
+        created_at=timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL + 1)
+    )
+
+    out = StringIO()
+    call_command("purge_idempotency_keys", batch_size=2, stdout=out)
+    assert "Deleted 3" in out.getvalue()
+    assert list(IdempotencyKey.objects.values_list("key", flat=True)) == ["fresh"]
@@ -0,0 +1,121 @@
+import gzip
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from api import partitions
+from api.models import Order, OrderItem
+from tests.factories import CustomerFactory, ProductFactory
+
+
+def _order_at(customer, product, created_at):
+    order = Order.objects.create(customer=customer, total_amount=Decimal("10.00"))
+    Order.objects.filter(pk=order.pk).update(created_at=created_at)
+    order.refresh_from_db()
+    OrderItem.objects.create(order=order, product=product, quantity=1)
+    return order
+
+
+@pytest.fixture
+def history():
+    customer = CustomerFactory(phone_number="+254700000021")
+    product = ProductFactory(price=Decimal("10.00"))
+    now = timezone.now()
+    return {
+        "recent": _order_at(customer, product, now),
+        "last_quarter": _order_at(customer, product, now - timedelta(days=70)),
+        "old": _order_at(customer, product, now - timedelta(days=430)),
+    }
+
+
+def _archive(tmp_path, before):
+    out = StringIO()
+    call_command("archive_orders", "--before", before.isoformat(), "--output-dir", str(tmp_path), "--batch-size", "1", stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_partitioned_tables_route_prune_and_archive(history, tmp_path):
+    with connection.schema_editor() as editor:
+        partitions.partition_tables(editor)
+
+    old_month = partitions.month_start(history["old"].created_at.date())
+    assert partitions.partition_name("api_order", old_month) in partitions.monthly_partitions("api_order").values()
+    assert len(partitions.ensure_partitions(months_ahead=5)) == 4  # months 4 and 5 ahead, for both tables
+    assert partitions.ensure_partitions(months_ahead=5) == []
+
+    # A recent-orders query only scans the partitions of the months it can match
+    plan = Order.objects.filter(created_at__gte=timezone.now() - timedelta(days=30)).explain()
+    assert partitions.partition_name("api_order", old_month) not in plan
+
+    cutoff = partitions.month_start(timezone.localdate())
+    output = _archive(tmp_path, cutoff)
+    assert "Archived 2 order(s)" in output
+    assert list(Order.objects.values_list("id", flat=True)) == [history["recent"].id]
+    assert OrderItem.objects.count() == 1
+    assert old_month not in partitions.monthly_partitions("api_order")
+
+    with gzip.open(tmp_path / f"orders-{old_month:%Y-%m}.jsonl.gz", "rt") as archive:
+        (line,) = archive.readlines()
+    record = json.loads(line)
+    assert record["id"] == history["old"].id
+    assert record["items"][0]["quantity"] == 1
+
+
+@pytest.mark.django_db
+def test_archive_without_partitions_deletes_in_batches(history, tmp_path):
+    output = _archive(tmp_path, timezone.localdate() - timedelta(days=30))
+    assert "Archived 2 order(s)" in output
+    assert set(Order.objects.values_list("id", flat=True)) == {history["recent"].id}
+    assert OrderItem.objects.filter(order_id=history["recent"].id).count() == 1
+    assert OrderItem.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_recent_orders_filter(history):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(history["recent"].customer.user)
+    assert [o["id"] for o in client.get("/api/orders/", {"days": 30}).json()] == [history["recent"].id]
+    assert len(client.get("/api/orders/").json()) == 3
+    assert client.get("/api/orders/", {"days": "soon"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_order_list_query_count_does_not_grow_with_orders(history, django_assert_num_queries):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(history["recent"].customer.user)
+    with django_assert_num_queries(3):  # customer, orders (with user), items (with products)
+        orders = client.get("/api/orders/").json()
+    assert [item["product_name"] for order in orders for item in order["items"]] == [history["old"].items.get().product.name] * 3
+
+
+@pytest.mark.django_db
+def test_failed_partition_creation_keeps_rows_in_default(history):
+    with connection.schema_editor() as editor:
+        partitions.partition_tables(editor)
+    month = partitions.add_months(partitions.month_start(timezone.localdate()), 8)
+    start, end = partitions.month_bounds(month)
+    with connection.cursor() as cursor:  # an overlapping partition makes the ATTACH fail after the move
+        cursor.execute(
+            "CREATE TABLE api_order_overlap PARTITION OF api_order FOR VALUES FROM (%s) TO (%s)",
+            [start, start + timedelta(days=1)],
+        )
+    order = _order_at(CustomerFactory(phone_number="+254700000044"), ProductFactory(), start + timedelta(days=10))
+
+    with pytest.raises(Exception, match="overlap"):
+        partitions.create_partition("api_order", month)
+
+    assert partitions.partition_name("api_order", month) not in connection.introspection.table_names()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT id FROM api_order_default")
+        assert cursor.fetchall() == [(order.id,)]
@@ -0,0 +1,61 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from tests.factories import CategoryFactory, ProductFactory
+
+
+@pytest.fixture
+def tree():
+    root = CategoryFactory(name="Electronics")
+    phones = CategoryFactory(name="Phones", parent=root)
+    android = CategoryFactory(name="Android", parent=phones)
+    other = CategoryFactory(name="Garden")
+    return {
+        "root": root,
+        "root_product": ProductFactory(category=root, price=Decimal("50.00")),
+        "phone": ProductFactory(category=phones, price=Decimal("300.00")),
+        "android": ProductFactory(category=android, price=Decimal("150.00"), stock=0),
+        "garden": ProductFactory(category=other, price=Decimal("20.00")),
+    }
+
+
+def _ids(resp):
+    assert resp.status_code == 200, resp.content
+    return {product["id"] for product in resp.json()}
+
+
+@pytest.mark.django_db
+def test_category_filter_is_exact_by_default(tree):
+    resp = APIClient().get("/api/products/", {"category": tree["root"].id})
+    assert _ids(resp) == {tree["root_product"].id}
+
+
+@pytest.mark.django_db
+def test_include_descendants_covers_subtree_in_one_query(tree):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = APIClient().get("/api/products/", {"category": tree["root"].id, "include_descendants": "true"})
+    assert _ids(resp) == {tree["root_product"].id, tree["phone"].id, tree["android"].id}
+    assert len(ctx.captured_queries) == 1
+
+
+@pytest.mark.django_db
+def test_price_range_and_in_stock_filters(tree):
+    params = {"category": tree["root"].id, "include_descendants": "1", "min_price": "100", "max_price": "400"}
+    assert _ids(APIClient().get("/api/products/", params)) == {tree["phone"].id, tree["android"].id}
+    assert _ids(APIClient().get("/api/products/", {**params, "in_stock": "true"})) == {tree["phone"].id}
+
+
+@pytest.mark.django_db
+def test_invalid_filter_values_are_rejected(tree):
+    assert APIClient().get("/api/products/", {"category": "abc"}).status_code == 400
+    assert APIClient().get("/api/products/", {"min_price": "cheap"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_average_price_includes_descendants(tree):
+    resp = APIClient().get(f"/api/categories/{tree['root'].id}/average_price/")
+    assert resp.json()["average_price"] == pytest.approx(float((50 + 300 + 150) / 3))
@@ -0,0 +1,38 @@
+from decimal import Decimal
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.models import Product
+from api.serializers import ProductSerializer
+from tests.factories import CategoryFactory, ProductFactory
+
+
+def _serializer_bytes():
+    queryset = Product.objects.select_related("category").order_by("name")
+    return JSONRenderer().render(ProductSerializer(queryset, many=True).data)
+
+
+@pytest.mark.django_db
+def test_fast_list_is_byte_identical_to_serializer():
+    category = CategoryFactory(name='Vyakula   "Special"')
+    ProductFactory(name="Chai", description="Tea\n\t\\ with é and   and \x01", price=Decimal("1000"), category=category)
+    ProductFactory(name="Ugali", description="", price=Decimal("0.5"), stock=0)
+
+    resp = APIClient().get("/api/products/")
+
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "application/json"
+    assert resp.content == _serializer_bytes()
+
+
+@pytest.mark.django_db
+def test_browsable_and_indented_requests_use_serializer_path():
+    ProductFactory(name="Chai")
+
+    indented = APIClient().get("/api/products/", HTTP_ACCEPT="application/json; indent=2")
+    assert b"\n" in indented.content
+
+    html = APIClient().get("/api/products/", HTTP_ACCEPT="text/html")
+    assert html["Content-Type"].startswith("text/html")
@@ -0,0 +1,26 @@
+import pytest
+from rest_framework.test import APIClient
+
+from tests.factories import ProductFactory
+
+
+@pytest.mark.django_db
+def test_search_ranks_name_matches_first_and_highlights():
+    in_description = ProductFactory(name="Charging Cable", description="Works with every smartphone on the market.")
+    in_name = ProductFactory(name="Budget Smartphone", description="A phone with a large battery and a bright screen.")
+    ProductFactory(name="Desk Lamp", description="Warm light for late nights.")
+
+    resp = APIClient().get("/api/products/search/", {"q": "smartphones"})
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [hit["id"] for hit in data] == [in_name.id, in_description.id]
+    assert data[0]["rank"] > data[1]["rank"]
+    assert data[1]["category_name"] == in_description.category.name
+    assert "<mark>smartphone</mark>" in data[1]["snippet"]
+
+
+@pytest.mark.django_db
+def test_search_requires_query():
+    resp = APIClient().get("/api/products/search/")
+    assert resp.status_code == 400
@@ -0,0 +1,69 @@
+import csv
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models.signals import post_save
+from rest_framework.authtoken.models import Token
+
+from api.models import Customer
+from tests.factories import UserFactory
+
+
+def _provision(*args):
+    out, err = StringIO(), StringIO()
+    call_command("provision_users", *args, stdout=out, stderr=err)
+    return out.getvalue(), err.getvalue()
+
+
+@pytest.mark.django_db
+def test_csv_creates_users_customers_and_tokens_without_the_signal(tmp_path):
+    UserFactory(username="existing")
+    source = tmp_path / "staff.csv"
+    source.write_text(
+        "username,email,password,phone_number,address\n"
+        "alice,alice@example.com,S3cure-pass!,+254700000001,Nairobi\n"
+        "bob,bob@example.com,,+254700000002,Mombasa\n"
+        "existing,,,,\n"
+        "alice,again@example.com,,,\n"
+        "bad name!,,,,\n"
+    )
+    tokens = tmp_path / "tokens.csv"
+    receivers = []
+    post_save.connect(lambda **kw: receivers.append(kw["instance"]), sender=User, weak=False, dispatch_uid="spy")
+    try:
+        out, err = _provision(str(source), "--batch-size", "2", "--workers", "2", "--tokens-out", str(tokens))
+    finally:
+        post_save.disconnect(sender=User, dispatch_uid="spy")
+
+    assert receivers == []
+    assert "Created 2 user(s)" in out and "skipped 1 existing and 2 invalid row(s)" in out
+    assert "line 5: username 'alice' appears earlier in the file" in err
+    assert "line 6: username 'bad name!'" in err
+
+    alice = User.objects.get(username="alice")
+    assert alice.check_password("S3cure-pass!")
+    assert not User.objects.get(username="bob").has_usable_password()
+    assert Customer.objects.get(user=alice).address == "Nairobi"
+    assert not User.objects.filter(customer__isnull=True).exists()
+
+    rows = list(csv.DictReader(tokens.open()))
+    assert {r["username"] for r in rows} == {"alice", "bob"}
+    assert all(Token.objects.filter(user__username=r["username"], key=r["token"]).exists() for r in rows)
+
+
+@pytest.mark.django_db
+def test_jsonl_rerun_skips_created_users_and_bad_lines(tmp_path):
+    source = tmp_path / "staff.jsonl"
+    lines = [json.dumps({"username": f"staff{i}", "phone_number": f"+2547000001{i:02d}"}) for i in range(5)]
+    source.write_text("\n".join(lines[:3] + ["{not json", "[1, 2]"] + lines[3:]) + "\n")
+
+    out, err = _provision(str(source), "--workers", "1")
+    assert "Created 5 user(s)" in out
+    assert "line 4: invalid JSON" in err and "line 5: expected a JSON object" in err
+    assert Customer.objects.filter(user__username__startswith="staff").count() == 5
+
+    out, _ = _provision(str(source), "--workers", "1")
+    assert "Created 0 user(s)" in out and "skipped 5 existing" in out
@@ -0,0 +1,109 @@
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from api.models import DailyCategorySales, DailyProductSales, DailySales, Order, Product
+from tests.factories import CategoryFactory, CustomerFactory, ProductFactory, UserFactory
+
+
+@pytest.fixture
+def shop():
+    category = CategoryFactory(name="Drinks")
+    customer = CustomerFactory(phone_number="+254700000002")
+    client = APIClient()
+    client.force_authenticate(customer.user)
+    return {
+        "client": client,
+        "category": category,
+        "tea": ProductFactory(name="Tea", category=category, price=Decimal("100.00"), stock=50),
+        "coffee": ProductFactory(name="Coffee", category=category, price=Decimal("250.00"), stock=50),
+    }
+
+
+def _place(client, items, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        resp = client.post("/api/orders/", {"products": items}, format="json")
+    assert resp.status_code == 201, resp.content
+    return resp.json()["id"]
+
+
+def _snapshot():
+    return (
+        list(DailySales.objects.values_list("orders", "units", "revenue")),
+        sorted(DailyCategorySales.objects.values_list("category_id", "units", "revenue")),
+        sorted(DailyProductSales.objects.values_list("product_id", "units", "revenue")),
+    )
+
+
+@pytest.mark.django_db
+def test_rollups_follow_order_create_and_update(shop, django_capture_on_commit_callbacks):
+    tea, coffee = shop["tea"], shop["coffee"]
+    order_id = _place(shop["client"], [{"product_id": tea.id, "quantity": 2}], django_capture_on_commit_callbacks)
+    _place(shop["client"], [{"product_id": coffee.id, "quantity": 1}], django_capture_on_commit_callbacks)
+
+    assert _snapshot() == (
+        [(2, 3, Decimal("450.00"))],
+        [(shop["category"].id, 3, Decimal("450.00"))],
+        [(tea.id, 2, Decimal("200.00")), (coffee.id, 1, Decimal("250.00"))],
+    )
+
+    # Revenue stays at the price paid, so a later price change does not skew the update's delta
+    Product.objects.filter(pk=tea.pk).update(price=Decimal("150.00"))
+    with django_capture_on_commit_callbacks(execute=True):
+        resp = shop["client"].put(
+            f"/api/orders/{order_id}/", {"products": [{"product_id": coffee.id, "quantity": 3}]}, format="json"
+        )
+    assert resp.status_code == 200, resp.content
+
+    expected = (
+        [(2, 4, Decimal("1000.00"))],
+        [(shop["category"].id, 4, Decimal("1000.00"))],
+        [(tea.id, 0, Decimal("0.00")), (coffee.id, 4, Decimal("1000.00"))],
+    )
+    assert _snapshot() == expected
+
+    # A full rebuild from history reproduces the incremental result.
+    call_command("backfill_sales_rollups", chunk_size=1, stdout=StringIO())
+    rebuilt = _snapshot()
+    assert rebuilt[0] == expected[0]
+    assert rebuilt[1] == expected[1]
+    assert rebuilt[2] == [(coffee.id, 4, Decimal("1000.00"))]
+
+
+@pytest.mark.django_db
+def test_analytics_endpoints_are_staff_only(shop, django_capture_on_commit_callbacks):
+    _place(shop["client"], [{"product_id": shop["tea"].id, "quantity": 2}], django_capture_on_commit_callbacks)
+    assert shop["client"].get("/api/analytics/by_day/").status_code == 403
+
+    admin = APIClient()
+    admin.force_authenticate(UserFactory(is_staff=True))
+
+    by_day = admin.get("/api/analytics/by_day/").json()
+    assert [(row["orders"], row["units"], row["revenue"]) for row in by_day] == [(1, 2, "200.00")]
+
+    by_category = admin.get("/api/analytics/by_category/").json()
+    assert by_category == [{"category": shop["category"].id, "category_name": "Drinks", "units": 2, "revenue": "200.00"}]
+
+    by_product = admin.get("/api/analytics/by_product/", {"start": "2000-01-01", "end": "2000-12-31"}).json()
+    assert by_product == []
+    assert admin.get("/api/analytics/by_product/", {"start": "yesterday"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_orders_keep_the_price_paid_after_a_price_change(shop, django_capture_on_commit_callbacks):
+    tea = shop["tea"]
+    order_id = _place(shop["client"], [{"product_id": tea.id, "quantity": 2}], django_capture_on_commit_callbacks)
+    Product.objects.filter(pk=tea.pk).update(price=Decimal("150.00"))
+
+    order = shop["client"].get(f"/api/orders/{order_id}/").json()
+    (item,) = order["items"]
+    assert item["product_price"] == "100.00"
+    assert Decimal(str(item["subtotal"])) == Decimal("200.00")
+    assert order["total_amount"] == "200.00"
+
+    Order.objects.get(pk=order_id).update_total_amount()
+    assert Order.objects.get(pk=order_id).total_amount == Decimal("200.00")
+    assert _snapshot()[2] == [(tea.id, 2, Decimal("200.00"))]
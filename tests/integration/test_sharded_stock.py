@@ -0,0 +1,85 @@
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from api import inventory
+from api.models import Product, ProductStockBucket
+from tests.factories import CustomerFactory, ProductFactory
+
+
+@pytest.fixture
+def hot_product():
+    product = ProductFactory(name="Flash sale kettle", price=Decimal("50.00"), stock=10)
+    inventory.set_shards(product, 4)
+    product.refresh_from_db()
+    return product
+
+
+def _bucket_stock(product):
+    return list(ProductStockBucket.objects.filter(product=product).order_by("bucket").values_list("stock", flat=True))
+
+
+@pytest.mark.django_db
+def test_set_shards_splits_and_folds_stock(hot_product):
+    assert hot_product.stock_shards == 4
+    assert _bucket_stock(hot_product) == [3, 3, 2, 2]
+
+    inventory.set_shards(hot_product, 0)
+    hot_product.refresh_from_db()
+    assert (hot_product.stock_shards, hot_product.stock) == (0, 10)
+    assert not ProductStockBucket.objects.filter(product=hot_product).exists()
+
+
+@pytest.mark.django_db
+def test_take_uses_one_bucket_and_falls_back_across_buckets(hot_product):
+    before = _bucket_stock(hot_product)
+    inventory.take(hot_product, 2)
+    changed = [b - a for b, a in zip(before, _bucket_stock(hot_product)) if b != a]
+    assert changed == [2]
+    assert hot_product.available_stock == 8
+
+    # No single bucket holds 7 units: drained across buckets under the fallback path
+    inventory.take(hot_product, 7)
+    assert hot_product.available_stock == 1
+    with pytest.raises(inventory.InsufficientStock):
+        inventory.take(hot_product, 2)
+
+
+@pytest.mark.django_db
+def test_order_api_reads_and_writes_sharded_stock(hot_product):
+    customer = CustomerFactory(phone_number="+254700000004")
+    client = APIClient()
+    client.force_authenticate(customer.user)
+    with mock.patch("api.views.notifications"):
+        response = client.post("/api/orders/", {"products": [{"product_id": hot_product.id, "quantity": 3}]}, format="json")
+    assert response.status_code == 201
+
+    assert client.get(f"/api/products/{hot_product.id}/").json()["stock"] == 7
+    listed = {p["id"]: p["stock"] for p in client.get("/api/products/").json()}
+    assert listed[hot_product.id] == 7
+
+    with mock.patch("api.views.notifications"):
+        response = client.post("/api/orders/", {"products": [{"product_id": hot_product.id, "quantity": 8}]}, format="json")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_in_stock_filter_checks_buckets(hot_product):
+    ProductStockBucket.objects.filter(product=hot_product).update(stock=0)
+    ids = [p["id"] for p in APIClient().get("/api/products/", {"in_stock": "true"}).json()]
+    assert hot_product.id not in ids
+
+
+@pytest.mark.django_db
+def test_rebalance_command_evens_buckets(hot_product):
+    ProductStockBucket.objects.filter(product=hot_product, bucket=0).update(stock=0)
+    out = StringIO()
+    call_command("rebalance_stock", stdout=out)
+
+    assert "Rebalanced 1 sharded product(s)" in out.getvalue()
+    assert _bucket_stock(hot_product) == [2, 2, 2, 1]
+    assert Product.objects.get(pk=hot_product.pk).stock == 7
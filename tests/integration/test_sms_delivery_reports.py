@@ -0,0 +1,158 @@
+import time
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from django.db import DatabaseError
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api import notifications, sms_log
+from api.models import Order, OrderItem, SMSMessage
+from api.services.sms_service import SMSService, sms_breaker
+from api.services.sms_stub import StubSMSGateway
+from tests.factories import CustomerFactory, ProductFactory
+
+DLR_URL = "/api/sms/delivery-reports/"
+
+
+@pytest.fixture(autouse=True)
+def empty_report_buffer():
+    sms_log.reports.clear()
+    yield
+    sms_log.reports.clear()
+
+
+@pytest.fixture
+def gateway():
+    with StubSMSGateway() as stub:
+        with override_settings(AFRICASTALKING_API_KEY="stub-key", AFRICASTALKING_API_URL=stub.url, AFRICASTALKING_SENDER_ID=""):
+            yield stub
+
+
+@pytest.fixture
+def order():
+    customer = CustomerFactory(phone_number="+254700000031")
+    order = Order.objects.create(customer=customer, total_amount=Decimal("10.00"))
+    OrderItem.objects.create(order=order, product=ProductFactory(price=Decimal("10.00")), quantity=1)
+    return order
+
+
+def _sms_status(order):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.get_or_create(user=order.customer.user)[0].key}")
+    response = client.get(f"/api/orders/{order.pk}/sms/")
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.django_db
+@override_settings(SMS_DLR_FLUSH_SECONDS=0, SMS_DLR_BATCH_SIZE=100, SMS_CALLBACK_TOKEN="s3cret")
+def test_sent_sms_is_logged_and_delivery_reports_update_it_in_batches(client, gateway, order, django_assert_num_queries):
+    notifications.send_order_confirmation_sms(order)
+    (message_id, number, _) = gateway.sent[0]
+    (logged,) = _sms_status(order)
+    assert {k: logged[k] for k in ("recipient", "message_id", "status", "cost")} == {
+        "recipient": number,
+        "message_id": message_id,
+        "status": "Sent",
+        "cost": "KES 0.8000",
+    }
+
+    assert client.post(DLR_URL, {"id": message_id, "status": "Success"}).status_code == 403
+    url = f"{DLR_URL}?token=s3cret"
+    with override_settings(SMS_CALLBACK_TOKEN=""):
+        assert client.post(url, {"id": message_id, "status": "Success"}).status_code == 503
+    with django_assert_num_queries(0):
+        # Final status first, then a late intermediate report: the final one is kept
+        assert client.post(url, {"id": message_id, "status": "Success"}).status_code == 200
+        assert client.post(url, {"id": message_id, "status": "Buffered"}).status_code == 200
+        assert client.post(url, {"id": "ATXid_unknown", "status": "Failed", "failureReason": "x"}).status_code == 200
+    assert client.post(url, {"status": "Success"}).status_code == 400
+    assert len(sms_log.reports) == 2
+
+    with django_assert_num_queries(1):
+        assert sms_log.reports.flush() == 1
+    assert _sms_status(order)[0]["status"] == "Success"
+    # The unknown id is retried on later flushes, then dropped
+    assert len(sms_log.reports) == 1
+    with override_settings(SMS_DLR_MAX_ATTEMPTS=2):
+        sms_log.reports.flush()
+    assert len(sms_log.reports) == 0
+
+    # A report arriving during a failed flush is newer than the retried one and is kept
+    sms_log.reports.add("ATXid_unknown", "Success")
+    with mock.patch.object(
+        sms_log, "apply_reports", side_effect=lambda chunk: sms_log.reports.add("ATXid_unknown", "Buffered") or set()
+    ):
+        sms_log.reports.flush()
+    assert sms_log.reports._pending["ATXid_unknown"][0] == "Buffered"
+    sms_log.reports.clear()
+
+    # A message in a final status keeps it
+    sms_log.apply_reports({message_id: ("Submitted", "")})
+    assert SMSMessage.objects.get().status == "Success"
+
+
+@pytest.mark.django_db
+@override_settings(SMS_DLR_FLUSH_SECONDS=0, SMS_DLR_MAX_ATTEMPTS=2)
+def test_database_outage_does_not_use_up_attempts():
+    message = SMSMessage.objects.create(recipient="+254700000031", message="hi", message_id="ATXid_1", status="Sent")
+    sms_log.reports.add(message.message_id, "Success")
+    with mock.patch.object(sms_log, "apply_reports", side_effect=DatabaseError("connection lost")):
+        for _ in range(5):
+            assert sms_log.reports.flush() == 0
+    assert sms_log.reports._pending == {message.message_id: ("Success", "", 0)}
+
+    assert sms_log.reports.flush() == 1
+    assert SMSMessage.objects.get().status == "Success"
+
+
+@pytest.mark.django_db
+@override_settings(SMS_DLR_FLUSH_SECONDS=0, SMS_DLR_BATCH_SIZE=3, SMS_CALLBACK_TOKEN="s3cret")
+def test_buffer_flushes_when_batch_is_full(client):
+    messages = SMSMessage.objects.bulk_create(
+        SMSMessage(recipient="+254700000032", message="hi", message_id=f"ATXid_{i}", status="Sent") for i in range(3)
+    )
+    for i, message in enumerate(messages):
+        client.post(
+            f"{DLR_URL}?token=s3cret",
+            {"id": message.message_id, "status": "Failed" if i else "Success", "failureReason": "Rejected"},
+        )
+    assert len(sms_log.reports) == 0
+    assert list(SMSMessage.objects.order_by("id").values_list("status", "failure_reason")) == [
+        ("Success", "Rejected"),
+        ("Failed", "Rejected"),
+        ("Failed", "Rejected"),
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(SMS_DLR_FLUSH_SECONDS=0.05, SMS_CALLBACK_TOKEN="s3cret")
+def test_stub_gateway_posts_delivery_reports_back(live_server, order):
+    with StubSMSGateway(callback_url=f"{live_server.url}{DLR_URL}?token=s3cret", report_delay=0) as stub:
+        with override_settings(AFRICASTALKING_API_KEY="stub-key", AFRICASTALKING_API_URL=stub.url):
+            notifications.send_order_confirmation_sms(order)
+        deadline = time.monotonic() + 5
+        while SMSMessage.objects.get().status != "Success" and time.monotonic() < deadline:
+            time.sleep(0.05)
+    assert SMSMessage.objects.get().status == "Success"
+
+
+@pytest.mark.django_db
+@override_settings(SMS_READ_TIMEOUT=0.2, CIRCUIT_BREAKER_FAILURE_THRESHOLD=2, CIRCUIT_BREAKER_RESET_SECONDS=60)
+def test_hung_gateway_opens_the_breaker_and_later_sends_fall_back_at_once(order):
+    with StubSMSGateway(latency=1) as stub:
+        with override_settings(AFRICASTALKING_API_KEY="stub-key", AFRICASTALKING_API_URL=stub.url):
+            for _ in range(2):
+                start = time.monotonic()
+                assert SMSService().send_sms("+254700000031", "hi")["status"] == "fallback_simulation"
+                assert time.monotonic() - start < 0.9  # the read timeout, not the gateway's latency
+            assert sms_breaker.state == "open"
+
+            start = time.monotonic()
+            response = SMSService().send_sms("+254700000031", "hi")
+            assert time.monotonic() - start < 0.05
+    assert response["status"] == "fallback_simulation"
+    assert "circuit is open" in response["error"]
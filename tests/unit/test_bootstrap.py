@@ -0,0 +1,59 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from api.models import LoadedFixture, Product
+
+
+def run_bootstrap(*args):
+    out = StringIO()
+    call_command("bootstrap", *args, stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_bootstrap_is_idempotent(monkeypatch):
+    monkeypatch.delenv("DJANGO_SUPERUSER_USERNAME", raising=False)
+
+    first = run_bootstrap()
+    assert "Loaded fixture api/fixtures/products.json" in first
+    assert "Bootstrap finished in" in first
+    reviewer = User.objects.get(username="reviewer")
+    assert reviewer.customer.phone_number == "+254700000000"
+    assert Product.objects.count() == 2
+
+    second = run_bootstrap()
+    assert "unchanged, skipping" in second
+    assert "Reviewer account 'reviewer' exists" in second
+    assert User.objects.filter(username="reviewer").count() == 1
+
+
+@pytest.mark.django_db
+def test_bootstrap_reloads_changed_fixture(tmp_path):
+    fixture = tmp_path / "categories.json"
+    fixture.write_text('[{"model": "api.category", "pk": 50, "fields": {"name": "Books", "parent": null}}]')
+    run_bootstrap("--fixture", str(fixture), "--no-reviewer")
+    checksum = LoadedFixture.objects.get(path=str(fixture)).checksum
+
+    fixture.write_text('[{"model": "api.category", "pk": 50, "fields": {"name": "Novels", "parent": null}}]')
+    assert "Loaded fixture" in run_bootstrap("--fixture", str(fixture), "--no-reviewer")
+    assert LoadedFixture.objects.get(path=str(fixture)).checksum != checksum
+    assert not User.objects.filter(username="reviewer").exists()
+
+
+@pytest.mark.django_db
+def test_broken_fixture_is_reported_and_retried_on_next_start(tmp_path):
+    fixture = tmp_path / "categories.json"
+    fixture.write_text('[{"model": "api.category", "pk": 50, "fields": {"name": "Books", "parent": 999}}]')
+    err = StringIO()
+    out = StringIO()
+    call_command("bootstrap", "--fixture", str(fixture), "--no-reviewer", stdout=out, stderr=err)
+
+    assert f"Could not load fixture {fixture}" in err.getvalue()
+    assert "Bootstrap finished in" in out.getvalue()
+    assert not LoadedFixture.objects.filter(path=str(fixture)).exists()
+
+    fixture.write_text('[{"model": "api.category", "pk": 50, "fields": {"name": "Books", "parent": null}}]')
+    assert "Loaded fixture" in run_bootstrap("--fixture", str(fixture), "--no-reviewer")
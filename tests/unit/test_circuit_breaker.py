@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+from api.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+from api.metrics import CIRCUIT_BREAKER_STATE
+
+
+def _fail():
+    raise OSError("provider down")
+
+
+def _gauge(name):
+    return CIRCUIT_BREAKER_STATE.labels(breaker=name)._value.get()
+
+
+def test_opens_after_consecutive_failures_and_fails_fast():
+    breaker = CircuitBreaker("test-open", failures=(OSError,), failure_threshold=3, reset_seconds=60)
+    calls = []
+
+    for _ in range(2):
+        with pytest.raises(OSError):
+            breaker.call(_fail)
+    assert breaker.call(calls.append, 1) is None  # a success resets the count
+    for _ in range(3):
+        with pytest.raises(OSError):
+            breaker.call(_fail)
+
+    assert breaker.state == OPEN
+    assert _gauge("test-open") == 2
+    with pytest.raises(CircuitOpen):
+        breaker.call(calls.append, 2)
+    assert calls == [1]
+
+
+def test_other_exceptions_do_not_count_as_failures():
+    breaker = CircuitBreaker("test-other", failures=(OSError,), failure_threshold=1)
+    with pytest.raises(ValueError):
+        breaker.call(int, "x")
+    assert breaker.state == CLOSED
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker("test-probe", failures=(OSError,), failure_threshold=1, reset_seconds=0)
+    with pytest.raises(OSError):
+        breaker.call(_fail)
+    assert breaker.state == HALF_OPEN
+
+    probing, release = threading.Event(), threading.Event()
+
+    def slow_probe():
+        probing.set()
+        release.wait(5)
+        return "ok"
+
+    results = []
+    probe = threading.Thread(target=lambda: results.append(breaker.call(slow_probe)))
+    probe.start()
+    assert probing.wait(5)
+    assert _gauge("test-probe") == 1
+    with pytest.raises(CircuitOpen):
+        breaker.call(lambda: "concurrent")
+    release.set()
+    probe.join(5)
+
+    assert results == ["ok"]
+    assert breaker.state == CLOSED
+    assert _gauge("test-probe") == 0
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("test-reopen", failures=(OSError,), failure_threshold=5, reset_seconds=60)
+    for _ in range(5):
+        with pytest.raises(OSError):
+            breaker.call(_fail)
+    breaker._opened_at -= 60  # the reset period has passed
+    assert breaker.state == HALF_OPEN
+    assert _gauge("test-reopen") == 1
+    with pytest.raises(OSError):
+        breaker.call(_fail)  # the probe
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.call(lambda: "ok")
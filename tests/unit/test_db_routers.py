@@ -0,0 +1,78 @@
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api import checks, mixins
+from api.db_routers import PrimaryReplicaRouter, read_from_replica
+from api.models import Product
+from tests.factories import CustomerFactory, ProductFactory
+
+
+@pytest.fixture
+def replicas(settings):
+    # "default" stands in for the replica so queries still hit the test database.
+    settings.DATABASE_REPLICAS = ["default"]
+    cache.clear()
+    with mock.patch.object(mixins, "read_from_replica", wraps=read_from_replica) as spy:
+        yield spy
+    cache.clear()
+
+
+def test_router_uses_primary_unless_replica_requested(settings):
+    settings.DATABASE_REPLICAS = ["replica_1"]
+    router = PrimaryReplicaRouter()
+    assert router.db_for_read(Product) is None
+    with read_from_replica():
+        assert router.db_for_read(Product) == "replica_1"
+    assert router.db_for_read(Product) is None
+    assert router.db_for_write(Product) == "default"
+    assert router.allow_migrate("replica_1", "api") is False
+    assert router.allow_migrate("default", "api") is True
+
+
+@pytest.mark.django_db
+def test_safe_catalog_reads_go_to_replica(replicas):
+    ProductFactory()
+    resp = APIClient().get("/api/products/")
+    assert resp.status_code == 200
+    assert replicas.call_count == 1
+
+
+@pytest.mark.django_db
+def test_write_pins_user_to_primary(replicas):
+    customer = CustomerFactory()
+    client = APIClient()
+    client.force_authenticate(customer.user)
+
+    resp = client.post("/api/categories/", {"name": "Pinned"}, format="json")
+    assert resp.status_code == 201
+    assert mixins.is_pinned_to_primary(customer.user)
+
+    client.get("/api/categories/")
+    assert replicas.call_count == 0
+
+    cache.clear()
+    client.get("/api/categories/")
+    assert replicas.call_count == 1
+
+
+@pytest.mark.django_db
+def test_order_detail_stays_on_primary(replicas):
+    customer = CustomerFactory(phone_number="+254700000001")
+    client = APIClient()
+    client.force_authenticate(customer.user)
+
+    client.get("/api/orders/")
+    assert replicas.call_count == 1
+    client.get("/api/orders/999/")
+    assert replicas.call_count == 1
+
+
+def test_replicas_require_a_shared_cache(settings):
+    settings.DATABASE_REPLICAS = ["replica_1"]
+    assert checks.check_shared_cache(None) == []
+
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    assert [error.id for error in checks.check_shared_cache(None)] == ["api.E001"]
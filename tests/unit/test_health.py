@@ -0,0 +1,49 @@
+from unittest import mock
+
+import pytest
+from django.db import OperationalError, connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from api import health, warmup
+
+
+@pytest.fixture(autouse=True)
+def warm_worker(monkeypatch):
+    monkeypatch.setattr(warmup, "_state", {"status": "done", "timings": {}, "errors": []})
+    monkeypatch.setattr(health, "_db_result", {"checked_at": None, "report": None})
+
+
+@pytest.mark.django_db
+def test_healthz_bypasses_middleware_stack(settings):
+    settings.ALLOWED_HOSTS = ["shop.example.com"]
+    with CaptureQueriesContext(connection) as queries:
+        resp = Client().get("/healthz", HTTP_HOST="10.0.0.7:8888")
+    assert resp.status_code == 200
+    assert len(queries) == 0
+    assert "Server-Timing" not in resp.headers
+    assert not resp.cookies
+
+
+@pytest.mark.django_db
+def test_readyz_caches_database_check(settings):
+    settings.HEALTH_DB_CHECK_TTL = 60
+    with CaptureQueriesContext(connection) as queries:
+        first = Client().get("/readyz")
+        second = Client().get("/readyz")
+    assert first.status_code == second.status_code == 200
+    assert len(queries) == 1
+    database = second.json()["database"]
+    assert database["ok"] and 0 < database["saturation"] <= 1
+
+
+@pytest.mark.django_db
+def test_readyz_fails_when_database_is_down_or_worker_cold(monkeypatch):
+    with mock.patch.object(connection, "cursor", side_effect=OperationalError("connection refused")):
+        resp = Client().get("/readyz")
+    assert resp.status_code == 503
+    assert resp.json()["database"] == {"ok": False, "error": "connection refused", "age_s": 0.0}
+
+    monkeypatch.setattr(health, "_db_result", {"checked_at": None, "report": None})
+    monkeypatch.setattr(warmup, "_state", {"status": "running", "timings": {}, "errors": []})
+    assert Client().get("/readyz").status_code == 503
@@ -0,0 +1,48 @@
+import os
+from unittest import mock
+
+import pytest
+from rest_framework.test import APIRequestFactory
+
+from api import importtime
+from api.authentication import LazyOIDCAuthentication
+
+# Cold `import savannah_assess.wsgi` (Django setup, models, middleware) under -X importtime.
+WSGI_IMPORT_BUDGET_MS = float(os.environ.get("WSGI_IMPORT_BUDGET_MS", 1000))
+LAZY_MODULES = {"africastalking", "mozilla_django_oidc.auth", "mozilla_django_oidc.views", "josepy"}
+
+
+@pytest.fixture(scope="module")
+def startup_imports():
+    return importtime.measure(["savannah_assess.wsgi", "savannah_assess.urls"])
+
+
+def test_wsgi_cold_import_within_budget(startup_imports):
+    wsgi_ms = importtime.module_totals_ms(startup_imports)["savannah_assess.wsgi"]
+    assert wsgi_ms < WSGI_IMPORT_BUDGET_MS, f"cold import took {wsgi_ms:.0f} ms (budget {WSGI_IMPORT_BUDGET_MS:.0f} ms)"
+
+
+def test_heavy_integrations_are_not_imported_at_startup(startup_imports):
+    assert not LAZY_MODULES & {record.module for record in startup_imports}
+
+
+def test_parse_importtime_output():
+    records = importtime.parse(
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   child\n"
+        "import time:       300 |        420 | parent\n"
+    )
+    assert records == [("child", 120, 120, 1), ("parent", 300, 420, 0)]
+    assert importtime.module_totals_ms(records) == {"parent": 0.42}
+
+
+def test_lazy_oidc_authentication_only_delegates_bearer_tokens():
+    factory = APIRequestFactory()
+    auth = LazyOIDCAuthentication()
+    with mock.patch("mozilla_django_oidc.contrib.drf.OIDCAuthentication") as oidc:
+        oidc.return_value.authenticate.return_value = ("user", "abc")
+        assert auth.authenticate(factory.get("/", HTTP_AUTHORIZATION="Token abc")) is None
+        assert auth.authenticate(factory.get("/")) is None
+        oidc.assert_not_called()
+        assert auth.authenticate(factory.get("/", HTTP_AUTHORIZATION="Bearer abc")) == ("user", "abc")
+    assert auth.authenticate_header(None) == 'Bearer realm="api"'
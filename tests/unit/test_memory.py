@@ -0,0 +1,90 @@
+import json
+import tracemalloc
+from unittest import mock
+
+import pytest
+from django.test import Client
+
+from api import memory
+from tests.factories import UserFactory
+
+
+@pytest.fixture
+def staff_client():
+    staff = UserFactory(is_staff=True)
+    staff.refresh_from_db()  # the factory sets the password after saving; match the stored session hash
+    client = Client()
+    client.force_login(staff)
+    yield client
+    memory.stop_tracing()
+
+
+def test_peak_memory_counts_allocations_and_stops_tracing():
+    tracker = memory.PeakMemory.start()
+    block = bytearray(512 * 1024)
+    del block
+    assert tracker.finish() >= 512
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.django_db
+def test_peak_memory_logged_for_configured_views(settings):
+    settings.MEMORY_PEAK_VIEWS = {"category-list"}
+    with mock.patch("api.middleware.logger") as logger:
+        Client().get("/api/categories/")
+        Client().get("/api/products/")
+    categories, products = (json.loads(call.args[0]) for call in logger.info.call_args_list)
+    assert categories["peak_mem_kb"] > 0
+    assert "peak_mem_kb" not in products
+
+
+@pytest.mark.django_db
+def test_peak_memory_is_sampled(settings):
+    settings.MEMORY_PEAK_VIEWS = {"category-list"}
+    settings.MEMORY_PEAK_SAMPLE_EVERY = 2
+    client = Client()
+    with mock.patch("api.middleware.logger") as logger:
+        for _ in range(3):
+            client.get("/api/categories/")
+    assert ["peak_mem_kb" in json.loads(call.args[0]) for call in logger.info.call_args_list] == [True, False, True]
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.django_db
+def test_snapshot_endpoints(staff_client):
+    assert staff_client.post("/api/debug/memory/snapshot/").status_code == 409
+
+    started = staff_client.post("/api/debug/memory/start/?frames=5").json()
+    assert started["tracing"] and started["frames"] == 5
+
+    first = staff_client.post("/api/debug/memory/snapshot/?limit=5").json()
+    assert len(first["top"]) <= 5 and first["diff"] is None
+    second = staff_client.post("/api/debug/memory/snapshot/").json()
+    assert second["pid"] == first["pid"] and isinstance(second["diff"], list)
+
+    assert staff_client.post("/api/debug/memory/stop/").json()["tracing"] is False
+
+
+@pytest.mark.django_db
+def test_memory_endpoints_require_staff():
+    assert Client().get("/api/debug/memory/").status_code in (401, 403)
+
+
+@pytest.mark.django_db
+def test_peak_memory_leaves_debug_tracing_alone(settings, staff_client):
+    settings.MEMORY_PEAK_VIEWS = {"category-list"}
+    settings.MEMORY_PEAK_SAMPLE_EVERY = 1
+    staff_client.post("/api/debug/memory/start/?frames=5")
+    staff_client.post("/api/debug/memory/snapshot/")
+    with mock.patch("api.middleware.logger") as logger:
+        Client().get("/api/categories/")
+    assert "peak_mem_kb" not in json.loads(logger.info.call_args.args[0])
+    assert tracemalloc.is_tracing() and tracemalloc.get_traceback_limit() == 5
+    assert staff_client.post("/api/debug/memory/snapshot/").json()["diff"] is not None
+
+    # Tracing started by the debug endpoints mid-request is not stopped when the request ends
+    memory.stop_tracing()
+    tracker = memory.PeakMemory.start()
+    staff_client.post("/api/debug/memory/start/?frames=5")
+    assert tracker.finish() is None
+    assert tracemalloc.is_tracing() and tracemalloc.get_traceback_limit() == 5
@@ -0,0 +1,62 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+
+from api.middleware import make_profile_token
+from tests.factories import UserFactory
+
+
+@pytest.fixture
+def profile_dir(settings, tmp_path):
+    settings.PROFILING_DIR = str(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_signed_header_captures_profile(profile_dir):
+    resp = Client().get("/api/categories/", HTTP_X_PROFILE=make_profile_token())
+
+    assert resp.status_code == 200
+    assert (profile_dir / resp["X-Profile-File"]).exists()
+
+    listing = StringIO()
+    call_command("profiles", stdout=listing)
+    assert resp["X-Profile-File"] in listing.getvalue()
+
+    summary = StringIO()
+    call_command("profiles", show=resp["X-Profile-File"], top=5, stdout=summary)
+    assert "function calls" in summary.getvalue()
+
+
+@pytest.mark.django_db
+def test_back_to_back_captures_of_one_path_keep_separate_files(profile_dir):
+    names = {Client().get("/api/categories/", HTTP_X_PROFILE=make_profile_token())["X-Profile-File"] for _ in range(3)}
+
+    assert len(names) == 3
+    assert {path.name for path in profile_dir.iterdir()} == names
+
+
+@pytest.mark.django_db
+def test_invalid_header_and_anonymous_flag_are_ignored(profile_dir):
+    assert "X-Profile-File" not in Client().get("/api/categories/", HTTP_X_PROFILE="forged").headers
+    assert "X-Profile-File" not in Client().get("/api/categories/?__profile=1").headers
+    assert list(profile_dir.iterdir()) == []
+
+
+@pytest.mark.django_db
+def test_staff_query_flag_captures_profile(profile_dir):
+    staff = UserFactory(is_staff=True)
+    staff.refresh_from_db()  # the factory sets the password after saving; match the stored session hash
+    client = Client()
+    client.force_login(staff)
+    resp = client.get("/api/categories/?__profile=1")
+    assert (profile_dir / resp["X-Profile-File"]).exists()
+
+
+@pytest.mark.django_db
+def test_profiling_disabled_without_directory(settings):
+    settings.PROFILING_DIR = ""
+    resp = Client().get("/api/categories/", HTTP_X_PROFILE=make_profile_token())
+    assert "X-Profile-File" not in resp.headers
@@ -0,0 +1,65 @@
+import json
+from unittest import mock
+
+import pytest
+from django.test import Client
+
+from api import instrumentation
+from tests.factories import CustomerFactory, ProductFactory
+
+
+def test_nested_spans_are_counted_once():
+    with instrumentation.collect() as metrics:
+        with instrumentation.span("serializer"):
+            with instrumentation.span("serializer"):
+                pass
+        with instrumentation.span("notify"):
+            pass
+    assert set(metrics.spans) == {"serializer", "notify"}
+    # Outside a request, spans are no-ops.
+    with instrumentation.span("serializer"):
+        pass
+
+
+def test_slowest_sql_keeps_only_the_slowest():
+    metrics = instrumentation.RequestMetrics(slow_sql_count=2)
+    for sql, duration in (("a", 0.001), ("b", 0.005), ("c", 0.003)):
+        with mock.patch("api.instrumentation.time.perf_counter", side_effect=[0.0, duration]):
+            metrics.sql_wrapper(lambda *args: None, sql, None, False, {})
+    assert metrics.query_count == 3
+    assert [sql for _, sql in metrics.slowest_sql()] == ["b", "c"]
+
+
+@pytest.mark.django_db
+def test_server_timing_header_and_log_line():
+    ProductFactory()
+    with mock.patch("api.middleware.logger") as logger:
+        resp = Client().get("/api/products/", HTTP_ACCEPT="text/html")
+
+    timing = resp["Server-Timing"]
+    assert timing.startswith("db;dur=") and '1 queries"' in timing
+    assert "serializer;dur=" in timing and "total;dur=" in timing
+    record = json.loads(logger.info.call_args.args[0])
+    assert record["path"] == "/api/products/"
+    assert record["queries"] == 1
+    assert "serializer_ms" in record
+
+
+@pytest.mark.django_db
+def test_slow_requests_log_slowest_sql(settings):
+    settings.REQUEST_TIMING_MAX_QUERIES = 0
+    customer = CustomerFactory(phone_number="+254700000003")
+    client = Client()
+    client.force_login(customer.user)
+    product = ProductFactory()
+
+    with mock.patch("api.middleware.logger") as logger:
+        resp = client.post(
+            "/api/orders/", {"products": [{"product_id": product.id, "quantity": 1}]}, content_type="application/json"
+        )
+
+    assert resp.status_code == 201
+    assert "notify;dur=" in resp["Server-Timing"]
+    record = json.loads(logger.warning.call_args.args[0])
+    assert record["slow"] is True
+    assert 0 < len(record["slowest_sql"]) <= 5
@@ -0,0 +1,78 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api import checks
+from api.throttling import LocalBuckets, parse_rate
+from tests.factories import CustomerFactory, ProductFactory
+
+
+@pytest.fixture
+def rates(settings):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {"order_writes": "2/min", "anon_catalog": "3/min"},
+    }
+
+
+def test_token_bucket_bursts_then_refills():
+    buckets = LocalBuckets()
+    capacity, refill = parse_rate("2/min")
+    assert [buckets.consume("u", capacity, refill, now=0) for _ in range(2)] == [0, 0]
+    assert buckets.consume("u", capacity, refill, now=0) == pytest.approx(30)
+    assert buckets.consume("u", capacity, refill, now=30) == 0
+    assert buckets.consume("other", capacity, refill, now=30) == 0
+
+
+@pytest.mark.django_db
+def test_anonymous_catalog_reads_are_throttled_without_queries(rates):
+    client = APIClient()
+    for _ in range(3):
+        assert client.get("/api/categories/").status_code == 200
+    with CaptureQueriesContext(connection) as queries:
+        resp = client.get("/api/products/")
+    assert resp.status_code == 429
+    assert int(resp["Retry-After"]) > 0
+    assert len(queries) == 0
+
+
+@pytest.mark.django_db
+def test_order_writes_are_throttled_per_user(rates):
+    product = ProductFactory(stock=100)
+    payload = {"products": [{"product_id": product.id, "quantity": 1}]}
+    first, second = APIClient(), APIClient()
+    first.force_authenticate(CustomerFactory(phone_number="+254700000004").user)
+    second.force_authenticate(CustomerFactory(phone_number="+254700000005").user)
+
+    assert [first.post("/api/orders/", payload, format="json").status_code for _ in range(3)] == [201, 201, 429]
+    assert first.get("/api/orders/").status_code == 200
+    assert second.post("/api/orders/", payload, format="json").status_code == 201
+
+
+@pytest.mark.django_db
+def test_shared_cache_backend(rates, settings):
+    settings.THROTTLE_BACKEND = "cache"
+    client = APIClient()
+    statuses = [client.get("/api/categories/").status_code for _ in range(4)]
+    assert statuses == [200, 200, 200, 429]
+
+
+def test_cache_backend_requires_a_shared_cache(settings):
+    settings.THROTTLE_BACKEND = "cache"
+    assert checks.check_shared_cache(None) == []
+
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    assert [error.id for error in checks.check_shared_cache(None)] == ["api.E002"]
+
+
+def test_local_buckets_forget_the_least_recently_used_key_of_any_scope():
+    buckets = LocalBuckets()
+    buckets.max_keys = 2
+    assert buckets.consume("order_writes:1", 1, 60, now=0) == 0
+    assert buckets.consume("anon_catalog:a", 100, 1, now=0) == 0
+    assert buckets.consume("order_writes:1", 1, 60, now=1) == pytest.approx(59)  # still empty, now most recent
+    assert buckets.consume("anon_catalog:b", 100, 1, now=1) == 0
+
+    assert list(buckets._buckets) == ["order_writes:1", "anon_catalog:b"]
+    assert buckets.consume("order_writes:1", 1, 60, now=2) == pytest.approx(58)
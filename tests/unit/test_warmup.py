@@ -0,0 +1,63 @@
+import json
+from datetime import date
+
+import pytest
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import RequestFactory
+
+from api import warmup
+from api.health import readiness_view
+from api.models import DailyProductSales
+from tests.factories import ProductFactory
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(warmup, "_state", {"status": "pending", "timings": {}, "errors": []})
+    monkeypatch.setattr(warmup, "ensure_started", lambda: None)
+    # Like django.test.Client: keep the test transaction's connection open across warm-up requests
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    yield
+    request_started.connect(close_old_connections)
+    request_finished.connect(close_old_connections)
+
+
+@pytest.mark.django_db
+def test_readiness_waits_for_warmup(settings):
+    settings.WARMUP_PATHS = ["/api/categories/"]
+    product = ProductFactory()
+    DailyProductSales.objects.create(date=date.today(), product=product, units=3, revenue=30)
+
+    assert warmup.warmup_paths() == [
+        "/api/categories/",
+        f"/api/products/{product.pk}/",
+        f"/api/products/?category={product.category_id}",
+    ]
+    assert readiness_view(RequestFactory().get("/readyz")).status_code == 503
+
+    warmup.warm_up()
+
+    resp = readiness_view(RequestFactory().get("/readyz"))
+    assert resp.status_code == 200
+    body = json.loads(resp.content)
+    assert body["warmup"]["errors"] == []
+    assert set(body["warmup"]["timings_ms"]) == {"urls", "templates", "requests"}
+
+
+@pytest.mark.django_db
+def test_failed_warmup_requests_are_reported(settings):
+    settings.WARMUP_PATHS = ["/api/products/999999/"]
+    settings.WARMUP_TOP_PRODUCTS = 0
+    warmup.warm_up()
+    assert not warmup.is_ready()
+    assert warmup.state()["status"] == "failed"
+    assert "404" in warmup.state()["errors"][0]
+    body = json.loads(readiness_view(RequestFactory().get("/readyz")).content)
+    assert body["warmup"]["status"] == "failed"
+
+
+def test_master_warmup_leaves_workers_pending(settings):
+    warmup.warm_up(database=False)
+    assert warmup.state()["status"] == "pending"